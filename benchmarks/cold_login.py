@@ -0,0 +1,88 @@
+"""Cold server process: how long the login page and then the calculator take.
+
+The workbook download is simulated with a delay (seconds, default 3).
+The rates load in the background while the user types their password
+(type_delay seconds, default 0); the calculator waits only for what is
+left of the load. Each measurement runs in a fresh process that imports
+nothing heavy before the app does.
+
+    python -m benchmarks.cold_login [delay] [type_delay]
+"""
+import importlib.util
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+
+class SlowWorkbook:
+    """Import hook: once freight_calc.fetch loads, serve path after a delay."""
+
+    def __init__(self, path, delay):
+        self.path = path
+        self.delay = delay
+
+    def find_spec(self, name, path=None, target=None):
+        if name != "freight_calc.fetch":
+            return None
+        sys.meta_path.remove(self)
+        spec = importlib.util.find_spec(name)
+        exec_module = spec.loader.exec_module
+
+        def load(module):
+            exec_module(module)
+            delay = self.delay
+
+            class SlowFetcher(module.WorkbookFetcher):
+                def fetch(self):
+                    time.sleep(delay)
+                    return super().fetch()
+
+            module._fetchers[module.RATE_WORKBOOK_URL] = SlowFetcher(self.path)
+
+        spec.loader.exec_module = load
+        return spec
+
+
+def measure(path, delay, type_delay):
+    started = time.perf_counter()
+    sys.meta_path.insert(0, SlowWorkbook(path, delay))
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP, default_timeout=120)
+    before_run = time.perf_counter()
+    at.run()
+    login_page = time.perf_counter()
+    assert not at.exception, at.exception
+
+    time.sleep(type_delay)
+    typed = time.perf_counter()
+    at.text_input[0].input("admin")
+    at.text_input[1].input("admin123")
+    at.button[0].click().run()
+    at.run()
+    calculator = time.perf_counter()
+    assert not at.exception, at.exception
+    print(f"fetch {delay:g}s, typing {type_delay:g}s: login page {login_page - before_run:.2f}s "
+          f"({login_page - started:.2f}s from process start), calculator {calculator - typed:.2f}s after login")
+
+
+def main(delay=3.0, type_delay=0.0):
+    from benchmarks.workbooks import rate_workbook, save_workbook
+
+    work = tempfile.mkdtemp()
+    path = save_workbook(os.path.join(work, "rates.xlsx"), rate_workbook())
+    env = dict(os.environ, FREIGHT_SNAPSHOT_DIR=os.path.join(work, "rate_snapshots"),
+               FREIGHT_QUOTE_LOG=os.path.join(work, "quote_log.db"))
+    subprocess.run([sys.executable, "-m", "benchmarks.cold_login", "--measure", path, str(delay), str(type_delay)],
+                   env=env, check=True)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--measure"]:
+        measure(sys.argv[2], float(sys.argv[3]), float(sys.argv[4]))
+    else:
+        main(*(float(arg) for arg in sys.argv[1:]))
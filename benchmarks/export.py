@@ -0,0 +1,65 @@
+"""Chunked summary export vs building the whole table and writing it at once.
+
+Each case runs in its own process so its peak RSS can be read from
+getrusage. "stream" is export_quote (priced and written chunk by chunk);
+"in-memory" prices every item into one summary frame and writes it with
+pandas.
+
+    python -m benchmarks.export                      # every case
+    python -m benchmarks.export stream xlsx 50000    # one case
+"""
+import io
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.workbooks import random_items, rate_workbook, save_workbook
+from freight_calc.export import export_quote
+from freight_calc.loader import load_rate_tables
+from freight_calc.pricing import ITEM_FIELDS, price_items
+from freight_calc.render import summary_frame
+
+CASES = [("csv", 10_000), ("csv", 100_000), ("xlsx", 10_000), ("xlsx", 50_000)]
+
+
+def run_case(mode, fmt, n):
+    path = save_workbook(os.path.join(tempfile.mkdtemp(), "rates.xlsx"), rate_workbook())
+    tables = load_rate_tables(path)
+    items = random_items(tables, n)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    started = time.perf_counter()
+    if mode == "stream":
+        size = len(export_quote(items, tables.rate_index, "Admin", "Admin", "admin", fmt).read())
+    else:
+        frame = summary_frame(items, price_items(pd.DataFrame(items, columns=ITEM_FIELDS), tables.rate_index),
+                              "Admin", "Admin", "admin")
+        buffer = io.BytesIO()
+        if fmt == "xlsx":
+            frame.to_excel(buffer, index=False)
+        else:
+            buffer.write(frame.to_csv(index=False).encode("utf-8"))
+        size = len(buffer.getvalue())
+    elapsed = time.perf_counter() - started
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 - baseline
+    print(f"{mode:9} {fmt:4} {n:>8,} rows: {elapsed:6.1f} s, peak RSS growth {peak / 2**20:7.1f} MiB, "
+          f"output {size / 2**20:5.1f} MiB", flush=True)
+
+
+def main():
+    for fmt, n in CASES:
+        for mode in ["stream", "in-memory"]:
+            subprocess.run([sys.executable, "-m", "benchmarks.export", mode, fmt, str(n)], check=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        run_case(sys.argv[1], sys.argv[2], int(sys.argv[3]))
+    else:
+        main()
@@ -0,0 +1,54 @@
+"""Full page rerun vs editing one item, with many items on the page.
+
+Runs main.py headless with Streamlit's AppTest against a synthetic
+workbook, logs in, loads n additional items and times a full rerun and
+an edit of Item 1's width, which reruns only the fragments that show it.
+
+    python -m benchmarks.fragments [n_items ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.workbooks import rate_workbook, save_workbook, use_workbook
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+
+def row(i):
+    return {"supplier": f"S{i}", "sqn": "", "rm_type": "Fabric", "country": "C0", "origin": "O0",
+            "destination": "D1", "weight_value": 100.0 + i, "weight_type": "GSM (g/m²)", "width": 150.0,
+            "unit": "CM", "key": i}
+
+
+def timed(run):
+    started = time.perf_counter()
+    run()
+    return time.perf_counter() - started
+
+
+def main(*sizes):
+    work = tempfile.mkdtemp()
+    os.environ.setdefault("FREIGHT_QUOTE_LOG", os.path.join(work, "quote_log.db"))
+    os.environ.setdefault("FREIGHT_SNAPSHOT_DIR", os.path.join(work, "rate_snapshots"))
+    use_workbook(save_workbook(os.path.join(work, "rates.xlsx"), rate_workbook()))
+
+    for n in sizes or (10, 100, 1000):
+        at = AppTest.from_file(APP, default_timeout=600).run()
+        at.text_input[0].input("admin")
+        at.text_input[1].input("admin123")
+        at.button[0].click().run()
+        at.session_state["additional_rows"] = [row(i) for i in range(n - 1)]
+        at.run()
+
+        full = min(timed(at.run) for _ in range(3))
+        edits = [timed(at.number_input(key="main_width").set_value(160.0 + k).run) for k in range(3)]
+        assert not at.exception, at.exception
+        print(f"{n:5d} items: full rerun {full * 1000:6.0f} ms, edit Item 1 {min(edits) * 1000:6.0f} ms", flush=True)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
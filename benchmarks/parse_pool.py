@@ -0,0 +1,42 @@
+"""Serial vs thread-pool vs process-pool parsing of the rate sheets.
+
+Times read_rate_sheets on workbooks of 10, 50 and 200 sheets; every pool
+must produce the same frame, destinations and dates as the serial run.
+Parallel parsing only pays off with more than one core free.
+
+    python -m benchmarks.parse_pool [workers]
+"""
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+
+from benchmarks.workbooks import rate_workbook
+from freight_calc.ingest import read_rate_sheets
+
+
+def main(workers=4):
+    print(f"{os.cpu_count()} CPUs, {workers} workers")
+    for sheets in [10, 50, 200]:
+        content = rate_workbook(n_destinations=sheets // 2, n_months=12)
+        expected = None
+        line = f"{sheets:4d} sheets:"
+        for label, n, pool in [("serial", 1, "process"), ("threads", workers, "thread"),
+                               ("processes", workers, "process")]:
+            started = time.perf_counter()
+            rates, destinations, dates, _ = read_rate_sheets(
+                pd.ExcelFile(io.BytesIO(content), engine="openpyxl"), n, pool, content)
+            elapsed = time.perf_counter() - started
+            result = (rates.drop(columns="effective_date"), destinations, dates)
+            if expected is None:
+                expected = result
+            else:
+                assert result[0].equals(expected[0]) and result[1:] == expected[1:], label
+            line += f"  {label} {elapsed:.2f}s"
+        print(line, flush=True)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,46 @@
+"""Whole-sheet parsing vs decoding only Country, Origin and the latest column.
+
+Sheets gain a column every month, so the workbook is timed with 12, 60
+and 240 months of history. Both ways must produce the same rate frame.
+
+    python -m benchmarks.read_columns
+"""
+import io
+import time
+
+import pandas as pd
+
+from benchmarks.workbooks import rate_workbook
+from freight_calc.ingest import normalize_rate_sheet, read_rate_sheets, sheet_destination, split_rate_sheets
+
+
+def parse_whole_sheets(xls):
+    air_sheets, sea_sheets = split_rate_sheets(xls.sheet_names)
+    frames = []
+    for mode, sheets in [("air", air_sheets), ("sea", sea_sheets)]:
+        for sheet in sheets:
+            frames.append(normalize_rate_sheet(xls.parse(sheet), mode, sheet_destination(sheet))[0])
+    return pd.concat(frames, ignore_index=True)
+
+
+def best_of(runs, read, content):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        rates = read(pd.ExcelFile(io.BytesIO(content), engine="openpyxl"))
+        times.append(time.perf_counter() - started)
+    return min(times), rates
+
+
+def main():
+    for months in [12, 60, 240]:
+        content = rate_workbook(n_months=months)
+        whole, expected = best_of(2, parse_whole_sheets, content)
+        selected, rates = best_of(2, lambda xls: read_rate_sheets(xls)[0], content)
+        assert rates.drop(columns="effective_date").equals(expected.drop(columns="effective_date"))
+        print(f"{months:4d} months: whole sheets {whole:.2f}s, selected columns {selected:.2f}s, "
+              f"x{whole / selected:.1f}")
+
+
+if __name__ == "__main__":
+    main()
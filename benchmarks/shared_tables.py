@@ -0,0 +1,53 @@
+"""Per-session copies vs one shared, read-only set of rate tables.
+
+st.cache_data hands every rerun of every session its own unpickled copy;
+the immutable tables are shared through st.cache_resource instead. Times
+and traced memory for 50 sessions each reading a few dropdown menus.
+
+    python -m benchmarks.shared_tables
+"""
+import os
+import pickle
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.workbooks import rate_workbook, save_workbook
+from freight_calc.loader import load_rate_tables
+
+SESSIONS = 50
+
+
+def rerun(tables):
+    rate_index = tables.rate_index
+    for destination in tables.all_destinations[:3]:
+        for country in rate_index.countries_for(destination)[:5]:
+            rate_index.origins_for(destination, country)
+
+
+def measure(get_tables):
+    tracemalloc.start()
+    started = time.perf_counter()
+    held = []
+    for _ in range(SESSIONS):
+        tables = get_tables()
+        rerun(tables)
+        held.append(tables)
+    elapsed = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return elapsed, memory
+
+
+def main():
+    path = save_workbook(os.path.join(tempfile.mkdtemp(), "rates.xlsx"), rate_workbook(n_destinations=20))
+    tables = load_rate_tables(path)
+    print(tables.rate_index)
+    blob = pickle.dumps(tables)
+    for label, get_tables in [("copy per session", lambda: pickle.loads(blob)), ("shared", lambda: tables)]:
+        elapsed, memory = measure(get_tables)
+        print(f"{SESSIONS} sessions, {label:16}: {elapsed * 1000:8.2f} ms, {memory / 2**20:7.3f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Synthetic rate workbooks and items for the benchmarks.
+
+Workbooks are laid out like the published rate sheet: one "Air Freight -"
+and one "Sea Freight -" sheet per destination with Country, Origin and a
+column per month, plus the Markup sheet. Everything is seeded, so a run
+measures the same data every time.
+"""
+import io
+import random
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from freight_calc.fetch import RATE_WORKBOOK_URL, WorkbookFetcher, _fetchers
+from freight_calc.pricing import UNITS, WEIGHT_TYPES
+
+RM_TYPES = ["Fabric", "Elastic", "Lace"]
+
+
+def rate_workbook(n_destinations=6, n_lanes=300, n_months=3, n_countries=7, seed=0):
+    """XLSX bytes of a rate workbook with n_months dated columns per sheet."""
+    rng = np.random.default_rng(seed)
+    months = pd.date_range(end="2026-10-01", periods=n_months, freq="MS")
+    header = ["Country", "Origin"] + [month.strftime("%m/%d/%Y") for month in months]
+    destinations = [f"D{i}" for i in range(n_destinations)]
+
+    book = Workbook(write_only=True)
+    for mode in ["Air Freight", "Sea Freight"]:
+        for destination in destinations:
+            sheet = book.create_sheet(f"{mode} - {destination}")
+            sheet.append(header)
+            rates = np.round(rng.uniform(1, 100, (n_lanes, n_months)), 2)
+            for lane in range(n_lanes):
+                sheet.append([f"C{lane % n_countries}", f"O{lane}"] + rates[lane].tolist())
+    markup = book.create_sheet("Markup")
+    markup.append(["RM Type"] + destinations)
+    for rm_type, value in zip(RM_TYPES, [1.1, 1.2, 1.3]):
+        markup.append([rm_type] + [value] * n_destinations)
+
+    buffer = io.BytesIO()
+    book.save(buffer)
+    return buffer.getvalue()
+
+
+def save_workbook(path, content):
+    with open(path, "wb") as f:
+        f.write(content)
+    return path
+
+
+def use_workbook(path):
+    """Make the app and load_rate_tables() read the workbook at path instead of the URL."""
+    _fetchers[RATE_WORKBOOK_URL] = WorkbookFetcher(path)
+
+
+def random_items(tables, n, seed=0):
+    """n item dicts on lanes the tables serve, as the calculator keeps them."""
+    rng = random.Random(seed)
+    rate_index = tables.rate_index
+    destinations = list(tables.all_destinations)
+    items = []
+    for i in range(n):
+        destination = rng.choice(destinations)
+        country = rng.choice(list(rate_index.countries_for(destination)) or [""])
+        items.append({
+            "supplier": f"S{i}", "sqn": f"Q{i}", "rm_type": rng.choice(list(tables.rm_types)),
+            "country": country, "origin": rng.choice(list(rate_index.origins_for(destination, country)) or [""]),
+            "destination": destination, "weight_value": round(rng.random() * 400, 1),
+            "weight_type": rng.choice(WEIGHT_TYPES), "width": round(rng.random() * 200, 1),
+            "unit": rng.choice(UNITS), "key": i,
+        })
+    return items
@@ -0,0 +1 @@
+"""Rate loading and pricing helpers shared by the Streamlit app (main.py)."""
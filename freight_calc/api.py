@@ -0,0 +1,195 @@
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from .bulk import BULK_FIELDS, NUMBER_FIELDS, RESULT_DECIMALS, validate_items
+from .pricing import price_columns
+
+MAX_BATCH_ITEMS = 100_000
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+RESULT_FIELDS = ["width_m", "converted_gsm", "kg_per_m", "markup",
+                 "air_rate", "sea_rate", "final_air_rate", "final_sea_rate"]
+
+
+# ----------------------
+# LATENCY
+# ----------------------
+class LatencyTracker:
+    """Keeps the most recent request durations per endpoint for p50/p99."""
+
+    def __init__(self, window=10_000):
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds):
+        with self._lock:
+            if endpoint not in self._samples:
+                self._samples[endpoint] = deque(maxlen=self.window)
+                self._counts[endpoint] = 0
+            self._samples[endpoint].append(seconds)
+            self._counts[endpoint] += 1
+
+    def summary(self):
+        with self._lock:
+            snapshot = {k: np.array(v) for k, v in self._samples.items()}
+            counts = dict(self._counts)
+        return {
+            endpoint: {
+                "count": counts[endpoint],
+                "p50_ms": round(float(np.percentile(samples, 50)) * 1000, 3),
+                "p99_ms": round(float(np.percentile(samples, 99)) * 1000, 3),
+            }
+            for endpoint, samples in snapshot.items()
+        }
+
+
+# ----------------------
+# PRICING
+# ----------------------
+def columns_from_json(raw_items):
+    """Turn a list of JSON item objects into a dict of NumPy columns.
+
+    supplier and sqn are optional; every other item field is required.
+    """
+    if not all(isinstance(item, dict) for item in raw_items):
+        raise ValueError("every item must be a JSON object")
+    required = [f for f in BULK_FIELDS if f not in ("supplier", "sqn")]
+    missing = sorted({f for item in raw_items for f in required if f not in item})
+    if missing:
+        raise ValueError(f"Missing field(s): {', '.join(missing)}")
+
+    columns = {}
+    for field in BULK_FIELDS:
+        values = [item.get(field) for item in raw_items]
+        if field in NUMBER_FIELDS:
+            columns[field] = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype=np.float64)
+        else:
+            columns[field] = np.array(["" if v is None else str(v).strip() for v in values], dtype=object)
+    return columns
+
+
+def quote_items(raw_items, rate_index):
+    """Price a list of item dicts; returns one result dict per item.
+
+    Items use the bulk upload fields. Results carry the same figures as the
+    calculator (rounded the same way), None where a mode isn't available,
+    and an "error" message when the item couldn't be priced.
+    """
+    if not raw_items:
+        return []
+    items = columns_from_json(raw_items)
+    priced = price_columns(items, rate_index)
+    errors = validate_items(items, priced["air_rate"], priced["sea_rate"], rate_index).tolist()
+
+    columns = {}
+    for field in RESULT_FIELDS:
+        values = priced[field]
+        if field in RESULT_DECIMALS:
+            values = np.round(values, RESULT_DECIMALS[field])
+        columns[field] = [None if v != v else v for v in values.tolist()]
+
+    results = []
+    for i, error in enumerate(errors):
+        result = {"sqn": items["sqn"][i], "supplier": items["supplier"][i]}
+        if error:
+            result.update({field: None for field in RESULT_FIELDS})
+        else:
+            result.update({field: columns[field][i] for field in RESULT_FIELDS})
+        result["air_available"] = result["final_air_rate"] is not None
+        result["sea_available"] = result["final_sea_rate"] is not None
+        result["error"] = error or None
+        results.append(result)
+    return results
+
+
+# ----------------------
+# HTTP SERVER
+# ----------------------
+class QuoteHandler(BaseHTTPRequestHandler):
+    server_version = "FreightQuote/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError("request body too large")
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "rates_as_of": self.server.tables.rate_month_year})
+        elif self.path == "/metrics":
+            self._send_json(200, self.server.latency.summary())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        started = time.perf_counter()
+        if self.path not in ("/quote", "/quote/batch"):
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            payload = self._read_json()
+            if self.path == "/quote":
+                if not isinstance(payload, dict):
+                    raise ValueError("expected a JSON object with the item fields")
+                raw_items = [payload]
+            else:
+                raw_items = payload.get("items") if isinstance(payload, dict) else payload
+                if not isinstance(raw_items, list):
+                    raise ValueError('expected a JSON list of items or {"items": [...]}')
+                if len(raw_items) > MAX_BATCH_ITEMS:
+                    raise ValueError(f"at most {MAX_BATCH_ITEMS} items per batch")
+            results = quote_items(raw_items, self.server.tables.rate_index)
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        if self.path == "/quote":
+            self._send_json(200, results[0])
+        else:
+            self._send_json(200, {"items": results})
+        self.server.latency.record(self.path, time.perf_counter() - started)
+
+
+class QuoteServer(ThreadingHTTPServer):
+    """Threaded HTTP server; all requests share the refresher's current snapshot."""
+
+    daemon_threads = True
+
+    def __init__(self, address, refresher, verbose=False):
+        super().__init__(address, QuoteHandler)
+        self.refresher = refresher
+        self.latency = LatencyTracker()
+        self.verbose = verbose
+
+    @property
+    def tables(self):
+        return self.refresher.get().tables
+
+
+def serve(refresher, host="127.0.0.1", port=8080, verbose=False):
+    server = QuoteServer((host, port), refresher, verbose)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
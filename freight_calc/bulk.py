@@ -0,0 +1,136 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from .pricing import ITEM_FIELDS, UNITS, WEIGHT_TYPES, price_items
+
+# ----------------------
+# BULK FILE LAYOUT
+# ----------------------
+BULK_FIELDS = ["supplier", "sqn"] + ITEM_FIELDS
+TEXT_FIELDS = ["supplier", "sqn", "rm_type", "country", "origin", "destination", "weight_type", "unit"]
+NUMBER_FIELDS = ["weight_value", "width"]
+
+# Output columns, named like the calculator's summary table
+ADMIN_RESULT_COLUMNS = {
+    "converted_gsm": "Converted GSM (g/m²)",
+    "width_m": "Width (m)",
+    "kg_per_m": "Weight/m (kg)",
+    "markup": "Markup",
+    "air_rate": "Air Rate ($/kg)",
+    "final_air_rate": "Final Air Rate ($)",
+    "sea_rate": "Sea Rate ($/CBM)",
+    "final_sea_rate": "Final Sea Rate ($)",
+}
+BUSINESS_RESULT_COLUMNS = {
+    "converted_gsm": "Converted GSM (g/m²)",
+    "width_m": "Width (m)",
+    "kg_per_m": "Weight/m (kg)",
+    "final_air_rate": "Final Air Rate ($)",
+    "final_sea_rate": "Final Sea Rate ($)",
+}
+RESULT_DECIMALS = {
+    "converted_gsm": 2, "width_m": 4, "kg_per_m": 6,
+    "air_rate": 2, "sea_rate": 2, "final_air_rate": 4, "final_sea_rate": 4,
+}
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+def read_items(data, filename):
+    """Read an uploaded CSV/XLSX into a frame with BULK_FIELDS columns.
+
+    Headers are matched case-insensitively, with spaces treated as
+    underscores. Raises ValueError if a required column is missing.
+    """
+    buffer = io.BytesIO(data) if isinstance(data, bytes) else data
+    if str(filename).lower().endswith((".xlsx", ".xls")):
+        items = pd.read_excel(buffer, dtype={f: str for f in TEXT_FIELDS})
+    else:
+        items = pd.read_csv(buffer, dtype={f: str for f in TEXT_FIELDS})
+    return normalize_columns(items)
+
+
+def normalize_columns(items):
+    items = items.rename(columns=lambda c: str(c).strip().lower().replace(" ", "_"))
+    missing = [f for f in BULK_FIELDS if f not in items.columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+    items = items[BULK_FIELDS].copy()
+    for field in TEXT_FIELDS:
+        items[field] = items[field].fillna("").astype(str).str.strip()
+    for field in NUMBER_FIELDS:
+        items[field] = pd.to_numeric(items[field], errors="coerce")
+    return items.reset_index(drop=True)
+
+
+# ----------------------
+# VALIDATION
+# ----------------------
+def validate_items(items, air_rate, sea_rate, rate_index):
+    """Return one error message per row ("" when the row is fine).
+
+    items is a DataFrame or dict of columns. Checks run as array operations
+    over the whole batch; a row keeps the first problem found.
+    """
+    weight_value = np.asarray(items["weight_value"], dtype=np.float64)
+    width = np.asarray(items["width"], dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        checks = [
+            (np.isnan(weight_value), "weight_value is not a number"),
+            (np.isnan(width), "width is not a number"),
+            (~np.isin(np.asarray(items["weight_type"], dtype=object), WEIGHT_TYPES), "unknown weight_type"),
+            (~np.isin(np.asarray(items["unit"], dtype=object), UNITS), "unknown unit"),
+            (weight_value <= 0, "weight_value must be greater than 0"),
+            (width <= 0, "width must be greater than 0"),
+            (rate_index.destination_ids(items["destination"]) < 0, "unknown destination"),
+            (rate_index.rm_type_ids(items["rm_type"]) < 0, "unknown rm_type"),
+            (rate_index.lane_ids(items["country"], items["origin"]) < 0, "unknown country/origin"),
+            (np.isnan(air_rate) & np.isnan(sea_rate), "no air or sea rate for this lane"),
+        ]
+    errors = np.full(len(weight_value), "", dtype=object)
+    for failed, message in reversed(checks):
+        errors = np.where(failed, message, errors)
+    return errors
+
+
+# ----------------------
+# PRICING
+# ----------------------
+def price_chunk(items, rate_index, role="Business", as_of=None):
+    """Validate and price one chunk; returns the items plus result and Error columns."""
+    priced = price_items(items, rate_index, as_of)
+    errors = validate_items(items, priced["air_rate"].to_numpy(), priced["sea_rate"].to_numpy(), rate_index)
+
+    columns = ADMIN_RESULT_COLUMNS if role == "Admin" else BUSINESS_RESULT_COLUMNS
+    out = items.copy()
+    failed = errors != ""
+    for key, name in columns.items():
+        values = priced[key].to_numpy()
+        if key in RESULT_DECIMALS:
+            values = np.round(values, RESULT_DECIMALS[key])
+        out[name] = np.where(failed, np.nan, values)
+    out["Error"] = errors
+    return out
+
+
+def price_bulk(items, rate_index, role="Business", chunk_size=DEFAULT_CHUNK_SIZE, progress=None,
+               as_of=None):
+    """Price a bulk upload in chunks, calling progress(done, total) after each one.
+
+    With as_of, every item is priced at the rates in effect on that date.
+    """
+    total = len(items)
+    chunks = []
+    for start in range(0, total, chunk_size):
+        chunks.append(price_chunk(items.iloc[start:start + chunk_size], rate_index, role, as_of))
+        if progress is not None:
+            progress(min(start + chunk_size, total), total)
+    if not chunks:
+        return price_chunk(items, rate_index, role, as_of)
+    return pd.concat(chunks)
+
+
+def to_csv_bytes(priced):
+    return priced.to_csv(index=False).encode("utf-8")
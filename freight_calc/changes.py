@@ -0,0 +1,97 @@
+from collections import deque, namedtuple
+
+import numpy as np
+import pandas as pd
+
+# ----------------------
+# CHANGE LOG
+# ----------------------
+CHANGE_COLUMNS = ["change", "mode", "destination", "country", "origin", "rm_type", "old", "new"]
+LANE_KEYS = ["mode", "destination", "country", "origin"]
+
+DEFAULT_CHANGE_HISTORY = 20
+
+# One refresh that changed something: the new snapshot version and its changes
+ChangeLogEntry = namedtuple("ChangeLogEntry", ["version", "loaded_at", "changes"])
+
+
+def lane_rates(rate_index):
+    """Long frame of every rate in an index: mode, destination, country, origin, rate."""
+    countries = np.array(rate_index.countries, dtype=object)
+    origins = np.array(rate_index.origins, dtype=object)
+    destinations = np.array(rate_index.destinations, dtype=object)
+    frames = []
+    for mode, matrix in (("air", rate_index.air), ("sea", rate_index.sea)):
+        lanes, dests = np.nonzero(~np.isnan(matrix))
+        frames.append(pd.DataFrame({
+            "mode": mode,
+            "destination": destinations[dests],
+            "country": countries[rate_index.lane_country[lanes]],
+            "origin": origins[rate_index.lane_origin[lanes]],
+            "rate": matrix[lanes, dests],
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def _markups(rate_index):
+    rm_types = np.array(rate_index.rm_types, dtype=object)
+    destinations = np.array(rate_index.destinations, dtype=object)
+    r, d = np.nonzero(~np.isnan(rate_index.markup_matrix))
+    return pd.DataFrame({"rm_type": rm_types[r], "destination": destinations[d],
+                         "markup": rate_index.markup_matrix[r, d]})
+
+
+def _classify(merged, old, new, keys, labels):
+    added, removed, changed = labels
+    change = np.select(
+        [merged["_merge"] == "right_only", merged["_merge"] == "left_only", merged[old] != merged[new]],
+        [added, removed, changed], default="")
+    out = merged.assign(change=change, old=merged[old], new=merged[new])
+    return out[out["change"] != ""][["change"] + keys + ["old", "new"]]
+
+
+def diff_rate_tables(old, new):
+    """Return the change log between two RateTables as a CHANGE_COLUMNS frame.
+
+    Lists lanes that were added, removed or repriced, and RM type markups
+    that were added, removed or changed, sorted by destination.
+    """
+    rates = pd.merge(lane_rates(old.rate_index), lane_rates(new.rate_index), how="outer",
+                     on=LANE_KEYS, suffixes=("_old", "_new"), indicator=True)
+    lane_changes = _classify(rates, "rate_old", "rate_new", LANE_KEYS,
+                             ("lane added", "lane removed", "repriced"))
+
+    markups = pd.merge(_markups(old.rate_index), _markups(new.rate_index), how="outer",
+                       on=["rm_type", "destination"], suffixes=("_old", "_new"), indicator=True)
+    markup_changes = _classify(markups, "markup_old", "markup_new", ["rm_type", "destination"],
+                               ("markup added", "markup removed", "markup changed"))
+
+    changes = pd.concat([lane_changes, markup_changes], ignore_index=True)
+    changes = changes.reindex(columns=CHANGE_COLUMNS)
+    return changes.sort_values(["destination", "change", "mode", "country", "origin", "rm_type"],
+                               na_position="first", ignore_index=True)
+
+
+def summarize_changes(changes):
+    """Short summary such as "3 repriced, 1 lane added"; "no changes" if empty."""
+    if changes is None or changes.empty:
+        return "no changes"
+    counts = changes["change"].value_counts(sort=False)
+    return ", ".join(f"{n} {change}" for change, n in counts.items())
+
+
+class ChangeLog:
+    """The most recent rate changes, newest first, for the admin view."""
+
+    def __init__(self, keep=DEFAULT_CHANGE_HISTORY):
+        self._entries = deque(maxlen=keep)
+
+    def record(self, old, new, version, loaded_at):
+        """Diff two RateTables and keep the result if anything changed."""
+        changes = diff_rate_tables(old, new)
+        if not changes.empty:
+            self._entries.appendleft(ChangeLogEntry(version, loaded_at, changes))
+        return changes
+
+    def entries(self):
+        return list(self._entries)
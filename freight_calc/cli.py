@@ -0,0 +1,191 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .api import serve
+from .bulk import BULK_FIELDS, DEFAULT_CHUNK_SIZE, TEXT_FIELDS, normalize_columns, price_chunk
+from .fetch import RATE_WORKBOOK_URL
+from .loader import load_rate_tables
+from .refresh import DEFAULT_REFRESH_SECONDS, RateRefresher
+from .shared import publish
+
+# ----------------------
+# WORKER STATE
+# ----------------------
+# Each worker process receives the compiled index once, at start-up
+_worker_index = None
+_worker_role = None
+
+
+def _init_worker(rate_index, role):
+    global _worker_index, _worker_role
+    _worker_index = rate_index
+    _worker_role = role
+
+
+def _price_worker(chunk):
+    """Price one raw chunk and return (csv_text, rows, errors).
+
+    The CSV text is formatted in the worker since formatting costs more
+    than pricing; the parent only writes it out.
+    """
+    priced = price_chunk(normalize_columns(chunk), _worker_index, _worker_role)
+    errors = int((priced["Error"] != "").sum())
+    return priced.to_csv(index=False, header=False), len(priced), errors
+
+
+# ----------------------
+# STREAMING I/O
+# ----------------------
+def iter_input_chunks(path, chunk_size):
+    """Yield raw input chunks. CSV is streamed; XLSX has to be read whole first."""
+    if str(path).lower().endswith((".xlsx", ".xls")):
+        items = pd.read_excel(path, dtype={f: str for f in TEXT_FIELDS})
+        for start in range(0, len(items), chunk_size):
+            yield items.iloc[start:start + chunk_size]
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype={f: str for f in TEXT_FIELDS})
+
+
+def price_file(input_path, output_path, rate_index, role="Business",
+               workers=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Price input_path into output_path (CSV) chunk by chunk; returns (rows, errors).
+
+    With workers > 1 chunks are fanned out to a process pool. At most two
+    chunks per worker are in flight, and results are written in input
+    order as soon as they are ready, so memory stays bounded.
+    """
+    rows = errors = 0
+
+    with open(output_path, "w", newline="", encoding="utf-8") as output:
+        # Header row from an empty chunk, so it's written even for empty input
+        _init_worker(rate_index, role)
+        empty = price_chunk(normalize_columns(pd.DataFrame(columns=BULK_FIELDS)), rate_index, role)
+        output.write(empty.to_csv(index=False))
+
+        def record(result):
+            nonlocal rows, errors
+            text, chunk_rows, chunk_errors = result
+            output.write(text)
+            rows += chunk_rows
+            errors += chunk_errors
+
+        chunks = iter_input_chunks(input_path, chunk_size)
+        if workers <= 1:
+            for chunk in chunks:
+                record(_price_worker(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(rate_index, role)) as pool:
+                pending = []
+                for chunk in chunks:
+                    pending.append(pool.submit(_price_worker, chunk))
+                    if len(pending) >= workers * 2:
+                        record(pending.pop(0).result())
+                for future in pending:
+                    record(future.result())
+
+    return rows, errors
+
+
+# ----------------------
+# ENTRY POINT
+# ----------------------
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m freight_calc",
+                                     description="Freight rate calculator batch tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    price = commands.add_parser("price", help="Price an item file (CSV/XLSX) into a CSV.")
+    price.add_argument("input", help="Items file with the bulk upload columns.")
+    price.add_argument("output", help="Priced CSV to write.")
+    price.add_argument("--rates", default=RATE_WORKBOOK_URL,
+                       help="Rate workbook URL or local .xlsx path (default: the published sheet).")
+    price.add_argument("--role", choices=["Admin", "Business"], default="Business",
+                       help="Which result columns to write (default: Business).")
+    price.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                       help="Worker processes (default: CPU count; 1 prices in-process).")
+    price.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                       help=f"Rows per chunk (default: {DEFAULT_CHUNK_SIZE}).")
+
+    serve = commands.add_parser("serve", help="Serve the HTTP quote API.")
+    serve.add_argument("--rates", default=RATE_WORKBOOK_URL,
+                       help="Rate workbook URL or local .xlsx path (default: the published sheet).")
+    serve.add_argument("--host", default="127.0.0.1", help="Address to bind (default: 127.0.0.1).")
+    serve.add_argument("--port", type=int, default=8080, help="Port to listen on (default: 8080).")
+    serve.add_argument("--refresh", type=int, default=DEFAULT_REFRESH_SECONDS,
+                       help=f"Reload the rates in the background every N seconds (default: {DEFAULT_REFRESH_SECONDS}).")
+    serve.add_argument("--verbose", action="store_true", help="Log every request.")
+
+    publish_cmd = commands.add_parser("publish", help="Keep a memory-mapped shared rate file up to date.")
+    publish_cmd.add_argument("output", help="Shared rate file for the app workers (FREIGHT_SHARED_RATES).")
+    publish_cmd.add_argument("--rates", default=RATE_WORKBOOK_URL,
+                             help="Rate workbook URL or local .xlsx path (default: the published sheet).")
+    publish_cmd.add_argument("--interval", type=int, default=DEFAULT_REFRESH_SECONDS,
+                             help=f"Seconds between reloads (default: {DEFAULT_REFRESH_SECONDS}).")
+    publish_cmd.add_argument("--once", action="store_true", help="Publish one generation and exit.")
+    return parser
+
+
+def run_price(args):
+    started = time.perf_counter()
+    tables = load_rate_tables(args.rates)
+    if tables.markup_error:
+        print(f"warning: Error loading markups, using fallback markups: {tables.markup_error}", file=sys.stderr)
+    loaded = time.perf_counter()
+
+    rows, errors = price_file(args.input, args.output, tables.rate_index, args.role,
+                              workers=args.workers, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - loaded
+    rate = rows / elapsed if elapsed > 0 else float("inf")
+    print(f"Rates as of {tables.rate_month_year or 'unknown'} loaded in {loaded - started:.1f}s", file=sys.stderr)
+    print(f"Priced {rows:,} rows ({errors:,} with errors) in {elapsed:.1f}s, {rate:,.0f} rows/sec "
+          f"-> {args.output}", file=sys.stderr)
+    return 0
+
+
+def run_serve(args):
+    refresher = RateRefresher(args.rates, interval=args.refresh).start()
+    tables = refresher.get().tables
+    if tables.markup_error:
+        print(f"warning: Error loading markups, using fallback markups: {tables.markup_error}", file=sys.stderr)
+    print(f"Serving quotes on http://{args.host}:{args.port} "
+          f"(rates as of {tables.rate_month_year or 'unknown'})", file=sys.stderr)
+    serve(refresher, args.host, args.port, args.verbose)
+    return 0
+
+
+def run_publish(args):
+    while True:
+        started = time.perf_counter()
+        try:
+            tables = load_rate_tables(args.rates)
+            if tables.markup_error:
+                raise RuntimeError(f"Markup sheet could not be read: {tables.markup_error}")
+            generation = publish(tables, args.output, time.perf_counter() - started)
+            print(f"Published generation {generation} ({len(tables.rate_index):,} lanes, rates as of "
+                  f"{tables.rate_month_year or 'unknown'}) in {time.perf_counter() - started:.1f}s "
+                  f"-> {args.output}", file=sys.stderr)
+            failed = False
+        except Exception as e:
+            # Workers keep mapping the previous generation
+            print(f"error: rate reload failed, keeping the previous file: {e}", file=sys.stderr)
+            failed = True
+        if args.once:
+            return 1 if failed else 0
+        time.sleep(args.interval)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "price":
+        return run_price(args)
+    if args.command == "serve":
+        return run_serve(args)
+    if args.command == "publish":
+        return run_publish(args)
+    return 1
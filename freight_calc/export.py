@@ -0,0 +1,106 @@
+import io
+import os
+import tempfile
+
+import pandas as pd
+from openpyxl import Workbook
+
+from .pricing import ITEM_FIELDS, price_items
+from .render import SUMMARY_COLUMNS, calculation_lines, rate_columns, summary_frame
+
+# ----------------------
+# QUOTE EXPORTS
+# ----------------------
+# Items priced and written per chunk; memory holds one chunk at a time
+DEFAULT_EXPORT_CHUNK_SIZE = int(os.environ.get("FREIGHT_EXPORT_CHUNK_SIZE", "5000"))
+
+SUMMARY_SHEET = "Summary"
+EXPLANATION_SHEET = "How charges were calculated"
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def export_columns(role):
+    """The summary columns plus every rate column role sees, air then sea.
+
+    Unlike the on-screen table, an export always has all of them, so every
+    chunk of a long list is written with the same header.
+    """
+    return SUMMARY_COLUMNS + [column for mode in ("air", "sea") for column, _, _ in rate_columns(role, mode)]
+
+
+def summary_chunks(items, rate_index, role, user, user_email, as_of=None,
+                   chunk_size=DEFAULT_EXPORT_CHUNK_SIZE):
+    """Yield the summary table of item dicts in chunks with export_columns(role).
+
+    Each chunk is priced with one price_items call and formatted only when
+    the writer asks for it. An empty list yields one empty chunk.
+    """
+    columns = export_columns(role)
+    for start in range(0, max(len(items), 1), chunk_size):
+        chunk = items[start:start + chunk_size]
+        priced = price_items(pd.DataFrame(chunk, columns=ITEM_FIELDS), rate_index, as_of)
+        yield summary_frame(chunk, priced, role, user, user_email, first_item=start + 1).reindex(columns=columns)
+
+
+def write_csv(chunks, out):
+    """Write summary chunks to a text stream as one CSV; returns the rows written."""
+    rows = 0
+    for i, chunk in enumerate(chunks):
+        chunk.to_csv(out, index=False, header=i == 0)
+        rows += len(chunk)
+    return rows
+
+
+def write_xlsx(chunks, out, role="Business", explanations=False):
+    """Write summary chunks to out (a path or binary file) as an XLSX workbook.
+
+    The workbook is write-only: openpyxl streams appended rows into each
+    sheet's temporary XML file instead of keeping cell objects, so memory
+    doesn't grow with the row count. With explanations, a second sheet
+    holds each item's "How These Charges Were Calculated" lines. Returns
+    the rows written to the summary sheet.
+    """
+    book = Workbook(write_only=True)
+    summary = book.create_sheet(SUMMARY_SHEET)
+    explained = book.create_sheet(EXPLANATION_SHEET) if explanations else None
+    rows = 0
+    for i, chunk in enumerate(chunks):
+        if i == 0:
+            summary.append(list(chunk.columns))
+            if explained is not None:
+                explained.append(["Item", "Calculation"])
+        # openpyxl writes NaN as a number Excel can't open; blank cells instead
+        for record in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None):
+            summary.append(record)
+        if explained is not None:
+            for row in chunk.to_dict("records"):
+                for line in calculation_lines(row, role):
+                    explained.append([row["Item"], line])
+        rows += len(chunk)
+    book.save(out)
+    return rows
+
+
+def export_quote(items, rate_index, role, user, user_email, fmt="xlsx", as_of=None, explanations=False,
+                 chunk_size=DEFAULT_EXPORT_CHUNK_SIZE):
+    """Write the summary of items as "csv" or "xlsx" to a temporary file.
+
+    Returns the file, rewound, for a download button to read.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(EXPORT_FORMATS)}")
+    chunks = summary_chunks(items, rate_index, role, user, user_email, as_of, chunk_size)
+    out = tempfile.TemporaryFile()
+    if fmt == "xlsx":
+        write_xlsx(chunks, out, role, explanations)
+    else:
+        text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+        write_csv(chunks, text)
+        text.flush()
+        text.detach()
+    out.seek(0)
+    return out
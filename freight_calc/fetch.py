@@ -0,0 +1,82 @@
+import importlib.util
+import io
+import os
+
+import pandas as pd
+import requests
+
+# ----------------------
+# RATE WORKBOOK SOURCE
+# ----------------------
+RATE_WORKBOOK_URL = "https://docs.google.com/spreadsheets/d/e/2PACX-1vSUIxBeSTWHg5CaTSAPDPo-cBOA_ah9M7sJ-GOpBemYl6VlJyQma9eWPVpLg2uiXk_0LPlHiimfZulz/pub?output=xlsx"
+
+
+# python-calamine (optional) parses XLSX much faster; openpyxl is the fallback
+EXCEL_ENGINE = os.environ.get("FREIGHT_EXCEL_ENGINE") or (
+    "calamine" if importlib.util.find_spec("python_calamine") else "openpyxl")
+
+
+class WorkbookFetcher:
+    """Downloads the rate workbook once per refresh and remembers the copy.
+
+    Repeat fetches send If-None-Match / If-Modified-Since, so an unchanged
+    workbook comes back as a 304 and the cached bytes are reused. A local
+    file path can be given instead of a URL.
+    """
+
+    def __init__(self, source=RATE_WORKBOOK_URL, timeout=60):
+        self.source = source
+        self.timeout = timeout
+        self.content = None
+        self.etag = None
+        self.last_modified = None
+        self.not_modified = False
+
+    def is_local(self):
+        return not str(self.source).startswith(("http://", "https://"))
+
+    def fetch(self):
+        """Return the workbook bytes, downloading only if they changed."""
+        if self.is_local():
+            with open(self.source, "rb") as f:
+                self.content = f.read()
+            self.last_modified = str(os.path.getmtime(self.source))
+            self.not_modified = False
+            return self.content
+
+        headers = {}
+        if self.content is not None:
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+
+        response = requests.get(self.source, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and self.content is not None:
+            self.not_modified = True
+            return self.content
+
+        response.raise_for_status()
+        self.content = response.content
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+        self.not_modified = False
+        return self.content
+
+    def open(self):
+        """Fetch and open the workbook so every sheet parses from one buffer."""
+        return pd.ExcelFile(io.BytesIO(self.fetch()), engine=EXCEL_ENGINE)
+
+
+# One fetcher per process so validators survive across cache refreshes
+_fetchers = {}
+
+
+def get_fetcher(source=RATE_WORKBOOK_URL):
+    if source not in _fetchers:
+        _fetchers[source] = WorkbookFetcher(source)
+    return _fetchers[source]
+
+
+def open_workbook(source=RATE_WORKBOOK_URL):
+    return get_fetcher(source).open()
@@ -0,0 +1,129 @@
+import os
+
+import pandas as pd
+
+from .bulk import NUMBER_FIELDS
+from .pricing import UNITS, WEIGHT_TYPES
+
+# ----------------------
+# ITEM GRID
+# ----------------------
+# Columns of the additional-items editor, in display order
+GRID_FIELDS = ["supplier", "sqn", "rm_type", "destination", "country", "origin",
+               "weight_value", "weight_type", "width", "unit"]
+
+DEFAULT_PAGE_SIZE = int(os.environ.get("FREIGHT_GRID_PAGE_SIZE", "100"))
+
+
+def blank_item(row_id, rm_types, destinations):
+    """A new additional item; row_id is its stable "key" (never reused)."""
+    return {
+        "supplier": "",
+        "sqn": "",
+        "rm_type": rm_types[0] if rm_types else "",
+        "country": "",
+        "origin": "",
+        "destination": destinations[0] if destinations else "",
+        "weight_value": 0.0,
+        "weight_type": "GSM (g/m²)",
+        "width": 0.0,
+        "unit": "CM",
+        "key": row_id,
+    }
+
+
+def page_count(n_rows, page_size=DEFAULT_PAGE_SIZE):
+    return max(1, -(-n_rows // page_size))
+
+
+def page_bounds(n_rows, page, page_size=DEFAULT_PAGE_SIZE):
+    """(start, stop) of a 1-based page, clamped to the pages that exist."""
+    page = min(max(page, 1), page_count(n_rows, page_size))
+    return (page - 1) * page_size, min(page * page_size, n_rows)
+
+
+def grid_frame(rows, first_item):
+    """The rows shown in the editor, one column per GRID_FIELDS.
+
+    first_item is the item number of the first row ("Item" column, read-only).
+    The index is a plain range: the editor reports rows by position, and
+    the caller keeps the row ids of the page to map them back.
+    """
+    frame = pd.DataFrame([{field: row[field] for field in GRID_FIELDS} for row in rows], columns=GRID_FIELDS)
+    frame.insert(0, "item", range(first_item, first_item + len(rows)))
+    return frame
+
+
+def _cell(field, value):
+    # Cleared cells come back as None; pasted numbers may arrive as text
+    if field in NUMBER_FIELDS:
+        value = pd.to_numeric(value, errors="coerce")
+        return 0.0 if pd.isna(value) else float(value)
+    return "" if value is None else str(value).strip()
+
+
+def fix_choices(row, rate_index, rm_types, destinations):
+    """Replace values that aren't valid choices, as the dropdowns would.
+
+    The grid offers every country and origin in one column each, so a row's
+    country must be one served to its destination and its origin one of
+    that country's; otherwise the first available one is used.
+    """
+    if row["rm_type"] not in rm_types:
+        row["rm_type"] = rm_types[0] if rm_types else ""
+    if row["destination"] not in destinations:
+        row["destination"] = destinations[0] if destinations else ""
+    if row["weight_type"] not in WEIGHT_TYPES:
+        row["weight_type"] = WEIGHT_TYPES[0]
+    if row["unit"] not in UNITS:
+        row["unit"] = UNITS[0]
+
+    available_countries = rate_index.countries_for(row["destination"])
+    if row["country"] not in available_countries:
+        row["country"] = available_countries[0] if available_countries else ""
+    available_origins = rate_index.origins_for(row["destination"], row["country"])
+    if row["origin"] not in available_origins:
+        row["origin"] = available_origins[0] if available_origins else ""
+    return row
+
+
+def apply_grid_edits(rows, page_ids, edits, new_row):
+    """Apply a data editor's changes to rows (a list of item dicts) in place.
+
+    page_ids are the ids of the rows the editor showed, in order, and edits
+    its widget state: edited_rows maps a position on the page to the cells
+    that changed, added_rows are new rows (added with + or pasted past the
+    last row) and deleted_rows are positions on the page. Only changed
+    cells are written. new_row() returns a blank item with a new id.
+
+    Returns (changed, structural): the edited or added rows, and whether
+    rows were added or deleted (so positions after them moved).
+    """
+    by_id = {row["key"]: row for row in rows}
+    changed = []
+    for position, cells in edits.get("edited_rows", {}).items():
+        row = by_id[page_ids[int(position)]]
+        for field, value in cells.items():
+            if field in GRID_FIELDS:
+                row[field] = _cell(field, value)
+        changed.append(row)
+
+    added = []
+    for cells in edits.get("added_rows", []):
+        row = new_row()
+        for field, value in cells.items():
+            if field in GRID_FIELDS:
+                row[field] = _cell(field, value)
+        added.append(row)
+
+    deleted = {page_ids[int(position)] for position in edits.get("deleted_rows", [])}
+    if added:
+        # New rows go right after the page they were added on
+        at = len(rows)
+        if page_ids:
+            at = [row["key"] for row in rows].index(page_ids[-1]) + 1
+        rows[at:at] = added
+    if deleted:
+        rows[:] = [row for row in rows if row["key"] not in deleted]
+    changed = [row for row in changed if row["key"] not in deleted] + added
+    return changed, bool(added or deleted)
@@ -0,0 +1,154 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# The dated rate columns of one sheet: rates is a rows x dates float matrix
+SheetHistory = namedtuple("SheetHistory", ["mode", "destination", "countries", "origins", "dates", "rates"])
+
+MODES = ("air", "sea")
+
+
+def _day(value):
+    return np.datetime64(pd.Timestamp(value).normalize().to_datetime64(), "D")
+
+
+class RateHistory:
+    """Every monthly rate of every lane, stored as change points.
+
+    Each (mode, lane, destination) is a series. Its points are kept in one
+    flat, CSR-style layout: series ids (sorted), offsets into the point
+    arrays, a date id per point (an index into the sorted dates) and the
+    rate. A point is stored only where the rate differs from the month
+    before, so unchanged months cost nothing. An as-of lookup is two
+    binary searches: one for the series, one over its dates.
+    """
+
+    ARRAY_NAMES = ("series", "offsets", "date_ids", "values", "dates")
+
+    def __init__(self, series, offsets, date_ids, values, dates, n_lanes, n_destinations):
+        self.series = series
+        self.offsets = offsets
+        self.date_ids = date_ids
+        self.values = values
+        self.dates = dates
+        self.n_lanes = n_lanes
+        self.n_destinations = n_destinations
+
+    @classmethod
+    def build(cls, sheets, rate_index):
+        """Compile SheetHistory blocks against the lanes and destinations of rate_index."""
+        n_lanes, n_destinations = len(rate_index), len(rate_index.destinations)
+        sids, days, values = [], [], []
+        for sheet in sheets:
+            if not len(sheet.dates) or not len(sheet.countries):
+                continue
+            d = rate_index.destination_ids([sheet.destination])[0]
+            lanes = rate_index.lane_ids(sheet.countries, sheet.origins)
+            if d < 0:
+                continue
+
+            # Later rows for the same lane win, as in RateIndex.build
+            reversed_first = np.unique(lanes[::-1], return_index=True)[1]
+            rows = np.sort(len(lanes) - 1 - reversed_first)
+            rows = rows[lanes[rows] >= 0]
+            sheet_days = np.array([_day(date) for date in sheet.dates], dtype="datetime64[D]")
+            # Columns in date order; a repeated date keeps its later column
+            reversed_first = np.unique(sheet_days[::-1], return_index=True)[1]
+            cols = len(sheet_days) - 1 - reversed_first
+            rates = np.asarray(sheet.rates, dtype=np.float64)[np.ix_(rows, cols)]
+
+            keep = np.ones(rates.shape, dtype=bool)
+            same = (rates[:, 1:] == rates[:, :-1]) | (np.isnan(rates[:, 1:]) & np.isnan(rates[:, :-1]))
+            keep[:, 1:] = ~same
+            r, c = np.nonzero(keep)
+            mode = MODES.index(sheet.mode)
+            sids.append((mode * n_lanes + lanes[rows][r].astype(np.int64)) * n_destinations + d)
+            days.append(sheet_days[cols][c])
+            values.append(rates[r, c])
+
+        if not sids:
+            return cls(np.empty(0, np.int64), np.zeros(1, np.int64), np.empty(0, np.uint16),
+                       np.empty(0, np.float64), np.empty(0, "datetime64[D]"), n_lanes, n_destinations)
+
+        sids, days, values = np.concatenate(sids), np.concatenate(days), np.concatenate(values)
+        dates, date_ids = np.unique(days, return_inverse=True)
+        order = np.lexsort((date_ids, sids))
+        sids, date_ids, values = sids[order], date_ids[order], values[order]
+
+        # Drop repeats of the previous point in the same series
+        same_series = np.r_[False, sids[1:] == sids[:-1]]
+        same_value = np.r_[False, (values[1:] == values[:-1]) | (np.isnan(values[1:]) & np.isnan(values[:-1]))]
+        keep = ~(same_series & same_value)
+        sids, date_ids, values = sids[keep], date_ids[keep], values[keep]
+
+        series, starts = np.unique(sids, return_index=True)
+        offsets = np.append(starts, len(sids)).astype(np.int64)
+        date_ids = date_ids.astype(np.min_scalar_type(max(len(dates) - 1, 0)))
+        return cls(series, offsets, date_ids, values, dates, n_lanes, n_destinations)
+
+    # ----------------------
+    # LOOKUPS
+    # ----------------------
+    def months(self):
+        """The effective dates in the history, oldest first."""
+        return [pd.Timestamp(d) for d in self.dates]
+
+    def _lookup_mode(self, mode, lanes, destinations, t):
+        out = np.full(len(lanes), np.nan)
+        if not len(self.series):
+            return out
+        sid = (mode * self.n_lanes + lanes.astype(np.int64)) * self.n_destinations + destinations
+        pos = np.minimum(np.searchsorted(self.series, sid), len(self.series) - 1)
+        found = (lanes >= 0) & (destinations >= 0) & (t >= 0) & (self.series[pos] == sid)
+
+        # Vectorized bisect_right over each series' dates: O(log months) steps
+        start = self.offsets[pos]
+        lo, hi = start.copy(), np.where(found, self.offsets[pos + 1], start)
+        while True:
+            active = lo < hi
+            if not active.any():
+                break
+            mid = (lo + hi) // 2
+            later = self.date_ids[np.where(active, mid, 0)] > t
+            lo = np.where(active & ~later, mid + 1, lo)
+            hi = np.where(active & later, mid, hi)
+
+        ok = found & (lo > start)
+        out[ok] = self.values[lo[ok] - 1]
+        return out
+
+    def lookup_many(self, lanes, destinations, as_of):
+        """(air, sea) rates in effect on as_of for arrays of lane and destination ids.
+
+        as_of is one date, or an array with a date per lane.
+        """
+        if np.ndim(as_of):
+            days = pd.DatetimeIndex(np.asarray(as_of)).normalize().to_numpy().astype("datetime64[D]")
+        else:
+            days = _day(as_of)
+        t = np.searchsorted(self.dates, days, side="right") - 1
+        lanes = np.asarray(lanes)
+        destinations = np.asarray(destinations)
+        return (self._lookup_mode(0, lanes, destinations, t),
+                self._lookup_mode(1, lanes, destinations, t))
+
+    # ----------------------
+    # STORAGE
+    # ----------------------
+    def to_arrays(self):
+        return {name: getattr(self, name) for name in self.ARRAY_NAMES}
+
+    @classmethod
+    def from_arrays(cls, arrays, n_lanes, n_destinations):
+        return cls(*(arrays[name] for name in cls.ARRAY_NAMES), n_lanes, n_destinations)
+
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.ARRAY_NAMES)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return (f"RateHistory({len(self.series)} series, {len(self)} points, "
+                f"{len(self.dates)} dates, {self.nbytes() / 1024:.1f} KiB)")
@@ -0,0 +1,277 @@
+import io
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from .history import SheetHistory
+from .xlsx import read_columns, sheet_fingerprints
+
+# ----------------------
+# SHEET NAMING
+# ----------------------
+AIR_PREFIX = "Air Freight - "
+SEA_PREFIX = "Sea Freight - "
+MARKUP_SHEET = "Markup"
+
+# Columns a rate sheet is read for, besides its latest date column
+SHEET_COLUMNS = ["Country", "Origin"]
+
+RATE_COLUMNS = ["mode", "destination", "country", "origin", "rate", "effective_date"]
+
+DATE_FORMATS = ['%m/%d/%Y', '%d/%m/%Y', '%Y-%m-%d', '%m/%d/%y']
+
+
+def parse_rate_date(col):
+    """Parse a sheet's date header, or return None if it isn't a date."""
+    try:
+        if isinstance(col, str):
+            for date_format in DATE_FORMATS:
+                try:
+                    return pd.to_datetime(col, format=date_format)
+                except (ValueError, TypeError):
+                    continue
+        return pd.to_datetime(col)
+    except (ValueError, TypeError):
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _cached_header_date(col):
+    return parse_rate_date(col)
+
+
+def header_date(col):
+    """parse_rate_date, memoized: every sheet repeats the same month headers."""
+    try:
+        return _cached_header_date(col)
+    except TypeError:  # unhashable header
+        return parse_rate_date(col)
+
+
+def split_rate_sheets(sheet_names):
+    """Return (air_sheets, sea_sheets) in workbook order."""
+    air_sheets = [s for s in sheet_names if "Air Freight" in s]
+    sea_sheets = [s for s in sheet_names if "Sea Freight" in s]
+    return air_sheets, sea_sheets
+
+
+def sheet_destination(sheet):
+    return sheet.replace(AIR_PREFIX, "").replace(SEA_PREFIX, "")
+
+
+# ----------------------
+# LONG RATE FRAME
+# ----------------------
+def normalize_rate_sheet(df, mode, destination):
+    """Turn one raw rate sheet into rows of the long rate frame.
+
+    The latest (last) column holds the current rate. Returns the frame and
+    the parsed date of that column (None if the header isn't a date, and
+    the rows' effective_date is then NaT rather than a made-up date).
+    """
+    latest_col = df.columns[-1]
+    col_date = parse_rate_date(latest_col)
+    effective_date = col_date if col_date is not None else pd.NaT
+
+    frame = pd.DataFrame({
+        "mode": mode,
+        "destination": destination,
+        "country": df["Country"].to_numpy(),
+        "origin": df["Origin"].to_numpy(),
+        "rate": df[latest_col].to_numpy(),
+        "effective_date": effective_date,
+    }, columns=RATE_COLUMNS)
+    return frame, col_date
+
+
+def history_columns(months=None):
+    """A read_columns pick: the dated header columns, only the newest `months` if given."""
+    def pick(header):
+        dated = [(header_date(label), column) for column, label in header.items()
+                 if label is not None and label not in SHEET_COLUMNS]
+        dated = sorted((date, column) for date, column in dated if date is not None)
+        if months is not None:
+            dated = dated[len(dated) - months:] if months > 0 else []
+        return [column for _, column in dated]
+    return pick
+
+
+def sheet_history(df, mode, destination):
+    """Every dated column of a raw rate sheet as a SheetHistory."""
+    dated = [(column, header_date(column)) for column in df.columns if column not in SHEET_COLUMNS]
+    dated = [(column, date) for column, date in dated if date is not None]
+    rates = np.empty((len(df), len(dated)))
+    for j, (column, _) in enumerate(dated):
+        rates[:, j] = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64)
+    return SheetHistory(mode, destination, df["Country"].to_numpy(), df["Origin"].to_numpy(),
+                        [date for _, date in dated], rates)
+
+
+def parse_rate_sheet(xls, mode, sheet, history_months=0):
+    """Parse and normalize one Air or Sea sheet.
+
+    Returns (frame, destination, col_date, history). history is None when
+    history_months is 0; otherwise it holds the newest history_months dated
+    columns (all of them if None).
+    """
+    destination = sheet_destination(sheet)
+    # Only Country, Origin and the latest column are decoded (plus history columns)
+    pick = history_columns(history_months) if history_months != 0 else None
+    sheet_df = read_columns(xls, sheet, SHEET_COLUMNS, pick)
+    frame, col_date = normalize_rate_sheet(sheet_df, mode, destination)
+    history = sheet_history(sheet_df, mode, destination) if history_months != 0 else None
+    return frame, destination, col_date, history
+
+
+class SheetCache:
+    """Parsed rate sheets from the previous load, keyed by sheet content hash.
+
+    read_rate_sheets reuses the entry of every sheet whose hash hasn't
+    changed, so a refresh only parses the sheets that were edited. parsed
+    and reused count the sheets of the last load.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.parsed = 0
+        self.reused = 0
+
+
+def read_rate_sheets(xls, workers=1, pool="process", content=None, cache=None, history_months=0):
+    """Concatenate every Air and Sea sheet of an open workbook into one frame.
+
+    Returns (rates, destinations, dates, histories) where destinations lists
+    the destination of each rate sheet in load order, dates holds the parsed
+    latest-column date of each sheet (None where it couldn't be parsed) and
+    histories the SheetHistory of each sheet (empty if history_months is 0,
+    see parse_rate_sheet).
+
+    With workers > 1 and the workbook bytes in content, sheets are parsed
+    on a "process" or "thread" pool, each worker opening its own copy of
+    the workbook. Results are collected in workbook order, so the output
+    is the same as the serial path whatever order the sheets finish in.
+
+    With a SheetCache and content, only sheets whose content hash differs
+    from the cached one are parsed; the rest reuse the cached result.
+    """
+    air_sheets, sea_sheets = split_rate_sheets(xls.sheet_names)
+    jobs = [("air", sheet, history_months) for sheet in air_sheets] + \
+           [("sea", sheet, history_months) for sheet in sea_sheets]
+
+    fingerprints = {}
+    if cache is not None and content is not None:
+        fingerprints = sheet_fingerprints(content)
+    results = [None] * len(jobs)
+    pending = []
+    for i, (mode, sheet, _) in enumerate(jobs):
+        entry = cache.entries.get(sheet) if fingerprints else None
+        if entry is not None and entry[0] == (fingerprints.get(sheet), history_months):
+            results[i] = entry[1]
+        else:
+            pending.append(i)
+
+    pending_jobs = [jobs[i] for i in pending]
+    if workers > 1 and content is not None and len(pending_jobs) > 1:
+        parsed = _parse_parallel(pending_jobs, content, xls.engine, min(workers, len(pending_jobs)), pool)
+    else:
+        parsed = [parse_rate_sheet(xls, *job) for job in pending_jobs]
+    for i, result in zip(pending, parsed):
+        results[i] = result
+
+    if cache is not None:
+        cache.entries = {sheet: ((fingerprints[sheet], history_months), result)
+                         for (mode, sheet, _), result in zip(jobs, results) if sheet in fingerprints}
+        cache.parsed = len(pending)
+        cache.reused = len(jobs) - len(pending)
+
+    frames = [frame for frame, _, _, _ in results]
+    destinations = [destination for _, destination, _, _ in results]
+    dates = [col_date for _, _, col_date, _ in results]
+    histories = [history for _, _, _, history in results if history is not None]
+
+    if frames:
+        rates = pd.concat(frames, ignore_index=True)
+    else:
+        rates = pd.DataFrame(columns=RATE_COLUMNS)
+    return rates, destinations, dates, histories
+
+
+# ----------------------
+# PARALLEL PARSING
+# ----------------------
+# Each pool thread / worker process keeps its own open copy of the workbook
+_worker = threading.local()
+
+
+def _open_worker_workbook(content, engine):
+    if getattr(_worker, "content", None) is not content:
+        _worker.xls = pd.ExcelFile(io.BytesIO(content), engine=engine)
+        _worker.content = content
+    return _worker.xls
+
+
+def _init_parse_worker(content, engine):
+    _open_worker_workbook(content, engine)
+
+
+def _parse_in_worker(job):
+    return parse_rate_sheet(_worker.xls, *job)
+
+
+def _parse_parallel(jobs, content, engine, workers, pool):
+    if pool == "thread":
+        def parse(job):
+            return parse_rate_sheet(_open_worker_workbook(content, engine), *job)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(parse, jobs))
+    if pool != "process":
+        raise ValueError(f"Unknown parse pool {pool!r} (use 'process' or 'thread')")
+
+    # Never fork: a process with threads (a refresher, a server) can hand a
+    # child a lock some other thread held. The fork server starts clean,
+    # imports ingest once and forks workers from that. Workers re-import
+    # __main__, so only guarded entry points (the CLI) may use this pool;
+    # under Streamlit __main__ is the app script and the app uses threads
+    methods = multiprocessing.get_all_start_methods()
+    if "forkserver" in methods:
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+    else:
+        context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_parse_worker, initargs=(content, engine)) as executor:
+        # map() yields in submission order, whichever sheet finishes first
+        return list(executor.map(_parse_in_worker, jobs))
+
+
+# ----------------------
+# MARKUPS AND RATE STATUS
+# ----------------------
+def build_markups(markup_df):
+    """Return (markups, rm_types) from the Markup sheet.
+
+    The first column holds the RM types; every other column is a destination.
+    """
+    rm_types = markup_df.iloc[:, 0].tolist()
+    markups = dict(zip(rm_types, markup_df.iloc[:, 1:].to_dict("records")))
+    return markups, rm_types
+
+
+def latest_rate_date(dates):
+    """Newest parsed sheet date, or None if no sheet had a date header."""
+    known = [d for d in dates if d is not None]
+    return max(known) if known else None
+
+
+def rate_status(latest_date, now=None):
+    """Return (is_current_month, rate_month_year) for the newest sheet date."""
+    if latest_date is None:
+        return False, ""
+    current_date = now if now is not None else pd.Timestamp.now()
+    is_current_month = (latest_date.month == current_date.month and
+                        latest_date.year == current_date.year)
+    return is_current_month, latest_date.strftime('%B %Y')
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from .fetch import RATE_WORKBOOK_URL, get_fetcher
+from .ingest import (
+    MARKUP_SHEET,
+    SheetCache,
+    build_markups,
+    latest_rate_date,
+    rate_status,
+    read_rate_sheets,
+    split_rate_sheets,
+)
+from .rate_index import RateIndex
+from .validation import validate_rate_tables
+
+# Used only when the Markup sheet can't be read
+FALLBACK_MARKUPS = {
+    "Fabric": {"SL": 1.15, "Bangladesh": 1.20},
+    "Elastic": {"SL": 1.15, "Bangladesh": 1.20},
+    "Lace": {"SL": 1.15, "Bangladesh": 1.20}
+}
+FALLBACK_RM_TYPES = ["Fabric", "Elastic", "Lace"]
+
+# Parse rate sheets on this many workers ("process" or "thread" pool); 1 is serial.
+# The Streamlit app always uses threads (see ingest._parse_parallel)
+DEFAULT_PARSE_WORKERS = int(os.environ.get("FREIGHT_PARSE_WORKERS", "1"))
+DEFAULT_PARSE_POOL = os.environ.get("FREIGHT_PARSE_POOL", "process")
+
+# Months of rate history kept for as-of pricing: unset keeps every month, 0 none
+DEFAULT_HISTORY_MONTHS = int(os.environ["FREIGHT_HISTORY_MONTHS"]) if os.environ.get("FREIGHT_HISTORY_MONTHS") else None
+
+# sheets_parsed is (parsed, total) rate sheets for a workbook load, else None;
+# issues is the validation report (see validation.validate_rate_tables)
+RateTables = namedtuple("RateTables", [
+    "rate_index", "all_destinations", "is_current_month", "rate_month_year",
+    "rm_types", "markup_error", "rate_date", "sheets_parsed", "issues",
+], defaults=[None, None])
+
+
+def rates_id(tables):
+    """Short content hash of the rates, markups and menus in tables.
+
+    The same rates hash the same in every process and after a restart, so
+    the id names a rate set wherever it was loaded, restored or mapped.
+    """
+    labels, arrays = tables.rate_index.to_parts()
+    digest = hashlib.sha256(json.dumps({
+        "labels": labels,
+        "all_destinations": list(tables.all_destinations),
+        "rm_types": list(tables.rm_types),
+        "markup_error": tables.markup_error,
+        "rate_date": tables.rate_date.isoformat() if tables.rate_date is not None else None,
+    }, sort_keys=True, default=str).encode())
+    for name in RateIndex.ARRAY_NAMES + RateIndex.HISTORY_ARRAY_NAMES:
+        if name in arrays:
+            digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+    return digest.hexdigest()[:12]
+
+
+# One sheet cache per source, so a refresh re-reads only the edited sheets
+_sheet_caches = {}
+
+
+def load_rate_tables(source=RATE_WORKBOOK_URL, workers=DEFAULT_PARSE_WORKERS, pool=DEFAULT_PARSE_POOL,
+                     cache=None, history_months=DEFAULT_HISTORY_MONTHS):
+    """Load and compile the rate workbook from a URL or a local path.
+
+    Sheets unchanged since the last load of the same source are taken from
+    its SheetCache instead of being parsed again (pass cache to use another).
+
+    The newest history_months dated columns of every sheet (all if None)
+    are kept in rate_index.history for as-of pricing; 0 skips the history.
+
+    markup_error holds the error message when the Markup sheet couldn't be
+    read and the fallback markups were used, else None. issues lists the
+    problems found in the sheets (bad or duplicate rates, rate jumps,
+    missing markups), computed once here so reruns never repeat the checks.
+    """
+    # Download the workbook once; every sheet below parses from this copy
+    fetcher = get_fetcher(source)
+    xls = fetcher.open()
+    air_sheets, sea_sheets = split_rate_sheets(xls.sheet_names)
+
+    # Extract destinations from sheet names
+    air_destinations = sorted([s.replace("Air Freight - ", "") for s in air_sheets])
+    sea_destinations = sorted([s.replace("Sea Freight - ", "") for s in sea_sheets])
+    all_destinations = sorted(set(air_destinations + sea_destinations))
+
+    # Load every Air and Sea sheet into one long frame
+    if cache is None:
+        cache = _sheet_caches.setdefault(source, SheetCache())
+    rates, sheet_destinations, sheet_dates, histories = read_rate_sheets(
+        xls, workers, pool, fetcher.content, cache, history_months)
+
+    # Load Markup sheet
+    markup_error = None
+    try:
+        markups, rm_types = build_markups(xls.parse(MARKUP_SHEET))
+    except Exception as e:
+        markup_error = str(e)
+        markups, rm_types = FALLBACK_MARKUPS, list(FALLBACK_RM_TYPES)
+
+    # Compile rates, markups and dropdown menus into one array-backed index
+    rate_index = RateIndex.build(rates, sheet_destinations, markups, rm_types, history=histories)
+
+    # Check every sheet for bad rows, jumps and markup gaps
+    sheet_modes = ["air"] * len(air_sheets) + ["sea"] * len(sea_sheets)
+    issues = validate_rate_tables(rates, list(zip(sheet_modes, sheet_destinations, sheet_dates)),
+                                  rate_index, markups, markup_error)
+
+    # Determine if rates are current
+    rate_date = latest_rate_date(sheet_dates)
+    is_current_month, rate_month_year = rate_status(rate_date)
+
+    # Tuples, so the tables shared by every session can't be changed in place
+    return RateTables(rate_index, tuple(all_destinations), is_current_month, rate_month_year,
+                      tuple(rm_types), markup_error, rate_date,
+                      (cache.parsed, cache.parsed + cache.reused), issues)
@@ -0,0 +1,91 @@
+import os
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+
+import pandas as pd
+
+from .pricing import ITEM_FIELDS, price_items
+
+DEFAULT_MEMO_SIZE = int(os.environ.get("FREIGHT_MEMO_SIZE", "10000"))
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def item_key(item):
+    """Hashable key of the inputs that decide an item's price.
+
+    rm_type, lane (country, origin, destination), weight value and type,
+    width and unit; numbers are compared as floats, so 100 and 100.0 match.
+    """
+    return (item["rm_type"], item["country"], item["origin"], item["destination"],
+            _number(item["weight_value"]), item["weight_type"], _number(item["width"]), item["unit"])
+
+
+class PriceMemo:
+    """Bounded LRU of priced items, shared by every session of the process.
+
+    Entries are keyed on the snapshot's rates_id (a hash of the rates
+    themselves, see loader.rates_id), item_key and the as_of date, so
+    sessions still on an older snapshot and sessions on the new one share
+    the memo without evicting each other, and a version counter that
+    restarts can never match prices of other rates; entries of rate sets
+    no longer in use simply age out of the LRU. hits and misses count
+    items since the process started.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MEMO_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def price(self, items, rate_index, rates_id, as_of=None):
+        """Price item dicts (ITEM_FIELDS); returns one PRICED_COLUMNS dict per item.
+
+        Values are None where the price is NaN (no rate for the lane); the
+        dicts are read-only since sessions share them. Only items not seen
+        before with these rates are priced, in one vectorized call.
+        """
+        keys = [(rates_id, item_key(item), as_of) for item in items]
+        rows = [None] * len(items)
+        missing = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                row = self._entries.get(key)
+                if row is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    self._entries.move_to_end(key)
+                    rows[i] = row
+            n_missing = sum(len(positions) for positions in missing.values())
+            self.hits += len(items) - n_missing
+            self.misses += n_missing
+
+        if missing:
+            # One row per distinct new item, priced in a single call
+            todo = [items[positions[0]] for positions in missing.values()]
+            priced = price_items(pd.DataFrame(todo, columns=ITEM_FIELDS), rate_index, as_of)
+            priced = [MappingProxyType(row) for row in
+                      priced.astype(object).where(priced.notna(), None).to_dict("records")]
+            with self._lock:
+                for (key, positions), row in zip(missing.items(), priced):
+                    for i in positions:
+                        rows[i] = row
+                    self._entries[key] = row
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return rows
+
+    def stats(self):
+        """(hits, misses, cached items)."""
+        return self.hits, self.misses, len(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
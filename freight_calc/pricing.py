@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+from .rate_index import factorize_ids
+
+# ----------------------
+# CONSTANTS
+# ----------------------
+KG_PER_CBM = 166
+
+WEIGHT_TYPES = ["GSM (g/m²)", "GSM (kg/m²)", "GLM (g/m)"]
+UNITS = ["CM", "IN", "M"]
+
+ITEM_FIELDS = ["rm_type", "country", "origin", "destination",
+               "weight_value", "weight_type", "width", "unit"]
+
+PRICED_COLUMNS = ["width_m", "converted_gsm", "kg_per_m", "air_rate", "sea_rate",
+                  "markup", "final_air_rate", "final_sea_rate"]
+
+
+def _enum_codes(values, choices):
+    """Position of each value in choices (-1 if not one of them)."""
+    return factorize_ids(pd.Index(choices, dtype=object), values)
+
+
+def enum_code(value, choices):
+    """Like _enum_codes, for a single value."""
+    return choices.index(value) if value in choices else -1
+
+
+# ----------------------
+# CONVERSIONS
+# ----------------------
+def width_in_meters(width, unit_codes):
+    """CM and IN are converted; anything else is taken as meters already."""
+    width = np.asarray(width, dtype=np.float64)
+    return np.select([unit_codes == 0, unit_codes == 1], [width / 100, width * 0.0254], width)
+
+
+def weight_per_meter(weight_value, weight_type_codes, width_m):
+    """Return (converted_gsm, kg_per_m).
+
+    converted_gsm is the weight in g/m²: the input for GSM (g/m²), x1000 for
+    GSM (kg/m²), and weight ÷ width for GLM (g/m) (0 when the width is 0).
+    """
+    weight_value = np.asarray(weight_value, dtype=np.float64)
+    is_g_m2 = weight_type_codes == 0
+    is_kg_m2 = weight_type_codes == 1
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        glm_gsm = np.where(width_m > 0, weight_value / width_m, 0.0)
+    gsm_kg = np.select([is_g_m2, is_kg_m2], [weight_value / 1000, weight_value], glm_gsm / 1000)
+    converted_gsm = np.select([is_g_m2, is_kg_m2], [weight_value, weight_value * 1000], glm_gsm)
+    return converted_gsm, gsm_kg * width_m
+
+
+# ----------------------
+# PRICING
+# ----------------------
+def price_arrays(weight_value, weight_type_codes, width, unit_codes,
+                 air_rate, sea_rate, markup):
+    """Price a batch of items already resolved to numeric arrays.
+
+    Rates are NaN where a lane has no rate, and so are the matching final
+    rates. Returns a dict of float arrays keyed by PRICED_COLUMNS.
+    """
+    width_m = width_in_meters(width, unit_codes)
+    converted_gsm, kg_per_m = weight_per_meter(weight_value, weight_type_codes, width_m)
+
+    # Same operation order as the calculator so results match to the bit
+    final_air_rate = air_rate * kg_per_m * markup
+    final_sea_rate = sea_rate * (kg_per_m / KG_PER_CBM) * markup
+
+    return {
+        "width_m": width_m,
+        "converted_gsm": converted_gsm,
+        "kg_per_m": kg_per_m,
+        "air_rate": air_rate,
+        "sea_rate": sea_rate,
+        "markup": markup,
+        "final_air_rate": final_air_rate,
+        "final_sea_rate": final_sea_rate,
+    }
+
+
+def price_columns(items, rate_index, as_of=None):
+    """Price a columnar batch of items against a RateIndex.
+
+    items is a DataFrame (or dict of equal-length columns) with ITEM_FIELDS,
+    the same fields the calculator keeps per item. Returns a dict of float
+    arrays keyed by PRICED_COLUMNS, one entry per item in the same order.
+    With as_of, the freight rates in effect on that date are used.
+    """
+    air_rate, sea_rate = rate_index.lookup_many(items["country"], items["origin"], items["destination"],
+                                                as_of=as_of)
+    markup = rate_index.markup_many(items["rm_type"], items["destination"])
+    return price_arrays(
+        items["weight_value"],
+        _enum_codes(items["weight_type"], WEIGHT_TYPES),
+        items["width"],
+        _enum_codes(items["unit"], UNITS),
+        air_rate,
+        sea_rate,
+        markup,
+    )
+
+
+def price_items(items, rate_index, as_of=None):
+    """Like price_columns, but returns a DataFrame aligned with items."""
+    index = items.index if isinstance(items, pd.DataFrame) else None
+    return pd.DataFrame(price_columns(items, rate_index, as_of), columns=PRICED_COLUMNS, index=index)
@@ -0,0 +1,243 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+import pandas as pd
+
+DEFAULT_QUOTE_LOG = os.environ.get("FREIGHT_QUOTE_LOG", "quote_log.db")
+# Most records the writer inserts in one transaction
+DEFAULT_BATCH_SIZE = int(os.environ.get("FREIGHT_QUOTE_LOG_BATCH", "1000"))
+DEFAULT_SEARCH_PAGE_SIZE = 50
+# Longest flush() waits for the writer, in seconds
+DEFAULT_FLUSH_TIMEOUT = 30
+
+logger = logging.getLogger(__name__)
+
+# ----------------------
+# SCHEMA
+# ----------------------
+# (column, SQLite type) after the id primary key; quoted_at is unix seconds.
+# rates_id is the priced rates' loader.rates_id and rate_date their newest
+# rate column, so a row names its rates in any process and after restarts
+QUOTE_COLUMNS = [
+    ("quoted_at", "REAL"),
+    ("user_name", "TEXT"), ("user_email", "TEXT"), ("role", "TEXT"),
+    ("supplier", "TEXT"), ("sqn", "TEXT"), ("rm_type", "TEXT"),
+    ("country", "TEXT"), ("origin", "TEXT"), ("destination", "TEXT"),
+    ("weight_value", "REAL"), ("weight_type", "TEXT"), ("width", "REAL"), ("unit", "TEXT"),
+    ("rates_id", "TEXT"), ("rate_date", "TEXT"), ("price_as_of", "TEXT"),
+    ("width_m", "REAL"), ("converted_gsm", "REAL"), ("kg_per_m", "REAL"),
+    ("air_rate", "REAL"), ("sea_rate", "REAL"), ("markup", "REAL"),
+    ("final_air_rate", "REAL"), ("final_sea_rate", "REAL"),
+]
+QUOTE_FIELDS = [name for name, _ in QUOTE_COLUMNS]
+
+# Lookups by user, SQN and supplier page by id within the index
+INDEXES = {
+    "quotes_user": "user_email, id",
+    "quotes_sqn": "sqn, id",
+    "quotes_supplier": "supplier, id",
+    "quotes_quoted_at": "quoted_at",
+}
+
+CREATE_TABLE = ("CREATE TABLE IF NOT EXISTS quotes (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                + ", ".join(f"{name} {kind}" for name, kind in QUOTE_COLUMNS) + ")")
+INSERT = f"INSERT INTO quotes ({', '.join(QUOTE_FIELDS)}) VALUES ({', '.join('?' * len(QUOTE_FIELDS))})"
+
+# Sorts after every other string, for prefix ranges on an index
+_PREFIX_END = "\U0010ffff"
+
+
+def quote_records(items, priced, user_name, user_email, role, rates_id,
+                  rate_date=None, price_as_of=None, quoted_at=None):
+    """One QUOTE_FIELDS tuple per item dict and its PriceMemo.price row."""
+    quoted_at = quoted_at if quoted_at is not None else time.time()
+    rate_date = pd.Timestamp(rate_date).date().isoformat() if rate_date is not None else None
+    price_as_of = str(price_as_of) if price_as_of is not None else None
+    return [(quoted_at, user_name, user_email, role,
+             item["supplier"], item["sqn"], item["rm_type"],
+             item["country"], item["origin"], item["destination"],
+             item["weight_value"], item["weight_type"], item["width"], item["unit"],
+             rates_id, rate_date, price_as_of,
+             p["width_m"], p["converted_gsm"], p["kg_per_m"],
+             p["air_rate"], p["sea_rate"], p["markup"],
+             p["final_air_rate"], p["final_sea_rate"])
+            for item, p in zip(items, priced)]
+
+
+def _day_start(day):
+    return pd.Timestamp(day).normalize().timestamp()
+
+
+class QuoteLog:
+    """Append-only log of priced items in a SQLite database (WAL mode).
+
+    log() only queues records; one daemon thread writes them, inserting
+    everything that is waiting in a single transaction, so callers never
+    wait on the disk. With WAL, searches read while the writer writes.
+    A record that can't be written is logged, counted in dropped and its
+    error kept in last_error; the rest of its batch is still written.
+    """
+
+    def __init__(self, path=DEFAULT_QUOTE_LOG, batch_size=DEFAULT_BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.written = 0
+        self.dropped = 0
+        self.last_error = None
+        self._queue = queue.Queue()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(CREATE_TABLE)
+            # Logs written before a column existed get it added, empty for old rows
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(quotes)")}
+            for name, kind in QUOTE_COLUMNS:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE quotes ADD COLUMN {name} {kind}")
+            for name, columns in INDEXES.items():
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON quotes ({columns})")
+        self._writer = threading.Thread(target=self._run, daemon=True, name="quote-log-writer")
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode a crash can lose the last commits but never corrupts the file
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ----------------------
+    # WRITE
+    # ----------------------
+    def log(self, records):
+        """Queue QUOTE_FIELDS tuples (see quote_records) for the writer."""
+        if records:
+            self._queue.put(records)
+
+    def pending(self):
+        """Batches queued and not yet written."""
+        return self._queue.qsize()
+
+    def flush(self, timeout=DEFAULT_FLUSH_TIMEOUT):
+        """Wait until everything queued so far has been written.
+
+        Returns True once it has; False if it hasn't after timeout seconds
+        or the writer has stopped, so a caller never waits forever.
+        """
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._writer.is_alive():
+                    return False
+                self._queue.all_tasks_done.wait(min(remaining, 0.1))
+        return True
+
+    def close(self):
+        """Write what is queued, then stop the writer."""
+        self._queue.put(None)
+        self._writer.join()
+
+    def _run(self):
+        conn = None
+        try:
+            while True:
+                batches = [self._queue.get()]
+                size = len(batches[0] or ())
+                # Whatever else is already waiting goes in the same transaction
+                while batches[-1] is not None and size < self.batch_size:
+                    try:
+                        batches.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                    size += len(batches[-1] or ())
+                records = [record for batch in batches if batch is not None for record in batch]
+                try:
+                    if conn is None:
+                        conn = self._connect()
+                    self._write(conn, records)
+                except Exception as e:
+                    # Can't open the database: these records are lost, the next batch retries
+                    logger.exception("Quote log %s: %d records not written", self.path, len(records))
+                    self.dropped += len(records)
+                    self.last_error = f"{type(e).__name__}: {e}"
+                finally:
+                    for _ in batches:
+                        self._queue.task_done()
+                if batches[-1] is None:
+                    return
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _write(self, conn, records):
+        try:
+            with conn:
+                conn.executemany(INSERT, records)
+        except Exception:
+            # One bad record fails the whole transaction: retry one by one so only it is dropped
+            for record in records:
+                try:
+                    with conn:
+                        conn.execute(INSERT, record)
+                    self.written += 1
+                except Exception as e:
+                    logger.exception("Quote log %s: record not written: %r", self.path, record)
+                    self.dropped += 1
+                    self.last_error = f"{type(e).__name__}: {e}"
+            return
+        self.written += len(records)
+        self.last_error = None
+
+    # ----------------------
+    # SEARCH
+    # ----------------------
+    def _where(self, user=None, sqn=None, supplier=None, date_from=None, date_to=None):
+        clauses, params = [], []
+        if user:
+            clauses.append("user_email = ?")
+            params.append(user)
+        # Prefix matches as ranges, so they use the index (LIKE wouldn't)
+        for column, prefix in [("sqn", sqn), ("supplier", supplier)]:
+            if prefix:
+                clauses.append(f"{column} >= ? AND {column} < ?")
+                params += [prefix, prefix + _PREFIX_END]
+        if date_from is not None:
+            clauses.append("quoted_at >= ?")
+            params.append(_day_start(date_from))
+        if date_to is not None:
+            clauses.append("quoted_at < ?")
+            params.append(_day_start(date_to) + 86400)
+        return clauses, params
+
+    def search(self, user=None, sqn=None, supplier=None, date_from=None, date_to=None,
+               before_id=None, limit=DEFAULT_SEARCH_PAGE_SIZE):
+        """Up to limit logged quotes matching the filters, newest first.
+
+        user is matched exactly; sqn and supplier are prefixes; date_from
+        and date_to are days (inclusive, UTC). Pages are found by id rather
+        than OFFSET: pass the smallest id of a page as before_id for the
+        next one, so a page reads only its own rows however deep it is.
+        Returns a DataFrame with id and QUOTE_FIELDS.
+        """
+        clauses, params = self._where(user, sqn, supplier, date_from, date_to)
+        if before_id is not None:
+            clauses.append("id < ?")
+            params.append(before_id)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(f"SELECT id, {', '.join(QUOTE_FIELDS)} FROM quotes{where} "
+                                "ORDER BY id DESC LIMIT ?", params + [limit]).fetchall()
+        frame = pd.DataFrame(rows, columns=["id"] + QUOTE_FIELDS)
+        frame["quoted_at"] = pd.to_datetime(frame["quoted_at"], unit="s")
+        return frame
+
+    def count(self, user=None, sqn=None, supplier=None, date_from=None, date_to=None):
+        """Number of logged quotes matching the filters (see search)."""
+        clauses, params = self._where(user, sqn, supplier, date_from, date_to)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with closing(self._connect()) as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM quotes{where}", params).fetchone()[0]
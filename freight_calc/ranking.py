@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from .pricing import UNITS, WEIGHT_TYPES, enum_code, price_arrays
+
+# ----------------------
+# LANE RANKING
+# ----------------------
+MODES = ("air", "sea")
+RANK_COLUMNS = ["rank", "mode", "country", "origin", "rate", "markup", "final_rate",
+                "air_available", "sea_available"]
+
+DEFAULT_TOP_K = int(os.environ.get("FREIGHT_RANK_TOP_K", "10"))
+
+
+def lane_rates(rate_index, destination, as_of=None):
+    """(lanes, air, sea) for every lane with a rate row to destination.
+
+    lanes are lane ids; air and sea are their rates (NaN where a mode has
+    no rate), as of a date when as_of is given.
+    """
+    d = rate_index.destination_ids([destination])[0]
+    if d < 0:
+        empty = np.zeros(0)
+        return np.zeros(0, dtype=np.int64), empty, empty
+    lanes = np.flatnonzero(rate_index.present[:, d])
+    if as_of is None:
+        return lanes, rate_index.air[lanes, d], rate_index.sea[lanes, d]
+    if rate_index.history is None:
+        raise ValueError(f"No rate history loaded, can't price as of {as_of}")
+    air, sea = rate_index.history.lookup_many(lanes, np.full(len(lanes), d), as_of)
+    return lanes, air, sea
+
+
+def rank_lanes(rate_index, spec, destination, top_k=DEFAULT_TOP_K, modes=MODES, as_of=None):
+    """The top_k cheapest (lane, mode) options for one item spec to destination.
+
+    spec has the item fields that don't depend on the lane: rm_type,
+    weight_value, weight_type, width and unit. Every lane serving the
+    destination is priced for every mode in one price_arrays call, so the
+    figures match the calculator's for the same item. Options without a
+    rate are left out; air_available and sea_available say which modes a
+    ranked lane has. Ranked by final rate, then air before sea, then lane;
+    top_k=None ranks every option. Returns a RANK_COLUMNS frame.
+    """
+    lanes, air, sea = lane_rates(rate_index, destination, as_of)
+    markup = rate_index.markup_many([spec["rm_type"]], [destination])
+    priced = price_arrays(
+        np.array([spec["weight_value"]], dtype=np.float64),
+        np.array([enum_code(spec["weight_type"], WEIGHT_TYPES)]),
+        np.array([spec["width"]], dtype=np.float64),
+        np.array([enum_code(spec["unit"], UNITS)]),
+        air, sea, markup,
+    )
+
+    # One candidate per lane and mode, modes one after the other
+    modes = [mode for mode in MODES if mode in modes]
+    if not modes:
+        raise ValueError(f"modes must include one of {', '.join(MODES)}")
+    final = np.concatenate([priced[f"final_{mode}_rate"] for mode in modes])
+    candidates = np.flatnonzero(~np.isnan(final))
+    if top_k is not None and top_k < len(candidates):
+        # Keep everything up to the top_k-th cheapest (ties included), then sort only those
+        kth = np.partition(final[candidates], max(top_k, 1) - 1)[max(top_k, 1) - 1]
+        candidates = candidates[final[candidates] <= kth]
+    candidates = candidates[np.lexsort((candidates, final[candidates]))][:top_k]
+
+    mode_of = candidates // len(lanes) if len(lanes) else candidates
+    position = candidates - mode_of * len(lanes)
+    lane = lanes[position]
+    rates = np.concatenate([priced[f"{mode}_rate"] for mode in modes])
+    return pd.DataFrame({
+        "rank": np.arange(1, len(candidates) + 1),
+        "mode": np.array(modes, dtype=object)[mode_of],
+        "country": np.array(rate_index.countries, dtype=object)[rate_index.lane_country[lane]],
+        "origin": np.array(rate_index.origins, dtype=object)[rate_index.lane_origin[lane]],
+        "rate": rates[candidates],
+        "markup": np.full(len(candidates), markup[0]),
+        "final_rate": final[candidates],
+        "air_available": ~np.isnan(air[position]),
+        "sea_available": ~np.isnan(sea[position]),
+    }, columns=RANK_COLUMNS)
@@ -0,0 +1,317 @@
+import sys
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+from .history import RateHistory
+
+# Markup used when the Markup sheet has no value for an RM type/destination
+DEFAULT_MARKUP = 1.15
+
+
+def _intern(values):
+    return tuple(sys.intern(v) if isinstance(v, str) else v for v in values)
+
+
+def _read_only(array):
+    """A read-only view, so the shared tables can't be changed by accident."""
+    if array is None or not array.flags.writeable:
+        return array
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+def factorize_ids(index, values):
+    """Map values to positions in index (-1 if missing), hashing each distinct value once.
+
+    Series, arrays and categoricals are factorized as-is (no object copy).
+    """
+    if not isinstance(values, (pd.Series, pd.Index, pd.Categorical, np.ndarray)):
+        values = pd.Series(values, dtype=object)
+    codes, uniques = pd.factorize(values)
+    if len(uniques) == 0:
+        return np.full(len(codes), -1, dtype=np.int64)
+    ids = index.get_indexer(pd.Index(np.asarray(uniques, dtype=object), dtype=object))
+    return np.where(codes >= 0, ids[codes], -1)
+
+
+class RateIndex:
+    """Compiled, array-backed view of the rate tables.
+
+    Countries, origins, destinations and RM types are interned and given
+    integer ids. Each (country, origin) pair is a lane; air and sea rates are
+    stored as dense lane x destination float arrays with NaN meaning "not
+    available", and markups as a dense RM type x destination matrix.
+
+    An index is immutable once built: its arrays are read-only and setting
+    an attribute raises, so one instance can be shared by every session.
+
+    history, when present, is a RateHistory of every dated rate column over
+    the same lanes and destinations; it answers as_of lookups.
+    """
+
+    def __init__(self, countries, origins, destinations, rm_types,
+                 lane_country, lane_origin, air, sea, present, markup_matrix, lane_codes=None,
+                 history=None):
+        self.countries = _intern(countries)
+        self.origins = _intern(origins)
+        self.destinations = _intern(destinations)
+        self.rm_types = _intern(rm_types)
+
+        self.lane_country = _read_only(lane_country)
+        self.lane_origin = _read_only(lane_origin)
+        self.air = _read_only(air)
+        self.sea = _read_only(sea)
+        self.present = _read_only(present)
+        self.markup_matrix = _read_only(markup_matrix)
+
+        self._country_index = pd.Index(self.countries, dtype=object)
+        self._origin_index = pd.Index(self.origins, dtype=object)
+        self._destination_index = pd.Index(self.destinations, dtype=object)
+        self._rm_type_index = pd.Index(self.rm_types, dtype=object)
+
+        # Sorted lane codes (country id x origin id) for binary-search lookups.
+        # Nothing below is per lane, so the arrays can be memory-mapped.
+        if lane_codes is None:
+            lane_codes = lane_country.astype(np.int64) * len(self.origins) + lane_origin
+        self.lane_codes = _read_only(lane_codes)
+        self._country_of = MappingProxyType({c: i for i, c in enumerate(self.countries)})
+        self._origin_of = MappingProxyType({o: i for i, o in enumerate(self.origins)})
+        self._destination_of = MappingProxyType({d: i for i, d in enumerate(self.destinations)})
+        self._rm_type_of = MappingProxyType({r: i for i, r in enumerate(self.rm_types)})
+        self.history = history
+
+        # Dropdown menus, built once per destination on first use
+        self._menus = {}
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if self.__dict__.get("_frozen"):
+            raise AttributeError(f"RateIndex is read-only (tried to set {name!r})")
+        super().__setattr__(name, value)
+
+    def __reduce__(self):
+        labels, arrays = self.to_parts()
+        return (RateIndex.from_parts, (labels, dict(arrays, lane_codes=self.lane_codes)))
+
+    def with_history(self, history):
+        """The same index with a RateHistory attached."""
+        labels, arrays = self.to_parts()
+        arrays = dict(arrays, lane_codes=self.lane_codes)
+        arrays.update((f"history_{name}", a) for name, a in history.to_arrays().items())
+        return RateIndex.from_parts(labels, arrays)
+
+    # ----------------------
+    # BUILD
+    # ----------------------
+    @classmethod
+    def build(cls, rates, destinations, markups, rm_types, history=None):
+        """Compile the long rate frame (see ingest.read_rate_sheets) and markups.
+
+        history is an optional list of SheetHistory blocks (every dated
+        column of each sheet), compiled into a RateHistory.
+        """
+        rates = rates.dropna(subset=["country", "origin"])
+        # Later rows for the same lane and destination win, as in the dict tables
+        rates = rates.drop_duplicates(["mode", "country", "origin", "destination"], keep="last")
+
+        markup_destinations = [d for row in markups.values() for d in row]
+        destination_names = pd.unique(pd.Series(list(destinations) + markup_destinations, dtype=object))
+        destination_index = pd.Index(destination_names, dtype=object)
+
+        country_ids, countries = pd.factorize(rates["country"])
+        origin_ids, origins = pd.factorize(rates["origin"])
+        codes = country_ids.astype(np.int64) * len(origins) + origin_ids
+        lane_codes, lane_ids = np.unique(codes, return_inverse=True)
+        lane_country = (lane_codes // max(len(origins), 1)).astype(np.int32)
+        lane_origin = (lane_codes % max(len(origins), 1)).astype(np.int32)
+
+        dest_ids = destination_index.get_indexer(rates["destination"])
+        rate_values = pd.to_numeric(rates["rate"], errors="coerce").to_numpy(dtype=np.float64)
+        is_air = (rates["mode"] == "air").to_numpy()
+
+        shape = (len(lane_codes), len(destination_index))
+        air = np.full(shape, np.nan)
+        sea = np.full(shape, np.nan)
+        present = np.zeros(shape, dtype=bool)
+        air[lane_ids[is_air], dest_ids[is_air]] = rate_values[is_air]
+        sea[lane_ids[~is_air], dest_ids[~is_air]] = rate_values[~is_air]
+        present[lane_ids, dest_ids] = True
+
+        rm_type_names = list(dict.fromkeys(list(rm_types) + list(markups)))
+        markup_matrix = np.full((len(rm_type_names), len(destination_index)), np.nan)
+        for r, rm_type in enumerate(rm_type_names):
+            row = markups.get(rm_type, {})
+            d = destination_index.get_indexer(list(row))
+            markup_matrix[r, d] = pd.to_numeric(pd.Series(list(row.values()), dtype=object),
+                                                errors="coerce").to_numpy(dtype=np.float64)
+
+        index = cls(list(countries), list(origins), list(destination_index), rm_type_names,
+                    lane_country, lane_origin, air, sea, present, markup_matrix)
+        if history:
+            index = index.with_history(RateHistory.build(history, index))
+        return index
+
+    # ----------------------
+    # SINGLE LOOKUPS
+    # ----------------------
+    def lane(self, country, origin):
+        c = self._country_of.get(country, -1)
+        o = self._origin_of.get(origin, -1)
+        if c < 0 or o < 0:
+            return -1
+        code = c * len(self.origins) + o
+        pos = int(np.searchsorted(self.lane_codes, code))
+        return pos if pos < len(self.lane_codes) and self.lane_codes[pos] == code else -1
+
+    def lookup(self, country, origin, destination, as_of=None):
+        """Return (air_rate, sea_rate) for one lane; None where not available.
+
+        With as_of, the rates in effect on that date (see lookup_many).
+        """
+        lane = self.lane(country, origin)
+        d = self._destination_of.get(destination, -1)
+        if lane < 0 or d < 0:
+            return None, None
+        if as_of is not None:
+            air, sea = self._history_for(as_of).lookup_many([lane], [d], as_of)
+            air, sea = air[0], sea[0]
+        else:
+            air = self.air[lane, d]
+            sea = self.sea[lane, d]
+        return (None if np.isnan(air) else float(air)), (None if np.isnan(sea) else float(sea))
+
+    def markup(self, rm_type, destination, default=DEFAULT_MARKUP):
+        r = self._rm_type_of.get(rm_type, -1)
+        d = self._destination_of.get(destination, -1)
+        if r < 0 or d < 0 or np.isnan(self.markup_matrix[r, d]):
+            return default
+        return float(self.markup_matrix[r, d])
+
+    # ----------------------
+    # BULK LOOKUPS
+    # ----------------------
+    def lane_ids(self, countries, origins):
+        """Vectorized lane ids for arrays of countries and origins (-1 if unknown)."""
+        c = factorize_ids(self._country_index, countries)
+        o = factorize_ids(self._origin_index, origins)
+        codes = c.astype(np.int64) * len(self.origins) + o
+        if len(self.lane_codes) == 0:
+            return np.full(len(codes), -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.lane_codes, codes), len(self.lane_codes) - 1)
+        found = (c >= 0) & (o >= 0) & (self.lane_codes[pos] == codes)
+        return np.where(found, pos, -1)
+
+    def destination_ids(self, destinations):
+        return factorize_ids(self._destination_index, destinations)
+
+    def rm_type_ids(self, rm_types):
+        return factorize_ids(self._rm_type_index, rm_types)
+
+    def _history_for(self, as_of):
+        if self.history is None:
+            raise ValueError(f"No rate history loaded, can't price as of {as_of}")
+        return self.history
+
+    def lookup_many(self, countries, origins, destinations, as_of=None):
+        """Return (air_rates, sea_rates) float arrays, NaN where not available.
+
+        With as_of (a date), each rate is the one from the latest dated
+        column on or before that date, found by binary search in history.
+        """
+        lanes = self.lane_ids(countries, origins)
+        d = self.destination_ids(destinations)
+        if as_of is not None:
+            return self._history_for(as_of).lookup_many(lanes, d, as_of)
+        ok = (lanes >= 0) & (d >= 0)
+        air = np.full(len(lanes), np.nan)
+        sea = np.full(len(lanes), np.nan)
+        air[ok] = self.air[lanes[ok], d[ok]]
+        sea[ok] = self.sea[lanes[ok], d[ok]]
+        return air, sea
+
+    def markup_many(self, rm_types, destinations, default=DEFAULT_MARKUP):
+        r = self.rm_type_ids(rm_types)
+        d = self.destination_ids(destinations)
+        ok = (r >= 0) & (d >= 0)
+        out = np.full(len(r), np.nan)
+        out[ok] = self.markup_matrix[r[ok], d[ok]]
+        return np.where(np.isnan(out), default, out)
+
+    # ----------------------
+    # DROPDOWN MENUS
+    # ----------------------
+    def menu(self, destination):
+        """Read-only {country: (origins, ...)} for a destination, sorted.
+
+        Built on first use and then shared; the same objects are returned on
+        every call, so reruns don't rebuild or copy them.
+        """
+        menu = self._menus.get(destination)
+        if menu is None:
+            d = self._destination_of.get(destination, -1)
+            origins_by_country = {}
+            if d >= 0:
+                lanes = np.flatnonzero(self.present[:, d])
+                for c, o in zip(self.lane_country[lanes].tolist(), self.lane_origin[lanes].tolist()):
+                    origins_by_country.setdefault(self.countries[c], []).append(self.origins[o])
+            menu = MappingProxyType({
+                country: tuple(sorted(origins_by_country[country]))
+                for country in sorted(origins_by_country)
+            })
+            self._menus[destination] = menu
+        return menu
+
+    def countries_for(self, destination):
+        return tuple(self.menu(destination))
+
+    def origins_for(self, destination, country):
+        return self.menu(destination).get(country, ())
+
+    # ----------------------
+    # SERIALIZATION
+    # ----------------------
+    ARRAY_NAMES = ("lane_country", "lane_origin", "air", "sea", "present", "markup_matrix")
+    LABEL_NAMES = ("countries", "origins", "destinations", "rm_types")
+    # Saved only when the index has a history
+    HISTORY_ARRAY_NAMES = tuple(f"history_{name}" for name in RateHistory.ARRAY_NAMES)
+
+    def to_parts(self):
+        """Return (labels, arrays): JSON-able label lists and the NumPy arrays."""
+        labels = {name: list(getattr(self, name)) for name in self.LABEL_NAMES}
+        arrays = {name: getattr(self, name) for name in self.ARRAY_NAMES}
+        if self.history is not None:
+            arrays.update((f"history_{name}", a) for name, a in self.history.to_arrays().items())
+        return labels, arrays
+
+    @classmethod
+    def from_parts(cls, labels, arrays):
+        history = None
+        if all(name in arrays for name in cls.HISTORY_ARRAY_NAMES):
+            history = RateHistory.from_arrays(
+                {name: _read_only(arrays[f"history_{name}"]) for name in RateHistory.ARRAY_NAMES},
+                len(arrays["lane_country"]), len(labels["destinations"]))
+        return cls(*(labels[name] for name in cls.LABEL_NAMES),
+                   *(arrays[name] for name in cls.ARRAY_NAMES),
+                   lane_codes=arrays.get("lane_codes"), history=history)
+
+    # ----------------------
+    # FOOTPRINT
+    # ----------------------
+    def nbytes(self):
+        """Approximate memory held by the index, in bytes."""
+        arrays = (self.lane_country, self.lane_origin, self.lane_codes,
+                  self.air, self.sea, self.present, self.markup_matrix)
+        strings = self.countries + self.origins + self.destinations + self.rm_types
+        history = self.history.nbytes() if self.history is not None else 0
+        return sum(a.nbytes for a in arrays) + sum(sys.getsizeof(s) for s in strings) + history
+
+    def __len__(self):
+        return len(self.lane_codes)
+
+    def __repr__(self):
+        months = f", {len(self.history.dates)} months of history" if self.history is not None else ""
+        return (f"RateIndex({len(self)} lanes, {len(self.destinations)} destinations, "
+                f"{len(self.rm_types)} RM types{months}, {self.nbytes() / 1024:.1f} KiB)")
@@ -0,0 +1,188 @@
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+
+from .changes import ChangeLog
+from .fetch import RATE_WORKBOOK_URL
+from .loader import load_rate_tables, rates_id
+
+DEFAULT_REFRESH_SECONDS = 1800
+# After a failed reload, wait this long before trying again
+DEFAULT_RETRY_SECONDS = 60
+
+# One loaded generation of the rate tables; from_disk marks a restored snapshot.
+# version counts loads in this process only; rates_id (loader.rates_id) names
+# the rates themselves, the same in every process and across restarts
+RateSnapshot = namedtuple("RateSnapshot", ["tables", "version", "loaded_at", "load_seconds", "from_disk",
+                                           "rates_id"])
+
+
+class RateRefresher:
+    """Serves the current rate snapshot while reloading it in the background.
+
+    Readers always get the snapshot that is already loaded; once it is older
+    than the refresh interval a reload starts in a background thread and the
+    new snapshot is swapped in when it's complete. Concurrent refresh
+    requests share one in-flight load. Only the very first load blocks.
+
+    With a SnapshotStore, every successful load is saved to disk and a cold
+    start serves the newest saved snapshot while the first load runs; if the
+    source can't be reached that snapshot stays in use.
+
+    change_log keeps what each reload changed (lanes and markups).
+    """
+
+    def __init__(self, source=RATE_WORKBOOK_URL, interval=DEFAULT_REFRESH_SECONDS,
+                 loader=load_rate_tables, retry_interval=DEFAULT_RETRY_SECONDS, store=None):
+        self.source = source
+        self.store = store
+        self.interval = interval
+        self.retry_interval = retry_interval
+        self.loader = loader
+        self.last_error = None
+        self.last_error_at = None
+        self.last_save_error = None
+        self.change_log = ChangeLog()
+        self._snapshot = None
+        self._flight = None
+        self._lock = threading.Lock()
+        self._scheduler = None
+        self._stopped = threading.Event()
+
+    # ----------------------
+    # READ
+    # ----------------------
+    def get(self):
+        """Return the current snapshot, starting a background reload if it's stale."""
+        snapshot = self._snapshot
+        if snapshot is None and self.store is not None:
+            snapshot = self._restore()
+            if snapshot is not None:
+                # Serve the saved snapshot while the first live load runs
+                self.refresh(wait=False)
+                return snapshot
+        if snapshot is None:
+            return self.refresh(wait=True)
+        if self.due():
+            self.refresh(wait=False)
+        return snapshot
+
+    def due(self):
+        """True when the snapshot is stale and we're not backing off after an error."""
+        snapshot = self._snapshot
+        if snapshot is not None and self.age(snapshot) < self.interval:
+            return False
+        if self.last_error_at is not None and time.time() - self.last_error_at < self.retry_interval:
+            return False
+        return True
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    def age(self, snapshot=None):
+        snapshot = snapshot or self._snapshot
+        return time.time() - snapshot.loaded_at if snapshot else None
+
+    def is_loading(self):
+        return self._flight is not None
+
+    # ----------------------
+    # RELOAD
+    # ----------------------
+    def refresh(self, wait=True):
+        """Reload the tables, joining the load already in flight if there is one.
+
+        With wait=True, blocks until the load finishes and returns the newest
+        snapshot; the load's error is raised only if there is no snapshot to
+        fall back on. With wait=False returns the current snapshot at once.
+        """
+        with self._lock:
+            flight = self._flight
+            if flight is None:
+                flight = self._flight = Future()
+                threading.Thread(target=self._load, args=(flight,), daemon=True,
+                                 name="rate-refresh").start()
+        if not wait:
+            return self._snapshot
+        try:
+            return flight.result()
+        except Exception:
+            if self._snapshot is None:
+                raise
+            return self._snapshot
+
+    def _restore(self):
+        with self._lock:
+            if self._snapshot is None:
+                restored = self.store.load_latest()
+                if restored is not None:
+                    tables, saved_at = restored
+                    self._snapshot = RateSnapshot(tables, 1, saved_at, 0.0, True, rates_id(tables))
+        return self._snapshot
+
+    def _load(self, flight):
+        started = time.perf_counter()
+        try:
+            tables = self.loader(self.source)
+            current = self._snapshot
+            if tables.markup_error and current is not None and not current.tables.markup_error:
+                # Keep the last good markups rather than the hard-coded fallback
+                raise RuntimeError(f"Markup sheet could not be read: {tables.markup_error}")
+            version = current.version + 1 if current else 1
+            # Swap the whole snapshot in one assignment; readers see old or new
+            snapshot = RateSnapshot(tables, version, time.time(), time.perf_counter() - started, False,
+                                    rates_id(tables))
+            if current is not None:
+                self.change_log.record(current.tables, tables, version, snapshot.loaded_at)
+            self._snapshot = snapshot
+            self.last_error = None
+            self.last_error_at = None
+            if self.store is not None:
+                self._save(tables)
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            self.last_error_at = time.time()
+            with self._lock:
+                self._flight = None
+            flight.set_exception(e)
+            return
+        with self._lock:
+            self._flight = None
+        flight.set_result(self._snapshot)
+
+    def _save(self, tables):
+        try:
+            self.store.save(tables)
+            self.last_save_error = None
+        except OSError as e:
+            # A read-only or full disk shouldn't stop the new rates being served
+            self.last_save_error = f"{type(e).__name__}: {e}"
+
+    # ----------------------
+    # SCHEDULE
+    # ----------------------
+    def start(self):
+        """Reload every interval seconds from a daemon thread, even with no readers."""
+        if self._scheduler is None:
+            self._scheduler = threading.Thread(target=self._run_schedule, daemon=True,
+                                               name="rate-refresh-schedule")
+            self._scheduler.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run_schedule(self):
+        while not self._stopped.is_set():
+            try:
+                if self._snapshot is None:
+                    # First load (or restore from disk) for a server with no readers yet
+                    self.get()
+                elif self.due():
+                    self.refresh(wait=True)
+            except Exception:
+                # Nothing to serve yet; last_error has the details
+                pass
+            self._stopped.wait(min(self.interval, self.retry_interval, 30))
@@ -0,0 +1,214 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from .pricing import KG_PER_CBM
+
+# ----------------------
+# SUMMARY TABLE
+# ----------------------
+# Every summary column but the rates, which depend on the role and on
+# whether any item has that rate
+SUMMARY_COLUMNS = [
+    "Item", "User", "User Email", "Supplier", "SQN", "RM Type", "Country", "Origin", "Destination",
+    "Weight Value", "Weight Type", "Converted GSM (g/m²)", "Width", "Unit", "Width (m)", "Weight/m (kg)",
+    "Air Markup", "Sea Markup",
+]
+# Summary columns copied from the item dicts
+ITEM_COLUMNS = {
+    "Supplier": "supplier", "SQN": "sqn", "RM Type": "rm_type", "Country": "country", "Origin": "origin",
+    "Destination": "destination", "Weight Value": "weight_value", "Weight Type": "weight_type",
+    "Width": "width", "Unit": "unit",
+}
+# Rate columns by role and mode: (column, priced field, decimals)
+RATE_COLUMNS = {
+    ("Admin", "air"): [("Air Rate ($/kg)", "air_rate", 2), ("Final Air Rate ($)", "final_air_rate", 4)],
+    ("Admin", "sea"): [("Sea Rate ($/CBM)", "sea_rate", 2), ("Final Sea Rate ($)", "final_sea_rate", 4)],
+    ("Business", "air"): [("Final Air Rate ($)", "final_air_rate", 4)],
+    ("Business", "sea"): [("Final Sea Rate ($)", "final_sea_rate", 4)],
+}
+
+# ----------------------
+# EMAIL TABLE
+# ----------------------
+EMAIL_COLUMNS = ["Item", "User", "Supplier", "SQN", "RM Type", "Country", "Origin", "Destination",
+                 "Weight", "Width", "Weight/m", "Air Rate", "Sea Rate"]
+TABLE_OPEN = "<table style='width:100%; border-collapse: collapse;'>"
+HEADER_CELL = "<th style='border: 1px solid #ddd; padding: 8px; text-align: left;'>{}</th>"
+CELL_OPEN = "<td style='border: 1px solid #ddd; padding: 8px;'>"
+
+# Rows per page of the email preview
+DEFAULT_EMAIL_PAGE_SIZE = int(os.environ.get("FREIGHT_EMAIL_PAGE_SIZE", "200"))
+
+
+def round_half_even(values, decimals):
+    """Round a float array exactly as Python's round() rounds each value.
+
+    np.round scales by 10**decimals first, which can land a value on the
+    other side of a .5 tie; the few values that close to a tie are rounded
+    with round() instead.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.round(values, decimals)
+    scaled = values * 10.0 ** decimals
+    with np.errstate(invalid="ignore"):
+        near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6 * np.maximum(1, np.abs(scaled))
+    for i in np.flatnonzero(near_tie):
+        out[i] = round(float(values[i]), decimals)
+    return out
+
+
+def rate_columns(role, mode):
+    """[(column, priced field, decimals)] of one mode's rates, as role sees them."""
+    return RATE_COLUMNS[("Admin" if role == "Admin" else "Business", mode)]
+
+
+def _priced(priced, field):
+    # priced is a price_items frame or a list of rows with None for no rate
+    if isinstance(priced, pd.DataFrame):
+        return priced[field].to_numpy(dtype=np.float64)
+    return np.array([row[field] for row in priced], dtype=np.float64)
+
+
+def summary_frame(items, priced, role, user, user_email, first_item=1):
+    """The summary table for item dicts and their prices.
+
+    priced holds one row per item: the dicts PriceMemo.price returns, or a
+    price_items frame.
+
+    Columns are built whole rather than row by row, with the same values,
+    dtypes and column order as a frame of one dict per item: rate columns
+    show up only if some item has that rate, air before sea unless the
+    first sea rate comes before the first air rate.
+    """
+    n = len(items)
+    columns = {
+        "Item": [f"Item {i}" for i in range(first_item, first_item + n)],
+        "User": [user] * n,
+        "User Email": [user_email] * n,
+    }
+    for column, field in ITEM_COLUMNS.items():
+        columns[column] = [item[field] for item in items]
+        if column == "Weight Type":
+            # Only GLM weights are converted; None elsewhere
+            is_glm = np.array(columns[column], dtype=object) == "GLM (g/m)"
+            converted_gsm = round_half_even(_priced(priced, "converted_gsm"), 2)
+            columns["Converted GSM (g/m²)"] = np.where(is_glm, converted_gsm, np.nan) if is_glm.any() else [None] * n
+    columns["Width (m)"] = round_half_even(_priced(priced, "width_m"), 4)
+    columns["Weight/m (kg)"] = round_half_even(_priced(priced, "kg_per_m"), 6)
+    columns["Air Markup"] = columns["Sea Markup"] = _priced(priced, "markup")
+
+    available = {mode: ~np.isnan(_priced(priced, f"{mode}_rate")) for mode in ("air", "sea")}
+    first = {mode: np.argmax(has) for mode, has in available.items() if has.any()}
+    for mode in sorted(first, key=lambda mode: (first[mode], mode)):
+        for column, field, decimals in rate_columns(role, mode):
+            columns[column] = np.where(available[mode], round_half_even(_priced(priced, field), decimals), np.nan)
+
+    return pd.DataFrame(columns)
+
+
+def _text(values):
+    # str() of every value, as the f-strings wrote them ("nan" for NaN, "None" for None)
+    text = np.empty(len(values), dtype=object)
+    text[:] = list(map(str, np.asarray(values).tolist()))
+    return text
+
+
+def email_table(df):
+    """The email preview's 13 display columns, as strings, for a summary table."""
+    gsm = df["Converted GSM (g/m²)"]
+    weight = _text(df["Weight Value"]) + " " + _text(df["Weight Type"])
+    has_gsm = gsm.notna().to_numpy()
+    weight[has_gsm] += ":-(" + _text(gsm[has_gsm]) + " g/m²)"
+
+    table = {
+        "Item": _text(np.arange(1, len(df) + 1)),
+        "Weight": weight,
+        "Width": _text(df["Width"]) + " " + _text(df["Unit"]) + ":-(" + _text(df["Width (m)"]) + " m)",
+        "Weight/m": _text(df["Weight/m (kg)"]) + " kg/m",
+    }
+    for column in ["User", "Supplier", "SQN", "RM Type", "Country", "Origin", "Destination"]:
+        table[column] = _text(df[column])
+    for column, rate in [("Air Rate", "Final Air Rate ($)"), ("Sea Rate", "Final Sea Rate ($)")]:
+        table[column] = np.full(len(df), "N/A", dtype=object)
+        if rate in df:
+            values = df[rate].to_numpy(dtype=np.float64)
+            shown = ~np.isnan(values)
+            table[column][shown] = "$" + np.char.mod("%.4f", values[shown]).astype(object)
+    return pd.DataFrame(table, columns=EMAIL_COLUMNS, dtype=object)
+
+
+def email_table_html(table, start=0, stop=None):
+    """HTML of rows start:stop of an email_table, with the header row.
+
+    The markup between cells is the same for every row, so the cells and
+    that markup are laid out in one array and joined in a single pass,
+    instead of appending to one string per cell. Returns "" for an empty
+    table.
+    """
+    table = table.iloc[start:stop]
+    if table.empty:
+        return ""
+    # <tr><td>v1</td><td>v2 ... </td></tr>: values at odd positions
+    pieces = np.empty((len(table), 2 * len(EMAIL_COLUMNS) + 1), dtype=object)
+    pieces[:, 0] = "<tr>" + CELL_OPEN
+    pieces[:, 1:-1:2] = table[EMAIL_COLUMNS].to_numpy(dtype=object)
+    pieces[:, 2:-1:2] = "</td>" + CELL_OPEN
+    pieces[:, -1] = "</td></tr>"
+    header = "".join(HEADER_CELL.format(column) for column in EMAIL_COLUMNS)
+    return "".join([TABLE_OPEN, "<tr style='background-color: #f2f2f2;'>", header, "</tr>",
+                    "".join(pieces.ravel().tolist()), "</table>"])
+
+
+# ----------------------
+# CALCULATION EXPLANATION
+# ----------------------
+def calculation_lines(row, role):
+    """The "How These Charges Were Calculated" lines for one summary row.
+
+    row is a summary_frame row (a Series or dict); a rate counts as
+    available when its Final rate column is there and not NaN.
+    """
+    air_available = pd.notna(row.get("Final Air Rate ($)", np.nan))
+    sea_available = pd.notna(row.get("Final Sea Rate ($)", np.nan))
+
+    lines = []
+
+    # ---- Width
+    lines.append(f"• Width converted to meters = {row['Width (m)']:.4f} m.")
+
+    # ---- GLM case
+    if row['Weight Type'] == "GLM (g/m)":
+        lines.append(f"• GLM to GSM conversion: {row['Weight Value']} g/m ÷ {row['Width (m)']:.4f} m = {row['Converted GSM (g/m²)']:.2f} g/m².")
+
+    # ---- kg per meter
+    lines.append(f"• Fabric weight per running meter = GSM × width = {row['Weight/m (kg)']:.6f} kg/m.")
+
+    # ---- AIR
+    if air_available:
+        if role == "Admin":
+            air_freight_per_m = row['Air Rate ($/kg)'] * row['Weight/m (kg)']
+            lines.append(f"• Air freight per meter = {row['Air Rate ($/kg)']:.2f} × {row['Weight/m (kg)']:.6f} = {air_freight_per_m:.6f} USD.")
+            # Use dynamic markup
+            air_markup_value = row.get('Air Markup', 1.15)
+            lines.append(f"• Final Air rate = {air_freight_per_m:.6f} × markup {air_markup_value} = {row['Final Air Rate ($)']:.6f} USD.")
+            lines.append(f"  (Markup based on RM Type: {row['RM Type']} for destination: {row['Destination']})")
+        else:
+            lines.append("• Air freight = (Air base rate × kg per meter) adjusted to final selling rate with RM Type-specific markup.")
+
+    # ---- SEA
+    if sea_available:
+        if role == "Admin":
+            cbm_per_m = row['Weight/m (kg)'] / KG_PER_CBM
+            sea_freight_per_m = row['Sea Rate ($/CBM)'] * cbm_per_m
+            lines.append(f"• CBM per meter = {row['Weight/m (kg)']:.6f} ÷ {KG_PER_CBM} = {cbm_per_m:.8f}.")
+            lines.append(f"• Sea freight per meter = {row['Sea Rate ($/CBM)']:.2f} × {cbm_per_m:.8f} = {sea_freight_per_m:.6f} USD.")
+            # Use dynamic markup
+            sea_markup_value = row.get('Sea Markup', 1.15)
+            lines.append(f"• Final Sea rate = {sea_freight_per_m:.6f} × markup {sea_markup_value} = {row['Final Sea Rate ($)']:.6f} USD.")
+            lines.append(f"  (Markup based on RM Type: {row['RM Type']} for destination: {row['Destination']})")
+        else:
+            lines.append("• Sea freight = (CBM per meter × Sea base rate) adjusted to final selling rate with RM Type-specific markup.")
+
+    return lines
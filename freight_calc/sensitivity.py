@@ -0,0 +1,113 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from .pricing import UNITS, WEIGHT_TYPES, enum_code, price_arrays
+
+# ----------------------
+# WEIGHT x WIDTH GRID
+# ----------------------
+MODES = ("air", "sea")
+
+# Points along each axis of the what-if grid
+DEFAULT_GRID_POINTS = int(os.environ.get("FREIGHT_SENSITIVITY_POINTS", "25"))
+MAX_GRID_POINTS = 200
+
+# Heat map shades, white (at the target) to full colour (LEVELS steps away)
+LEVELS = 10
+UNDER_COLOR = (46, 160, 67)
+OVER_COLOR = (218, 54, 51)
+CONTOUR_STYLE = "border: 2px solid #000; font-weight: bold;"
+
+
+def grid_axis(start, stop, points=DEFAULT_GRID_POINTS):
+    """points evenly spaced values from start to stop, both included."""
+    if not start < stop:
+        raise ValueError(f"Range start {start:g} must be below its end {stop:g}")
+    return np.linspace(start, stop, min(max(int(points), 2), MAX_GRID_POINTS))
+
+
+def sensitivity_grid(rate_index, item, weights, widths, as_of=None):
+    """Final air and sea rate per meter of item over every weight x width pair.
+
+    item is an item dict (ITEM_FIELDS); its lane, RM type, weight type and
+    unit are kept and its weight_value and width replaced by each of
+    weights (rows) and widths (columns). The lane's rates and markup are
+    looked up once and the whole grid priced in one broadcast price_arrays
+    call, so every cell matches the calculator for that weight and width.
+    Returns {"air": array, "sea": array}, each len(weights) x len(widths)
+    and all NaN for a mode the lane has no rate for.
+    """
+    air, sea = rate_index.lookup(item["country"], item["origin"], item["destination"], as_of)
+    priced = price_arrays(
+        np.asarray(weights, dtype=np.float64)[:, None],
+        np.array([[enum_code(item["weight_type"], WEIGHT_TYPES)]]),
+        np.asarray(widths, dtype=np.float64)[None, :],
+        np.array([[enum_code(item["unit"], UNITS)]]),
+        np.nan if air is None else air,
+        np.nan if sea is None else sea,
+        rate_index.markup(item["rm_type"], item["destination"]),
+    )
+    return {mode: priced[f"final_{mode}_rate"] for mode in MODES}
+
+
+def target_contour(costs, target):
+    """Cells at or under target with a neighbour over it (or with no rate).
+
+    Marks the edge of the affordable region: the largest weights and
+    widths that still meet the target.
+    """
+    within = costs <= target
+    edge = np.zeros(costs.shape, dtype=bool)
+    edge[1:, :] |= within[1:, :] != within[:-1, :]
+    edge[:-1, :] |= within[:-1, :] != within[1:, :]
+    edge[:, 1:] |= within[:, 1:] != within[:, :-1]
+    edge[:, :-1] |= within[:, :-1] != within[:, 1:]
+    return edge & within
+
+
+def _shades(color):
+    # CSS background for each level, white to color
+    steps = np.linspace(0, 1, LEVELS + 1)[:, None]
+    rgb = np.rint(255 - steps * (255 - np.array(color))).astype(int)
+    return np.array([f"background-color: rgb({r}, {g}, {b}); " for r, g, b in rgb], dtype=object)
+
+
+def heatmap_styles(costs, target):
+    """CSS for every cell: green under target, red over, darker further away.
+
+    A cell's shade is its distance from target in tenths of the target,
+    capped at LEVELS; cells on the target contour get a border too.
+    Cells without a rate are left plain.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio = costs / target - 1
+        level = np.clip(np.nan_to_num(np.abs(ratio) * LEVELS, nan=0), 0, LEVELS).astype(int)
+    styles = np.where(ratio <= 0, _shades(UNDER_COLOR)[level], _shades(OVER_COLOR)[level])
+    styles[np.isnan(costs)] = ""
+    contour = target_contour(costs, target)
+    styles[contour] = styles[contour] + CONTOUR_STYLE
+    return styles
+
+
+def axis_labels(values):
+    """Shortest %g labels (6 to 17 significant digits) that tell every value apart.
+
+    Styler.apply needs unique row and column labels; over a narrow range
+    neighbouring points can share their 6-digit label.
+    """
+    for digits in range(6, 18):
+        labels = [f"{v:.{digits}g}" for v in values]
+        if len(set(labels)) == len(labels):
+            break
+    return labels
+
+
+def heatmap_table(costs, weights, widths, target, decimals=4):
+    """A Styler of costs with weights as rows and widths as columns, shaded by heatmap_styles."""
+    frame = pd.DataFrame(costs, index=pd.Index(axis_labels(weights), name="Weight"),
+                         columns=axis_labels(widths))
+    return (frame.style
+            .apply(lambda _: heatmap_styles(costs, target), axis=None)
+            .format(f"{{:.{decimals}f}}", na_rep="N/A"))
@@ -0,0 +1,201 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .changes import ChangeLog
+from .ingest import rate_status
+from .loader import RateTables, rates_id
+from .rate_index import RateIndex
+from .validation import issues_from_records, issues_to_records
+from .refresh import RateSnapshot
+
+# ----------------------
+# FILE LAYOUT
+# ----------------------
+# MAGIC | metadata length (uint64 LE) | metadata JSON | padding | arrays
+# Every array starts on a 64-byte boundary so it can be viewed in place.
+MAGIC = b"FRSHM001"
+HEADER = struct.Struct("<8sQ")
+ALIGN = 64
+
+# The history arrays are present only when the tables carry a rate history
+SHARED_ARRAY_NAMES = RateIndex.ARRAY_NAMES + ("lane_codes",) + RateIndex.HISTORY_ARRAY_NAMES
+
+DEFAULT_SHARED_PATH = os.environ.get("FREIGHT_SHARED_RATES", "")
+
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def read_metadata(path):
+    """Return the metadata of a published file (without mapping its arrays), or None."""
+    try:
+        with open(path, "rb") as f:
+            magic, length = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                return None
+            return json.loads(f.read(length))
+    except (OSError, struct.error, ValueError):
+        return None
+
+
+# ----------------------
+# PUBLISH
+# ----------------------
+def publish(tables, path, load_seconds=0.0):
+    """Write tables as the next generation of the shared file at path.
+
+    The file is written beside the target and renamed over it, so readers
+    see either the old or the new generation; processes that still map the
+    old file keep a valid view of it. Returns the new generation number.
+    """
+    labels, arrays = tables.rate_index.to_parts()
+    arrays = dict(arrays, lane_codes=tables.rate_index.lane_codes)
+    arrays = {name: np.ascontiguousarray(arrays[name]) for name in SHARED_ARRAY_NAMES if name in arrays}
+
+    previous = read_metadata(path)
+    generation = previous["generation"] + 1 if previous else 1
+
+    specs = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _align(offset)
+        specs[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += array.nbytes
+
+    metadata = json.dumps({
+        "generation": generation,
+        "rates_id": rates_id(tables),
+        "published_at": time.time(),
+        "load_seconds": load_seconds,
+        "labels": labels,
+        "all_destinations": list(tables.all_destinations),
+        "rm_types": list(tables.rm_types),
+        "markup_error": tables.markup_error,
+        "rate_date": tables.rate_date.isoformat() if tables.rate_date is not None else None,
+        "issues": issues_to_records(tables.issues),
+        "arrays": specs,
+    }).encode("utf-8")
+    data_start = _align(HEADER.size + len(metadata))
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(metadata)))
+        f.write(metadata)
+        for name, array in arrays.items():
+            f.seek(data_start + specs[name]["offset"])
+            f.write(array.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return generation
+
+
+# ----------------------
+# MAP
+# ----------------------
+def map_shared(path):
+    """Map a published file read-only; returns (tables, metadata).
+
+    The rate arrays are read-only views straight into the mapping, so
+    every process that maps the file shares the same physical pages.
+    """
+    with open(path, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, length = HEADER.unpack_from(mapping, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a shared rate file")
+    metadata = json.loads(mapping[HEADER.size:HEADER.size + length])
+    data_start = _align(HEADER.size + length)
+
+    arrays = {}
+    for name, spec in metadata["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        shape = tuple(spec["shape"])
+        count = int(np.prod(shape))
+        if count == 0:
+            arrays[name] = np.empty(shape, dtype=dtype)
+        else:
+            arrays[name] = np.frombuffer(mapping, dtype=dtype, count=count,
+                                         offset=data_start + spec["offset"]).reshape(shape)
+
+    rate_index = RateIndex.from_parts(metadata["labels"], arrays)
+    rate_date = pd.Timestamp(metadata["rate_date"]) if metadata["rate_date"] else None
+    is_current_month, rate_month_year = rate_status(rate_date)
+    tables = RateTables(rate_index, tuple(metadata["all_destinations"]), is_current_month,
+                        rate_month_year, tuple(metadata["rm_types"]), metadata["markup_error"], rate_date,
+                        issues=issues_from_records(metadata.get("issues")))
+    return tables, metadata
+
+
+class SharedRateReader:
+    """Serves the rate tables from a file published by another process.
+
+    Offers the same get()/refresh()/age() calls the app uses on a
+    RateRefresher. Each get() stats the file and remaps it when a new
+    generation has been renamed into place, so workers pick up new rates
+    without a restart.
+    """
+
+    def __init__(self, path=DEFAULT_SHARED_PATH):
+        self.path = path
+        self.last_error = None
+        self.change_log = ChangeLog()
+        self._snapshot = None
+        self._file_id = None
+        self._lock = threading.Lock()
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    def get(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            if self._snapshot is None:
+                raise
+            return self._snapshot
+
+        file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if file_id != self._file_id:
+            with self._lock:
+                if file_id != self._file_id:
+                    self._remap(file_id)
+        return self._snapshot
+
+    def _remap(self, file_id):
+        try:
+            tables, metadata = map_shared(self.path)
+        except (OSError, ValueError, KeyError, struct.error) as e:
+            # Missing, truncated or not a shared rate file: keep serving the last good one
+            self.last_error = f"{type(e).__name__}: {e}"
+            if self._snapshot is None:
+                raise
+            return
+        snapshot = RateSnapshot(tables, metadata["generation"], metadata["published_at"],
+                                metadata["load_seconds"], False, metadata.get("rates_id") or rates_id(tables))
+        if self._snapshot is not None:
+            self.change_log.record(self._snapshot.tables, tables, snapshot.version, snapshot.loaded_at)
+        self._snapshot = snapshot
+        self._file_id = file_id
+        self.last_error = None
+
+    def refresh(self, wait=True):
+        """Re-check the file; reloading the workbook is the publisher's job."""
+        return self.get()
+
+    def age(self, snapshot=None):
+        snapshot = snapshot or self._snapshot
+        return time.time() - snapshot.loaded_at if snapshot else None
+
+    def is_loading(self):
+        return False
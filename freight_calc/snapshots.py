@@ -0,0 +1,125 @@
+import io
+import json
+import os
+import time
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from .ingest import rate_status
+from .loader import RateTables, rates_id
+from .rate_index import RateIndex
+from .validation import issues_from_records, issues_to_records
+
+# Bump when the file layout changes; older files are then ignored
+SNAPSHOT_FORMAT = 1
+
+DEFAULT_SNAPSHOT_DIR = os.environ.get("FREIGHT_SNAPSHOT_DIR", "rate_snapshots")
+DEFAULT_SNAPSHOT_KEEP = int(os.environ.get("FREIGHT_SNAPSHOT_KEEP", "10"))
+
+SNAPSHOT_PREFIX = "rates-"
+SNAPSHOT_SUFFIX = ".npz"
+
+
+class SnapshotStore:
+    """Versioned on-disk copies of the parsed rate tables.
+
+    Each snapshot is one .npz file: the RateIndex arrays (and its rate
+    history, if any) plus a JSON metadata entry (labels, destinations, RM
+    types, rate date, save time).
+    Files are written to a temporary name and renamed into place, and only
+    the newest `keep` snapshots are kept.
+    """
+
+    def __init__(self, directory=DEFAULT_SNAPSHOT_DIR, keep=DEFAULT_SNAPSHOT_KEEP):
+        self.directory = directory
+        self.keep = max(1, keep)
+
+    def paths(self):
+        """Snapshot paths, newest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        names = [n for n in os.listdir(self.directory)
+                 if n.startswith(SNAPSHOT_PREFIX) and n.endswith(SNAPSHOT_SUFFIX)]
+        return [os.path.join(self.directory, n) for n in sorted(names, reverse=True)]
+
+    # ----------------------
+    # WRITE
+    # ----------------------
+    def save(self, tables, saved_at=None):
+        """Write tables as a new snapshot and prune old ones; returns the path.
+
+        If the newest snapshot already holds identical tables no new file is
+        written and its path is returned.
+        """
+        saved_at = saved_at if saved_at is not None else time.time()
+        labels, arrays = tables.rate_index.to_parts()
+        metadata = {
+            "format": SNAPSHOT_FORMAT,
+            "labels": labels,
+            "all_destinations": list(tables.all_destinations),
+            "rm_types": list(tables.rm_types),
+            "markup_error": tables.markup_error,
+            "rate_date": tables.rate_date.isoformat() if tables.rate_date is not None else None,
+            "issues": issues_to_records(tables.issues),
+        }
+
+        content_hash = rates_id(tables)
+
+        existing = self.paths()
+        if existing and existing[0].endswith(f"-{content_hash}{SNAPSHOT_SUFFIX}"):
+            return existing[0]
+
+        metadata["saved_at"] = saved_at
+        metadata["content_hash"] = content_hash
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, metadata=np.array(json.dumps(metadata)), **arrays)
+
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(saved_at)) + f"{int(saved_at * 1e6) % 1000000:06d}"
+        path = os.path.join(self.directory, f"{SNAPSHOT_PREFIX}{stamp}-{content_hash}{SNAPSHOT_SUFFIX}")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(buffer.getvalue())
+        os.replace(tmp_path, path)
+
+        self.prune()
+        return path
+
+    def prune(self):
+        for path in self.paths()[self.keep:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    # ----------------------
+    # READ
+    # ----------------------
+    def load(self, path):
+        """Return (tables, saved_at) from one snapshot file."""
+        with np.load(path, allow_pickle=False) as data:
+            metadata = json.loads(str(data["metadata"]))
+            if metadata.get("format") != SNAPSHOT_FORMAT:
+                raise ValueError(f"{path}: unsupported snapshot format {metadata.get('format')}")
+            arrays = {name: data[name] for name in RateIndex.ARRAY_NAMES + RateIndex.HISTORY_ARRAY_NAMES
+                      if name in data.files}
+
+        rate_index = RateIndex.from_parts(metadata["labels"], arrays)
+        rate_date = pd.Timestamp(metadata["rate_date"]) if metadata["rate_date"] else None
+        # Recompute against today's date rather than the save date
+        is_current_month, rate_month_year = rate_status(rate_date)
+        tables = RateTables(rate_index, tuple(metadata["all_destinations"]), is_current_month,
+                            rate_month_year, tuple(metadata["rm_types"]), metadata["markup_error"], rate_date,
+                            issues=issues_from_records(metadata.get("issues")))
+        return tables, metadata["saved_at"]
+
+    def load_latest(self):
+        """Return (tables, saved_at) from the newest readable snapshot, or None."""
+        for path in self.paths():
+            try:
+                return self.load(path)
+            except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+                continue
+        return None
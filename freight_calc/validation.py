@@ -0,0 +1,169 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from .rate_index import DEFAULT_MARKUP
+
+# ----------------------
+# RATE SHEET CHECKS
+# ----------------------
+ISSUE_COLUMNS = ["severity", "issue", "mode", "destination", "country", "origin", "rm_type", "detail"]
+SEVERITIES = ["error", "warning"]
+
+# Flag a lane whose rate moved more than this fraction since the month before
+DEFAULT_JUMP_THRESHOLD = float(os.environ.get("FREIGHT_RATE_JUMP", "0.5"))
+
+
+def _issues(severity, issue, frame, detail, **columns):
+    """One issue row per row of frame, keeping its lane columns."""
+    out = pd.DataFrame({name: frame[name].to_numpy() if name in frame else None
+                        for name in ["mode", "destination", "country", "origin"]})
+    out.insert(0, "issue", issue)
+    out.insert(0, "severity", severity)
+    for name, value in columns.items():
+        out[name] = value
+    out["detail"] = detail
+    return out
+
+
+def check_rate_rows(rates):
+    """Type, blank and duplicate checks over the long rate frame of every sheet."""
+    # Rows with nothing in them are just padding at the end of a sheet
+    rates = rates[rates[["country", "origin", "rate"]].notna().any(axis=1)]
+    raw = rates["rate"]
+    text = raw.astype(str)
+    values = pd.to_numeric(raw, errors="coerce")
+    blank = raw.isna() | text.str.strip().eq("")
+    no_lane = rates["country"].isna() | rates["origin"].isna()
+    duplicate = ~no_lane & rates.duplicated(["mode", "destination", "country", "origin"], keep="last")
+
+    checks = [
+        ("error", "missing country/origin", no_lane, "row is skipped"),
+        ("error", "non-numeric rate", ~blank & values.isna(), "rate " + text + " is not a number"),
+        ("warning", "blank rate", ~no_lane & blank, "lane has no rate"),
+        ("warning", "rate not positive", values <= 0, "rate " + values.astype(str)),
+        ("warning", "duplicate lane", duplicate, "rate " + text + " replaced by a later row"),
+    ]
+    frames = []
+    for severity, issue, mask, detail in checks:
+        if mask.any():
+            detail = detail[mask].to_numpy() if isinstance(detail, pd.Series) else detail
+            frames.append(_issues(severity, issue, rates[mask], detail))
+    return frames
+
+
+def check_rate_jumps(rate_index, sheets, threshold=DEFAULT_JUMP_THRESHOLD):
+    """Lanes whose latest rate moved by more than threshold since the previous month.
+
+    sheets lists (mode, destination, col_date) per rate sheet. Needs the
+    rate history; without one there is nothing to compare against. Every
+    lane of every sheet is looked up in one call, each as of the day
+    before its sheet's date.
+    """
+    history = rate_index.history
+    dated = [(mode, d, col_date) for (mode, _, col_date), d in
+             zip(sheets, rate_index.destination_ids([dest for _, dest, _ in sheets]))
+             if col_date is not None and d >= 0]
+    if history is None or not dated:
+        return []
+
+    modes, dests, dates = (np.array(column) for column in zip(*dated))
+    lanes, sheet = np.nonzero(rate_index.present[:, dests].T)[::-1]
+    d = dests[sheet]
+    is_air = modes[sheet] == "air"
+    previous_air, previous_sea = history.lookup_many(
+        lanes, d, pd.DatetimeIndex(dates)[sheet] - pd.Timedelta(days=1))
+    previous = np.where(is_air, previous_air, previous_sea)
+    current = np.where(is_air, rate_index.air[lanes, d], rate_index.sea[lanes, d])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = current / previous - 1
+    jumped = np.abs(change) > threshold
+    if not jumped.any():
+        return []
+
+    frame = pd.DataFrame({
+        "mode": modes[sheet][jumped],
+        "destination": np.array(rate_index.destinations, dtype=object)[d[jumped]],
+        "country": np.array(rate_index.countries, dtype=object)[rate_index.lane_country[lanes[jumped]]],
+        "origin": np.array(rate_index.origins, dtype=object)[rate_index.lane_origin[lanes[jumped]]],
+    })
+    detail = [f"{old:g} -> {new:g} ({pct:+.0%})"
+              for old, new, pct in zip(previous[jumped], current[jumped], change[jumped])]
+    return [_issues("warning", "rate jump", frame, detail)]
+
+
+def check_markups(rate_index, markups, destinations, markup_error=None):
+    """Markups that are missing (the default is used) or not numbers."""
+    if markup_error:
+        return [pd.DataFrame([["error", "markup sheet unreadable", None, None, None, None, None,
+                               f"fallback markups in use: {markup_error}"]], columns=ISSUE_COLUMNS)]
+
+    rm_types = np.array(rate_index.rm_types, dtype=object)
+    d = rate_index.destination_ids(list(destinations))
+    matrix = rate_index.markup_matrix[:, d[d >= 0]]
+    dests = np.array(list(destinations), dtype=object)[d >= 0]
+    r, c = np.nonzero(np.isnan(matrix))
+    raw = np.array([markups.get(rm_type, {}).get(dest) for rm_type, dest in zip(rm_types[r], dests[c])],
+                   dtype=object)
+    blank = pd.isna(raw) if len(raw) else np.zeros(0, dtype=bool)
+
+    frames = []
+    for severity, issue, mask, detail in [
+        ("warning", "markup missing", blank, f"default markup {DEFAULT_MARKUP} is used"),
+        ("error", "non-numeric markup", ~blank, [f"markup {v} is not a number" for v in raw[~blank]]),
+    ]:
+        if mask.any():
+            frame = pd.DataFrame({"destination": dests[c][mask]})
+            frames.append(_issues(severity, issue, frame, detail, rm_type=rm_types[r][mask]))
+    return frames
+
+
+def validate_rate_tables(rates, sheets, rate_index, markups, markup_error=None,
+                         jump_threshold=DEFAULT_JUMP_THRESHOLD):
+    """Return every problem found in a loaded workbook as an ISSUE_COLUMNS frame.
+
+    rates is the long frame from read_rate_sheets (rates as they were in
+    the sheet, before conversion), sheets lists (mode, destination,
+    col_date) per rate sheet and markups is the raw Markup sheet dict.
+    All checks run as column operations over every sheet at once, except
+    the month-over-month jump check, which runs once per sheet.
+    """
+    frames = check_rate_rows(rates)
+    frames += [_issues("error", "date header not a date", pd.DataFrame({"mode": [mode], "destination": [dest]}),
+                       "latest column header isn't a date; the sheet's rate month is unknown")
+               for mode, dest, col_date in sheets if col_date is None]
+    frames += check_rate_jumps(rate_index, sheets, jump_threshold)
+    frames += check_markups(rate_index, markups, {dest for _, dest, _ in sheets}, markup_error)
+
+    if not frames:
+        return pd.DataFrame(columns=ISSUE_COLUMNS, dtype=object)
+    issues = pd.concat(frames, ignore_index=True).reindex(columns=ISSUE_COLUMNS)
+    issues["severity"] = pd.Categorical(issues["severity"], categories=SEVERITIES, ordered=True)
+    issues = issues.sort_values(["severity", "issue", "destination", "mode", "country", "origin"],
+                                na_position="first", kind="stable", ignore_index=True)
+    return issues.astype(object).where(issues.notna(), None)
+
+
+def summarize_issues(issues):
+    """Short summary such as "2 errors, 14 warnings"; "no issues" if empty."""
+    if issues is None or issues.empty:
+        return "no issues"
+    counts = issues["severity"].value_counts()
+    return ", ".join(f"{counts[s]} {s}{'s' if counts[s] != 1 else ''}" for s in SEVERITIES if s in counts)
+
+
+# ----------------------
+# STORAGE
+# ----------------------
+def issues_to_records(issues):
+    """JSON-able rows of an issues frame (for snapshot and shared-file metadata)."""
+    if issues is None:
+        return None
+    return issues.values.tolist()
+
+
+def issues_from_records(records):
+    if records is None:
+        return None
+    return pd.DataFrame(records, columns=ISSUE_COLUMNS, dtype=object)
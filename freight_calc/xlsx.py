@@ -0,0 +1,225 @@
+import hashlib
+import io
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+import pandas as pd
+
+try:
+    from openpyxl.worksheet._reader import ROW_TAG, WorkSheetParser
+    from openpyxl.xml.functions import iterparse
+except ImportError:
+    # openpyxl moved its internals; read_columns falls back to pandas
+    WorkSheetParser = None
+
+DIGITS = "0123456789"
+
+MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PACKAGE_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+# A cell holding a shared string: <c r="A2" t="s"><v>12</v></c>
+SHARED_STRING_CELL = re.compile(rb' t="s"[^>]*>\s*<(?:\w+:)?v>(\d+)<')
+WORKBOOK_PROPERTIES = re.compile(rb"<(?:\w+:)?workbookPr\b[^>]*>")
+
+
+def column_letter(index):
+    """1 -> "A", 27 -> "AA" (as used in cell references)."""
+    letters = ""
+    while index > 0:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+def select_columns(header, names, pick=None):
+    """1-based positions of names, then pick's columns, then the last filled header cell.
+
+    header maps positions to labels; pick(header), if given, returns more
+    positions to keep. Returns None if a name is missing.
+    """
+    positions = {}
+    for column in sorted(header):
+        positions.setdefault(header[column], column)
+    filled = [column for column, value in header.items() if value is not None]
+    if not filled or any(name not in positions for name in names):
+        return None
+    extra = sorted(pick(header)) if pick is not None else []
+    return list(dict.fromkeys([positions[name] for name in names] + extra + [max(filled)]))
+
+
+def dedupe_labels(header):
+    """header with repeated labels renamed "X.1", "X.2", ... as pandas names them.
+
+    Keeps every picked column when a sheet repeats a header (two columns
+    for the same month, say) instead of one silently replacing the other.
+    """
+    labels = {}
+    counts = {}
+    for column in sorted(header):
+        label = header[column]
+        if label is not None:
+            count = counts.get(label, 0)
+            while count > 0:
+                counts[label] = count + 1
+                label = f"{label}.{count}"
+                count = counts.get(label, 0)
+            counts[label] = count + 1
+        labels[column] = label
+    return labels
+
+
+if WorkSheetParser is not None:
+    class ColumnParser(WorkSheetParser):
+        """Streams a sheet's XML but decodes only the cells of the wanted columns.
+
+        The header row is decoded in full and passed to select(), which
+        returns the column positions to keep (or None to stop). For every
+        other row, cells outside those columns are skipped before any value
+        conversion (shared strings, numbers, dates).
+        """
+
+        def parse_columns(self, select):
+            wanted = letters = None
+            for _, element in iterparse(self.source):
+                if element.tag != ROW_TAG:
+                    continue
+                r = element.get("r")
+                self.row_counter = int(r) if r else self.row_counter + 1
+                self.col_counter = 0
+                cells = {}
+                for cell in element:
+                    ref = cell.get("r")
+                    if letters is None or ref is None or ref.rstrip(DIGITS) in letters:
+                        parsed = self.parse_cell(cell)
+                        if wanted is None or parsed["column"] in wanted:
+                            cells[parsed["column"]] = parsed["value"]
+                element.clear()
+
+                if wanted is None:
+                    positions = select(cells)
+                    if positions is None:
+                        return
+                    wanted = set(positions)
+                    letters = {column_letter(c) for c in positions}
+                yield cells
+
+
+def read_columns(xls, sheet, names, pick=None):
+    """Read the named columns plus the last (latest) column of one sheet.
+
+    pick selects more columns from the header (see select_columns).
+
+    xls is an open pd.ExcelFile. With the openpyxl engine the sheet is
+    streamed through ColumnParser; with any other engine (e.g. calamine),
+    or if openpyxl's internals don't match what ColumnParser expects, the
+    header is read first and usecols keeps the columns. If a named column
+    is missing the whole sheet is parsed, so the caller raises the same
+    error it always has. Repeated header labels get pandas' ".1" suffixes
+    either way.
+    """
+    if xls.engine == "openpyxl" and WorkSheetParser is not None:
+        try:
+            return _stream_columns(xls, sheet, names, pick)
+        except (AttributeError, TypeError):
+            # A private openpyxl name changed shape; pandas reads it the slow way
+            pass
+
+    header = list(xls.parse(sheet, nrows=0).columns)
+    positions = select_columns(dict(enumerate(header, start=1)), names, pick)
+    if positions is None:
+        return xls.parse(sheet)
+    return xls.parse(sheet, usecols=[p - 1 for p in positions])
+
+
+def _stream_columns(xls, sheet, names, pick):
+    # ColumnParser relies on private openpyxl attributes (see requirements.txt)
+    book = xls.book
+    ws = book[sheet]
+    with ws._get_source() as src:
+        parser = ColumnParser(src, ws._shared_strings, data_only=True, epoch=book.epoch,
+                              date_formats=book._date_formats,
+                              timedelta_formats=book._timedelta_formats)
+        chosen = []
+
+        def select(header):
+            # Same labels pandas would give, so pick sees what the fallback sees
+            header = dedupe_labels(header)
+            positions = select_columns(header, names, pick)
+            if positions is not None:
+                chosen.extend((column, header[column]) for column in positions)
+            return positions
+
+        rows = parser.parse_columns(select)
+        next(rows, None)  # header row
+        data = [cells for cells in rows if cells]
+
+    if not chosen:
+        return xls.parse(sheet)
+    return pd.DataFrame({label: [cells.get(column) for cells in data] for column, label in chosen})
+
+
+# ----------------------
+# SHEET FINGERPRINTS
+# ----------------------
+def _sheet_paths(book):
+    """{sheet name: zip member} from workbook.xml and its relationships."""
+    targets = {}
+    rels = ET.fromstring(book.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels.iter(f"{PACKAGE_REL_NS}Relationship"):
+        target = rel.get("Target", "")
+        if target.startswith("/"):
+            target = target[1:]
+        else:
+            target = posixpath.normpath(posixpath.join("xl", target))
+        targets[rel.get("Id")] = target
+
+    workbook = ET.fromstring(book.read("xl/workbook.xml"))
+    return {sheet.get("name"): targets.get(sheet.get(f"{REL_NS}id"))
+            for sheet in workbook.iter(f"{MAIN_NS}sheet")}
+
+
+def _shared_strings(book):
+    if "xl/sharedStrings.xml" not in book.namelist():
+        return []
+    strings = []
+    for _, element in ET.iterparse(book.open("xl/sharedStrings.xml")):
+        if element.tag == f"{MAIN_NS}si":
+            strings.append("".join(element.itertext()))
+            element.clear()
+    return strings
+
+
+def sheet_fingerprints(content):
+    """Return {sheet name: content hash} for an XLSX workbook, or {} if it can't be read.
+
+    A sheet's hash covers its own XML, the shared strings it refers to, and
+    the workbook's styles and date settings (which decide how cells decode),
+    so adding a string used by some other sheet leaves it unchanged. Only
+    regular expressions run over the sheet XML; nothing is parsed.
+    """
+    try:
+        with zipfile.ZipFile(io.BytesIO(content)) as book:
+            paths = _sheet_paths(book)
+            strings = _shared_strings(book)
+            common = hashlib.sha1()
+            if "xl/styles.xml" in book.namelist():
+                common.update(book.read("xl/styles.xml"))
+            common.update(b"".join(WORKBOOK_PROPERTIES.findall(book.read("xl/workbook.xml"))))
+
+            fingerprints = {}
+            for name, path in paths.items():
+                if path is None:
+                    continue
+                xml = book.read(path)
+                digest = common.copy()
+                digest.update(xml)
+                for i in sorted({int(i) for i in SHARED_STRING_CELL.findall(xml)}):
+                    text = strings[i] if i < len(strings) else ""
+                    digest.update(b"%d\0%s\0" % (i, text.encode("utf-8")))
+                fingerprints[name] = digest.hexdigest()
+            return fingerprints
+    except (KeyError, ValueError, zipfile.BadZipFile, ET.ParseError):
+        return {}
@@ -1,5 +1,10 @@
+import os
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+from functools import partial
+
 import streamlit as st
-import pandas as pd
 
 st.set_page_config(page_title="Freight Rate Calculator", layout="wide")
 
@@ -32,190 +37,70 @@ if "logged_in" not in st.session_state:
 # ----------------------
 # LOAD RATE TABLES
 # ----------------------
-@st.cache_data(ttl=1800)
-def load_rate_tables():
-    url = "https://docs.google.com/spreadsheets/d/e/2PACX-1vSUIxBeSTWHg5CaTSAPDPo-cBOA_ah9M7sJ-GOpBemYl6VlJyQma9eWPVpLg2uiXk_0LPlHiimfZulz/pub?output=xlsx"
-
-    # Get all sheet names first
-    xls = pd.ExcelFile(url)
-    all_sheets = xls.sheet_names
-    
-    # Filter sheets for Air and Sea freight
-    air_sheets = [s for s in all_sheets if "Air Freight" in s]
-    sea_sheets = [s for s in all_sheets if "Sea Freight" in s]
-    
-    # Extract destinations from sheet names
-    air_destinations = sorted([s.replace("Air Freight - ", "") for s in air_sheets])
-    sea_destinations = sorted([s.replace("Sea Freight - ", "") for s in sea_sheets])
-    all_destinations = sorted(set(air_destinations + sea_destinations))
-    
-    # Create destination-specific country-origin mappings
-    destination_countries = {}
-    
-    # Track the latest date across all sheets
-    latest_date = None
-    all_dates = []
-    
-    # Load Air Freight sheets
-    air_rates = {}
-    for sheet in air_sheets:
-        destination = sheet.replace("Air Freight - ", "")
-        df = pd.read_excel(url, sheet_name=sheet)
-        
-        # Get the last column name (which should be a date)
-        latest_col = df.columns[-1]
-        
-        # Try to parse the date
+def build_rate_refresher():
+    # Imported here, not at the top: pandas and the loaders take about a
+    # second to import, which the login page shouldn't wait on
+    from freight_calc.loader import load_rate_tables
+    from freight_calc.refresh import RateRefresher
+    from freight_calc.shared import SharedRateReader
+    from freight_calc.snapshots import SnapshotStore
+
+    # With several server processes, one `python -m freight_calc publish` job
+    # keeps a shared file up to date and every process maps that file
+    if os.environ.get("FREIGHT_SHARED_RATES"):
+        return SharedRateReader(os.environ["FREIGHT_SHARED_RATES"])
+    # One refresher per server process: it reloads every 30 minutes in the
+    # background while all sessions keep using the current snapshot. Each
+    # load is saved to disk so restarts and source outages have rates to serve.
+    # Sheets parse on threads here: process workers would re-run this script
+    return RateRefresher(interval=1800, loader=partial(load_rate_tables, pool="thread"),
+                         store=SnapshotStore()).start()
+
+
+@st.cache_resource
+def prefetch_rates():
+    """Build the rate refresher and load the first snapshot in a background thread.
+
+    Called on every page, login included, so the first page a server
+    process renders starts the load; the login page itself never reads
+    the rates. Returns a Future of the refresher.
+    """
+    future = Future()
+
+    def prefetch():
         try:
-            # Try to convert to datetime
-            if isinstance(latest_col, str):
-                # Try different date formats
-                for date_format in ['%m/%d/%Y', '%d/%m/%Y', '%Y-%m-%d', '%m/%d/%y']:
-                    try:
-                        col_date = pd.to_datetime(latest_col, format=date_format)
-                        break
-                    except:
-                        continue
-                else:
-                    # If no format matches, try pandas default parser
-                    col_date = pd.to_datetime(latest_col)
-            else:
-                col_date = pd.to_datetime(latest_col)
-            
-            all_dates.append(col_date)
-            
-            # Update latest_date
-            if latest_date is None or col_date > latest_date:
-                latest_date = col_date
-        except:
-            # If date parsing fails, use current date as fallback
-            col_date = pd.Timestamp.now()
-            all_dates.append(col_date)
-        
-        # Store countries and origins for this destination
-        if destination not in destination_countries:
-            destination_countries[destination] = {"countries": set(), "origins_by_country": {}}
-        
-        for _, row in df.iterrows():
-            c = row["Country"]
-            o = row["Origin"]
-            r = row[latest_col]
-            
-            # Add to destination_countries
-            destination_countries[destination]["countries"].add(c)
-            if c not in destination_countries[destination]["origins_by_country"]:
-                destination_countries[destination]["origins_by_country"][c] = set()
-            destination_countries[destination]["origins_by_country"][c].add(o)
-            
-            # Store rates
-            if c not in air_rates:
-                air_rates[c] = {}
-            if o not in air_rates[c]:
-                air_rates[c][o] = {}
-            air_rates[c][o][destination] = r
-    
-    # Load Sea Freight sheets
-    sea_rates = {}
-    for sheet in sea_sheets:
-        destination = sheet.replace("Sea Freight - ", "")
-        df = pd.read_excel(url, sheet_name=sheet)
-        
-        # Get the last column name (which should be a date)
-        latest_col = df.columns[-1]
-        
-        # Try to parse the date
+            refresher = build_rate_refresher()
+        except Exception as e:
+            future.set_exception(e)
+            return
+        future.set_result(refresher)
         try:
-            # Try to convert to datetime
-            if isinstance(latest_col, str):
-                # Try different date formats
-                for date_format in ['%m/%d/%Y', '%d/%m/%Y', '%Y-%m-%d', '%m/%d/%y']:
-                    try:
-                        col_date = pd.to_datetime(latest_col, format=date_format)
-                        break
-                    except:
-                        continue
-                else:
-                    # If no format matches, try pandas default parser
-                    col_date = pd.to_datetime(latest_col)
-            else:
-                col_date = pd.to_datetime(latest_col)
-            
-            all_dates.append(col_date)
-            
-            # Update latest_date
-            if latest_date is None or col_date > latest_date:
-                latest_date = col_date
-        except:
-            # If date parsing fails, use current date as fallback
-            col_date = pd.Timestamp.now()
-            all_dates.append(col_date)
-        
-        # Store countries and origins for this destination
-        if destination not in destination_countries:
-            destination_countries[destination] = {"countries": set(), "origins_by_country": {}}
-        
-        for _, row in df.iterrows():
-            c = row["Country"]
-            o = row["Origin"]
-            r = row[latest_col]
-            
-            # Add to destination_countries
-            destination_countries[destination]["countries"].add(c)
-            if c not in destination_countries[destination]["origins_by_country"]:
-                destination_countries[destination]["origins_by_country"][c] = set()
-            destination_countries[destination]["origins_by_country"][c].add(o)
-            
-            # Store rates
-            if c not in sea_rates:
-                sea_rates[c] = {}
-            if o not in sea_rates[c]:
-                sea_rates[c][o] = {}
-            sea_rates[c][o][destination] = r
-    
-    # Load Markup sheet
-    markups = {}
-    rm_types = []
-    
-    try:
-        markup_df = pd.read_excel(url, sheet_name="Markup")
-        
-        # Get RM Types from first column
-        rm_types = markup_df.iloc[:, 0].tolist()
-        
-        # Get destination columns (all columns except first)
-        dest_columns = markup_df.columns[1:]
-        
-        # Build markup dictionary
-        for _, row in markup_df.iterrows():
-            rm_type = row.iloc[0]
-            markups[rm_type] = {}
-            for dest in dest_columns:
-                markups[rm_type][dest] = row[dest]
-    except Exception as e:
-        st.error(f"Error loading markups: {e}")
-        # Fallback markups
-        markups = {
-            "Fabric": {"SL": 1.15, "Bangladesh": 1.20},
-            "Elastic": {"SL": 1.15, "Bangladesh": 1.20},
-            "Lace": {"SL": 1.15, "Bangladesh": 1.20}
-        }
-        rm_types = ["Fabric", "Elastic", "Lace"]
-    
-    # Determine if rates are current
-    current_date = pd.Timestamp.now()
-    is_current_month = False
-    rate_month_year = ""
-    
-    if latest_date:
-        # Check if the latest date is in the current month and year
-        is_current_month = (latest_date.month == current_date.month and 
-                           latest_date.year == current_date.year)
-        rate_month_year = latest_date.strftime('%B %Y')
-    
-    return air_rates, sea_rates, all_destinations, destination_countries, is_current_month, rate_month_year, markups, rm_types
+            refresher.get()
+        except Exception:
+            # Nothing to serve yet; the calculator retries and shows the error
+            pass
+
+    threading.Thread(target=prefetch, daemon=True, name="rate-prefetch").start()
+    return future
+
 
-# Update the function call
-air_rates, sea_rates, all_destinations, destination_countries, is_current_month, rate_month_year, markups, rm_types = load_rate_tables()
+@st.cache_resource
+def get_quote_log():
+    from freight_calc.quotelog import QuoteLog
+
+    # Every priced item is logged for audit; one writer thread per process
+    return QuoteLog()
+
+
+@st.cache_resource
+def get_price_memo():
+    from freight_calc.memo import PriceMemo
+
+    # Priced items shared by every session, keyed by the rates' content hash
+    return PriceMemo()
+
+
+rate_prefetch = prefetch_rates()
 # ----------------------
 # LOGIN PAGE
 # ----------------------
@@ -263,7 +148,7 @@ if not st.session_state.logged_in:
                 # Auto-register new business users (optional - remove if you want manual registration)
                 st.session_state.business_users[username] = {
                     "password": password,
-                    "created_at": pd.Timestamp.now()
+                    "created_at": datetime.now()
                 }
                 st.session_state.logged_in = True
                 st.session_state.role = "Business"
@@ -385,6 +270,47 @@ else:
     role = st.session_state.role
     st.title(f"📦 Freight Rate Calculator ({role})")
     
+    import numpy as np
+    import pandas as pd
+
+    from freight_calc.changes import summarize_changes
+    from freight_calc.bulk import BULK_FIELDS, price_bulk, read_items, to_csv_bytes
+    from freight_calc.export import EXPORT_FORMATS, export_quote
+    from freight_calc.grid import DEFAULT_PAGE_SIZE, apply_grid_edits, blank_item, fix_choices, grid_frame, page_bounds, page_count
+    from freight_calc.memo import item_key
+    from freight_calc.pricing import KG_PER_CBM, UNITS, WEIGHT_TYPES
+    from freight_calc.quotelog import DEFAULT_SEARCH_PAGE_SIZE, quote_records
+    from freight_calc.ranking import DEFAULT_TOP_K, rank_lanes
+    from freight_calc.sensitivity import DEFAULT_GRID_POINTS, MAX_GRID_POINTS, grid_axis, heatmap_table, sensitivity_grid
+    from freight_calc.render import DEFAULT_EMAIL_PAGE_SIZE, calculation_lines, email_table, email_table_html, summary_frame
+    from freight_calc.validation import summarize_issues
+
+    # Usually loaded by the time anyone has logged in; wait only if it isn't
+    if not rate_prefetch.done() or rate_prefetch.result().snapshot is None:
+        with st.spinner("Loading the latest freight rates..."):
+            rate_refresher = rate_prefetch.result()
+            rate_snapshot = rate_refresher.get()
+    else:
+        rate_refresher = rate_prefetch.result()
+        rate_snapshot = rate_refresher.get()
+    price_memo = get_price_memo()
+    quote_log = get_quote_log()
+    rate_tables = rate_snapshot.tables
+    rate_index = rate_tables.rate_index
+    all_destinations = rate_tables.all_destinations
+    is_current_month = rate_tables.is_current_month
+    rate_month_year = rate_tables.rate_month_year
+    rm_types = rate_tables.rm_types
+    markup_error = rate_tables.markup_error
+    
+    # Saved snapshot in use: say how old the rates are
+    if rate_snapshot.from_disk:
+        saved_on = pd.Timestamp(rate_snapshot.loaded_at, unit="s").strftime("%d %b %Y %H:%M")
+        if rate_refresher.last_error:
+            st.warning(f"📅 **Rates as of {rate_month_year}** (saved {saved_on} UTC). The live rate sheet can't be reached right now, so the last saved rates are being used.")
+        else:
+            st.info(f"📅 **Rates as of {rate_month_year}** (saved {saved_on} UTC). Loading the latest rates in the background...")
+    
     # Add admin link right after title with rate status warning
     if role == "Admin":
         # Rate status warning
@@ -411,8 +337,92 @@ else:
             <small>Changes made to the spreadsheet will automatically reflect in the calculator within 30 minutes.</small>
         </div>
         """, unsafe_allow_html=True)
-    
-
+        
+        # Rate snapshot status and manual refresh
+        if markup_error:
+            st.error(f"Error loading markups, using fallback markups: {markup_error}")
+        if rate_refresher.last_error:
+            st.warning(f"Last rate refresh failed, still using the previous rates: {rate_refresher.last_error}")
+        col_status, col_refresh = st.columns([4, 1])
+        with col_status:
+            snapshot_age = rate_refresher.age(rate_snapshot)
+            st.caption(
+                f"Rate snapshot v{rate_snapshot.version} ({rate_snapshot.rates_id}) "
+                + (f"restored from disk, saved {snapshot_age / 60:.0f} min ago" if rate_snapshot.from_disk
+                   else f"loaded {snapshot_age / 60:.0f} min ago in {rate_snapshot.load_seconds:.1f}s")
+                + (f" · re-read {rate_tables.sheets_parsed[0]} of {rate_tables.sheets_parsed[1]} sheets"
+                   if rate_tables.sheets_parsed else "")
+                + (" · refreshing in the background..." if rate_refresher.is_loading() else "")
+            )
+            memo_hits, memo_misses, memo_size = price_memo.stats()
+            st.caption(f"Pricing cache: {memo_hits:,} hits, {memo_misses:,} misses, {memo_size:,} items cached")
+        with col_refresh:
+            if st.button("🔄 Refresh rates now"):
+                with st.spinner("Reloading rate tables..."):
+                    rate_refresher.refresh(wait=True)
+                st.rerun()
+        
+        # What the recent refreshes changed
+        change_entries = rate_refresher.change_log.entries()
+        with st.expander(f"🧾 Rate Changes ({len(change_entries)} recent update{'s' if len(change_entries) != 1 else ''})"):
+            if not change_entries:
+                st.caption("No rate or markup changes since this server started.")
+            for entry in change_entries:
+                loaded_on = pd.Timestamp(entry.loaded_at, unit="s").strftime("%d %b %Y %H:%M")
+                st.markdown(f"**v{entry.version}** · {loaded_on} UTC · {summarize_changes(entry.changes)}")
+                st.dataframe(entry.changes, hide_index=True)
+        
+        # Problems found in the rate sheets when they were loaded
+        rate_issues = rate_tables.issues
+        if rate_issues is not None:
+            with st.expander(f"🩺 Rate Sheet Checks ({summarize_issues(rate_issues)})", expanded=bool((rate_issues["severity"] == "error").any())):
+                if rate_issues.empty:
+                    st.caption("No problems found in the rate sheets.")
+                else:
+                    st.caption("Fix these in the master rate spreadsheet; they are re-checked on every refresh.")
+                    st.dataframe(rate_issues, hide_index=True)
+        
+        # Search what has been quoted to whom, a page at a time
+        @st.fragment(key="quote_log")
+        def quote_log_search():
+            with st.expander("🗂️ Quote Log"):
+                col_user, col_sqn, col_supplier, col_from, col_to = st.columns(5)
+                with col_user:
+                    user = st.text_input("User email", key="quote_log_user").strip()
+                with col_sqn:
+                    sqn = st.text_input("SQN starts with", key="quote_log_sqn").strip()
+                with col_supplier:
+                    supplier = st.text_input("Supplier starts with", key="quote_log_supplier").strip()
+                with col_from:
+                    date_from = st.date_input("From (UTC)", value=None, key="quote_log_from")
+                with col_to:
+                    date_to = st.date_input("To (UTC)", value=None, key="quote_log_to")
+                filters = dict(user=user, sqn=sqn, supplier=supplier, date_from=date_from, date_to=date_to)
+                
+                # Each page starts below the smallest id of the page before it;
+                # new filters start again from the newest quotes
+                if st.session_state.get("quote_log_filters") != filters:
+                    st.session_state.quote_log_filters = filters
+                    st.session_state.quote_log_pages = [None]
+                pages = st.session_state.quote_log_pages
+                quotes = quote_log.search(**filters, before_id=pages[-1])
+                
+                matches = quote_log.count(**filters)
+                st.caption(f"{matches:,} logged quote{'s' if matches != 1 else ''} match; page {len(pages)} "
+                           f"({DEFAULT_SEARCH_PAGE_SIZE} per page, newest first). Quotes are written in the background "
+                           "and show up here a moment after they are priced."
+                           + (f" {quote_log.dropped:,} could not be written; last error: {quote_log.last_error}"
+                              if quote_log.dropped else ""))
+                st.dataframe(quotes, hide_index=True)
+                
+                col_newer, col_older, _ = st.columns([1, 1, 4])
+                with col_newer:
+                    st.button("◀ Newer", disabled=len(pages) == 1, key="quote_log_newer", on_click=pages.pop)
+                with col_older:
+                    st.button("Older ▶", disabled=len(quotes) < DEFAULT_SEARCH_PAGE_SIZE, key="quote_log_older",
+                              on_click=pages.append, args=(int(quotes["id"].min()) if len(quotes) else None,))
+        
+        quote_log_search()
     
     # Display user info in header
     col1, col2, col3 = st.columns([3, 1, 1])
@@ -429,71 +439,298 @@ else:
 
 
     # ----------------------
-    # CONSTANTS
+    # PRICE AS OF
     # ----------------------
-  
-    KG_PER_CBM = 166
+    # Price against any earlier rate sheet column instead of the current rates
+    price_as_of = None
+    if rate_index.history is not None and len(rate_index.history.dates):
+        price_as_of = st.selectbox(
+            "📅 Price as of",
+            [None] + rate_index.history.months()[::-1],
+            format_func=lambda d: "Current rates" if d is None else d.strftime("%d %b %Y"),
+            key="price_as_of",
+        )
+        if price_as_of is not None:
+            st.info(f"Pricing with the rates in effect on {price_as_of:%d %b %Y}, not the current rates.")
 
 
+    # ----------------------
+    # BULK UPLOAD
+    # ----------------------
+    with st.expander("📤 Bulk Upload (CSV/XLSX)", expanded=False):
+        st.caption(
+            "Upload a file with the columns: " + ", ".join(BULK_FIELDS) + ". "
+            f"Weight type must be one of {', '.join(WEIGHT_TYPES)}; unit one of {', '.join(UNITS)}. "
+            "Rows that can't be priced are kept with a message in the Error column."
+        )
+        bulk_file = st.file_uploader("Items file", type=["csv", "xlsx"], key="bulk_file")
+        
+        if bulk_file is None:
+            st.session_state.pop("bulk_priced", None)
+        else:
+            # Priced once per upload, rates, role and as-of date; other reruns of
+            # the page reuse the session's priced frame instead of re-pricing
+            bulk_key = (bulk_file.file_id, rate_snapshot.rates_id, role, price_as_of)
+            bulk_priced = None
+            if st.session_state.get("bulk_priced", (None,))[0] == bulk_key:
+                bulk_priced = st.session_state.bulk_priced[1]
+            else:
+                st.session_state.pop("bulk_priced", None)
+                try:
+                    bulk_items = read_items(bulk_file.getvalue(), bulk_file.name)
+                except ValueError as e:
+                    st.error(f"Could not read {bulk_file.name}: {e}")
+                else:
+                    bulk_progress = st.progress(0.0, text=f"Pricing {len(bulk_items):,} items...")
+                    bulk_priced = price_bulk(
+                        bulk_items, rate_index, role,
+                        progress=lambda done, total: bulk_progress.progress(done / total, text=f"Priced {done:,} of {total:,} items"),
+                        as_of=price_as_of,
+                    )
+                    bulk_progress.empty()
+                    st.session_state.bulk_priced = (bulk_key, bulk_priced)
+
+            if bulk_priced is not None:
+                bulk_errors = int((bulk_priced["Error"] != "").sum())
+                
+                if bulk_errors:
+                    st.warning(f"Priced {len(bulk_priced) - bulk_errors:,} of {len(bulk_priced):,} items; {bulk_errors:,} rows have errors.")
+                else:
+                    st.success(f"Priced all {len(bulk_priced):,} items.")
+                
+                # Preview only the first rows; the full result is in the download
+                st.dataframe(bulk_priced.head(100))
+                # The CSV is written only when the button is clicked
+                st.download_button(
+                    "⬇️ Download priced file (CSV)",
+                    lambda priced=bulk_priced: to_csv_bytes(priced),
+                    file_name=f"priced_{bulk_file.name.rsplit('.', 1)[0]}.csv",
+                    mime="text/csv",
+                    on_click="ignore",
+                )
+
+
+    # ----------------------
+    # ITEM FRAGMENTS
+    # ----------------------
+    # The items and results below are fragments that rerun on their own: the
+    # main item's editor, the additional-items grid, each item's result panel,
+    # the summary table and the email preview. Editing an item reruns only its
+    # editor, its panel and the two summaries; adding or removing an item
+    # reruns the whole page. Items are kept in session state so a fragment
+    # rerun can read all of them.
+    def item_changed(item_number):
+        fragments = [f"item_editor_{item_number}", f"item_result_{item_number}", "summary", "email_preview"]
+        # The lane ranking and what-if grid are for the main item only
+        st.rerun(fragments + (["lane_ranking", "sensitivity"] if item_number == 0 else []))
+
+    def current_items():
+        return [st.session_state.main_item] + st.session_state.additional_rows
+
+    def current_rates():
+        # A fragment rerun doesn't rerun the top of the page, so fragments ask
+        # for the snapshot here: a background refresh may have swapped in new
+        # rates since the last full run
+        return rate_refresher.get()
+
+    def log_quotes(items, priced_rows, snapshot):
+        # Queue the items whose inputs or rates changed since they were last
+        # logged; items without a weight and width aren't quotes yet
+        logged = st.session_state.setdefault("logged_quotes", {})
+        changed = []
+        for item, p in zip(items, priced_rows):
+            if not item["weight_value"] or not item["width"]:
+                continue
+            stamp = (st.session_state.user_email, item_key(item), item["supplier"], item["sqn"], snapshot.rates_id, price_as_of)
+            if logged.get(item.get("key", "main")) != stamp:
+                logged[item.get("key", "main")] = stamp
+                changed.append((item, p))
+        if changed:
+            quote_log.log(quote_records(
+                [item for item, _ in changed], [p for _, p in changed],
+                st.session_state.display_name, st.session_state.user_email, role,
+                snapshot.rates_id, snapshot.tables.rate_date, price_as_of,
+            ))
+
+    def summary_data():
+        items = current_items()
+        snapshot = current_rates()
+        # Reuse the price of every unchanged item; only new or edited items are priced
+        priced_rows = price_memo.price(items, snapshot.tables.rate_index, snapshot.rates_id, price_as_of)
+        log_quotes(items, priced_rows, snapshot)
+        return summary_frame(items, priced_rows, role, st.session_state.display_name, st.session_state.user_email)
+
 
     # ----------------------
     # INPUTS (MAIN ITEM)
     # ----------------------
-    col_item, col_dest, col_region, col_weight, col_width = st.columns([2, 2, 2, 2, 2])
+    @st.fragment(key="item_editor_0")
+    def main_item_editor():
+        rate_tables = current_rates().tables
+        col_item, col_dest, col_region, col_weight, col_width = st.columns([2, 2, 2, 2, 2])
+
+        with col_item:
+            st.subheader("📦 Item")
+            supplier = st.text_input("Supplier", key="main_supplier", on_change=item_changed, args=(0,))
+            sqn = st.text_input("SQN", key="main_sqn", on_change=item_changed, args=(0,))
+            rm_type = st.selectbox("Select RM Type", rate_tables.rm_types, key="main_rm_type", on_change=item_changed, args=(0,))
+
+
+        with col_dest:
+            st.subheader("🎯 Destination")
+            destination = st.selectbox("Select Destination", rate_tables.all_destinations, key="main_destination", on_change=item_changed, args=(0,))
+
+        with col_region:
+            st.subheader("🗺️ Origin")
+        
+            # Get available countries for selected destination
+            available_countries = rate_tables.rate_index.countries_for(destination)
+        
+            country = st.selectbox("Country", available_countries, key="main_country", on_change=item_changed, args=(0,))
+        
+            # Get available origins for selected country and destination
+            available_origins = rate_tables.rate_index.origins_for(destination, country)
+        
+            origin = st.selectbox("Origin", available_origins, key="main_origin", on_change=item_changed, args=(0,))
+
+        with col_weight:
+            st.subheader("🧵 Weight")
+            weight_value = st.number_input("Weight Value", min_value=0.0, step=0.1, key="main_weight", on_change=item_changed, args=(0,))
+            weight_type = st.selectbox("Weight Type", WEIGHT_TYPES, key="main_weight_type", on_change=item_changed, args=(0,))
+
+        with col_width:
+            st.subheader("📏 Width")
+            width = st.number_input("Width", min_value=0.0, step=0.1, key="main_width", on_change=item_changed, args=(0,))
+            unit = st.selectbox("Unit", UNITS, key="main_unit", on_change=item_changed, args=(0,))
+
+
+        # Store main item for the summaries and result panels
+        st.session_state.main_item = {
+            "supplier": supplier,
+            "sqn": sqn,
+            "rm_type": rm_type,
+            "country": country,
+            "origin": origin,
+            "destination": destination,  # Add destination
+            "weight_value": weight_value,
+            "weight_type": weight_type,
+            "width": width,
+            "unit": unit
+        }
 
-    with col_item:
-        st.subheader("📦 Item")
-        supplier = st.text_input("Supplier", key="main_supplier")
-        sqn = st.text_input("SQN", key="main_sqn")
-        rm_type = st.selectbox("Select RM Type", rm_types, key="main_rm_type")
+    main_item_editor()
 
 
-    with col_dest:
-        st.subheader("🎯 Destination")
-        destination = st.selectbox("Select Destination", all_destinations, key="main_destination")
+    # ----------------------
+    # CHEAPEST LANES (MAIN ITEM)
+    # ----------------------
+    @st.fragment(key="lane_ranking")
+    def lane_ranking():
+        rate_index = current_rates().tables.rate_index
+        item = st.session_state.main_item
+        with st.expander(f"🏁 Cheapest Origins & Modes to {item['destination']}", expanded=False):
+            st.caption("Item 1's RM type, weight and width priced from every country/origin with rates to its destination, by air and by sea.")
+            top_k = st.number_input("Show the cheapest", min_value=1, max_value=100, value=DEFAULT_TOP_K, step=1, key="rank_top_k")
+            if not item["weight_value"] or not item["width"]:
+                st.info("Enter Item 1's weight and width to rank the lanes.")
+                return
+            ranked = rank_lanes(rate_index, item, item["destination"], int(top_k), as_of=price_as_of)
+            if ranked.empty:
+                st.warning(f"No country/origin has rates to {item['destination']}.")
+                return
+            ranked["mode"] = ranked["mode"].map({"air": "✈️ Air", "sea": "🚢 Sea"})
+            if role == "Admin":
+                # Air rates are per kg, sea rates per CBM
+                ranked["rate"] = [f"${rate:.2f}/{'CBM' if mode.endswith('Sea') else 'kg'}" for rate, mode in zip(ranked["rate"], ranked["mode"])]
+            else:
+                ranked = ranked.drop(columns=["rate", "markup"])
+            st.dataframe(
+                ranked,
+                hide_index=True,
+                column_config={
+                    "rank": st.column_config.NumberColumn("Rank"),
+                    "mode": st.column_config.TextColumn("Mode"),
+                    "country": st.column_config.TextColumn("Country"),
+                    "origin": st.column_config.TextColumn("Origin"),
+                    "rate": st.column_config.TextColumn("Base Rate"),
+                    "markup": st.column_config.NumberColumn("Markup"),
+                    "final_rate": st.column_config.NumberColumn("Final Rate ($/m)", format="$%.4f"),
+                    "air_available": st.column_config.CheckboxColumn("Air Available"),
+                    "sea_available": st.column_config.CheckboxColumn("Sea Available"),
+                },
+            )
+
+    lane_ranking()
+
+
+    # ----------------------
+    # WHAT-IF: WEIGHT x WIDTH (MAIN ITEM)
+    # ----------------------
+    @st.fragment(key="sensitivity")
+    def sensitivity():
+        rate_tables = current_rates().tables
+        rate_index = rate_tables.rate_index
+        item = st.session_state.main_item
+        with st.expander("🎯 What-if: Weight × Width", expanded=False):
+            # The lane and RM type start at Item 1's, and follow it when it changes
+            lane = f"{item['rm_type']}_{item['destination']}_{item['country']}_{item['origin']}"
+
+            def pick(label, options, current, key):
+                options = list(options)
+                index = options.index(current) if current in options else 0
+                return st.selectbox(label, options, index=index, key=f"what_if_{key}_{lane}")
+
+            col_rm, col_dest, col_country, col_origin = st.columns(4)
+            with col_rm:
+                rm_type = pick("RM Type", rate_tables.rm_types, item["rm_type"], "rm_type")
+            with col_dest:
+                destination = pick("Destination", rate_tables.all_destinations, item["destination"], "destination")
+            with col_country:
+                country = pick("Country", rate_index.countries_for(destination), item["country"], f"country_{destination}")
+            with col_origin:
+                origin = pick("Origin", rate_index.origins_for(destination, country), item["origin"], f"origin_{destination}_{country}")
+            lane_item = dict(item, rm_type=rm_type, destination=destination, country=country, origin=origin)
+
+            st.caption(
+                f"Final rate per meter of {rm_type} from {country} - {origin} to {destination} over a range of "
+                f"weights ({item['weight_type']}, rows) and widths ({item['unit']}, columns). Green cells meet "
+                "the target, red cells don't; the outlined cells are the edge of what meets it."
+            )
+            weight = item["weight_value"] or 100.0
+            width = item["width"] or 100.0
+            # Ranges start around Item 1's weight and width, and move when those change
+            around = f"{weight:g}_{width:g}"
+            col_weight, col_width, col_grid = st.columns(3)
+            with col_weight:
+                weight_from = st.number_input("Weight from", min_value=0.0, value=round(weight * 0.5, 1), step=0.1, key=f"what_if_weight_from_{around}")
+                weight_to = st.number_input("Weight to", min_value=0.0, value=round(weight * 1.5, 1), step=0.1, key=f"what_if_weight_to_{around}")
+            with col_width:
+                width_from = st.number_input("Width from", min_value=0.0, value=round(width * 0.5, 1), step=0.1, key=f"what_if_width_from_{around}")
+                width_to = st.number_input("Width to", min_value=0.0, value=round(width * 1.5, 1), step=0.1, key=f"what_if_width_to_{around}")
+            with col_grid:
+                mode = st.radio("Mode", ["air", "sea"], format_func={"air": "✈️ Air", "sea": "🚢 Sea"}.get, horizontal=True, key="what_if_mode")
+                points = st.number_input("Points per axis", min_value=2, max_value=MAX_GRID_POINTS, value=DEFAULT_GRID_POINTS, step=1, key="what_if_points",
+                                         help="Large grids are computed just as fast but take longer to draw")
+
+            if weight_from >= weight_to or width_from >= width_to:
+                st.info("Each range's \"from\" must be below its \"to\".")
+                return
+            weights = grid_axis(weight_from, weight_to, points)
+            widths = grid_axis(width_from, width_to, points)
+            costs = sensitivity_grid(rate_index, lane_item, weights, widths, as_of=price_as_of)[mode]
+            if np.isnan(costs).all():
+                st.warning(f"{'Air' if mode == 'air' else 'Sea'} freight not available for this route")
+                return
+            # Defaults to the grid's median rate, so about half the cells meet it;
+            # reset when the lane or the ranges' starting point change
+            target = st.number_input("Target final rate ($/m)", min_value=0.0, value=round(float(np.nanmedian(costs)), 4), step=0.0001, format="%.4f", key=f"what_if_target_{mode}_{around}_{rm_type}_{destination}_{country}_{origin}")
+            if target <= 0:
+                st.info("Enter a target rate above $0 to shade the grid.")
+                return
+            st.dataframe(heatmap_table(costs, weights, widths, target))
+
+    sensitivity()
 
-    with col_region:
-        st.subheader("🗺️ Origin")
-        
-        # Get available countries for selected destination
-        if destination in destination_countries:
-            available_countries = sorted(destination_countries[destination]["countries"])
-        else:
-            available_countries = []
-        
-        country = st.selectbox("Country", available_countries, key="main_country")
-        
-        # Get available origins for selected country and destination
-        if destination in destination_countries and country in destination_countries[destination]["origins_by_country"]:
-            available_origins = sorted(destination_countries[destination]["origins_by_country"][country])
-        else:
-            available_origins = []
-        
-        origin = st.selectbox("Origin", available_origins, key="main_origin")
-
-    with col_weight:
-        st.subheader("🧵 Weight")
-        weight_value = st.number_input("Weight Value", min_value=0.0, step=0.1, key="main_weight")
-        weight_type = st.selectbox("Weight Type", ["GSM (g/m²)", "GSM (kg/m²)", "GLM (g/m)"], key="main_weight_type")
-
-    with col_width:
-        st.subheader("📏 Width")
-        width = st.number_input("Width", min_value=0.0, step=0.1, key="main_width")
-        unit = st.selectbox("Unit", ["CM", "IN", "M"], key="main_unit")
-
-    # Store main item in results list
-    results = [{
-        "supplier": supplier,
-        "sqn": sqn,
-        "rm_type": rm_type,
-        "country": country,
-        "origin": origin,
-        "destination": destination,  # Add destination
-        "weight_value": weight_value,
-        "weight_type": weight_type,
-        "width": width,
-        "unit": unit
-    }]
 
 
     # ----------------------
@@ -501,289 +738,145 @@ else:
     # ----------------------
     st.divider()
 
-    # Initialize additional rows in session state
+    # Initialize additional rows in session state; a row's "key" never changes
     if "additional_rows" not in st.session_state:
         st.session_state.additional_rows = []
+    if "next_item_key" not in st.session_state:
+        st.session_state.next_item_key = max((row["key"] for row in st.session_state.additional_rows), default=-1) + 1
+        st.session_state.grid_version = 0
+
+    def new_item():
+        rate_tables = current_rates().tables
+        row = blank_item(st.session_state.next_item_key, rate_tables.rm_types, rate_tables.all_destinations)
+        st.session_state.next_item_key += 1
+        return row
 
-    # Add button for more items
     # Add button for more items
     if st.button("➕ Add Another Item"):
-        st.session_state.additional_rows.append({
-            "supplier": "",
-            "sqn": "",
-            "rm_type": rm_types[0] if rm_types else "",  # Add RM Type with default
-            "country": "",
-            "origin": "",
-            "destination": all_destinations[0] if all_destinations else "",
-            "weight_value": 0.0,
-            "weight_type": "GSM (g/m²)",
-            "width": 0.0,
-            "unit": "CM",
-            "key": len(st.session_state.additional_rows)
-        })
-
-    # In the display section, update columns to include RM Type
-    for idx, row in enumerate(st.session_state.additional_rows):
-        with st.expander(f"Additional Item {idx + 1}", expanded=True):
-            cols = st.columns([1.5, 1.5, 2, 2, 2, 2, 1])  # Added one more column for RM Type
-            
-            with cols[0]:
-                st.subheader("📦 Item Info")
-                row["supplier"] = st.text_input("Supplier", value=row["supplier"], key=f"add_supplier_{idx}")
-                row["sqn"] = st.text_input("SQN", value=row["sqn"], key=f"add_sqn_{idx}")
-            
-            with cols[1]:
-                st.subheader("🏷️ RM Type")
-                rm_key = f"add_rm_type_{idx}"
-                row["rm_type"] = st.selectbox(
-                    "Select RM Type", 
-                    rm_types,
-                    index=rm_types.index(row["rm_type"]) if row["rm_type"] in rm_types else 0,
-                    key=rm_key
-                )
-            
-            with cols[2]:
-                st.subheader("🎯 Destination")
-                dest_key = f"add_destination_{idx}"
-                row["destination"] = st.selectbox(
-                    "Select Destination", 
-                    all_destinations, 
-                    index=all_destinations.index(row["destination"]) if row["destination"] in all_destinations else 0,
-                    key=dest_key
-                )
-            
-            with cols[3]:
-                st.subheader("🗺️ Origin")
-                
-                # Get available countries for selected destination
-                if row["destination"] in destination_countries:
-                    available_countries = sorted(destination_countries[row["destination"]]["countries"])
-                else:
-                    available_countries = []
-                
-                country_key = f"add_country_{idx}"
-                if row["country"] not in available_countries:
-                    row["country"] = available_countries[0] if available_countries else ""
-                
-                row["country"] = st.selectbox(
-                    "Country", 
-                    available_countries,
-                    key=country_key
-                )
-                
-                # Get available origins for selected country and destination
-                if (row["destination"] in destination_countries and 
-                    row["country"] in destination_countries[row["destination"]]["origins_by_country"]):
-                    available_origins = sorted(destination_countries[row["destination"]]["origins_by_country"][row["country"]])
-                else:
-                    available_origins = []
-                
-                origin_key = f"add_origin_{idx}"
-                if row["origin"] not in available_origins:
-                    row["origin"] = available_origins[0] if available_origins else ""
-                
-                row["origin"] = st.selectbox(
-                    "Origin", 
-                    available_origins,
-                    key=origin_key
+        st.session_state.additional_rows.append(fix_choices(new_item(), rate_index, rm_types, all_destinations))
+        st.session_state.grid_version += 1
+
+    # Long lists are edited one page at a time
+    grid_pages = page_count(len(st.session_state.additional_rows))
+    if st.session_state.get("grid_page", 1) > grid_pages:
+        st.session_state.grid_page = grid_pages
+    if grid_pages > 1:
+        st.number_input(f"Page (of {grid_pages}, {DEFAULT_PAGE_SIZE} items each)", min_value=1, max_value=grid_pages, step=1, key="grid_page")
+    grid_start, grid_stop = page_bounds(len(st.session_state.additional_rows), st.session_state.get("grid_page", 1))
+
+    def grid_changed(editor_key, page_ids):
+        rate_tables = current_rates().tables
+        rows = st.session_state.additional_rows
+        changed, structural = apply_grid_edits(rows, page_ids, st.session_state[editor_key], new_item)
+        for row in changed:
+            fix_choices(row, rate_tables.rate_index, rate_tables.rm_types, rate_tables.all_destinations)
+        # A new editor key shows the rows as stored, with any reset country/origin
+        st.session_state.grid_version += 1
+        if structural:
+            st.rerun()
+        # Cell edits only: redraw the grid, the edited items' results and the summaries
+        positions = {row["key"]: i for i, row in enumerate(rows)}
+        st.rerun(["item_grid"] + [f"item_result_{positions[row['key']] + 1}" for row in changed] + ["summary", "email_preview"])
+
+    @st.fragment(key="item_grid")
+    def item_grid():
+        rate_tables = current_rates().tables
+        rows = st.session_state.additional_rows[grid_start:grid_stop]
+        if not st.session_state.additional_rows:
+            st.caption("Add items with the button above, or paste rows copied from Excel into the grid.")
+        editor_key = f"items_grid_{st.session_state.grid_version}"
+        st.data_editor(
+            grid_frame(rows, first_item=grid_start + 2),
+            hide_index=True,
+            num_rows="dynamic",
+            key=editor_key,
+            on_change=grid_changed,
+            args=(editor_key, [row["key"] for row in rows]),
+            column_config={
+                "item": st.column_config.NumberColumn("Item", disabled=True),
+                "supplier": st.column_config.TextColumn("Supplier"),
+                "sqn": st.column_config.TextColumn("SQN"),
+                "rm_type": st.column_config.SelectboxColumn("RM Type", options=list(rate_tables.rm_types), required=True),
+                "destination": st.column_config.SelectboxColumn("Destination", options=list(rate_tables.all_destinations), required=True),
+                "country": st.column_config.SelectboxColumn(
+                    "Country", options=sorted(rate_tables.rate_index.countries),
+                    help="Must have rates to the row's destination; otherwise the first country that does is used",
+                ),
+                "origin": st.column_config.SelectboxColumn(
+                    "Origin", options=sorted(rate_tables.rate_index.origins),
+                    help="Must be an origin of the row's country; otherwise its first origin is used",
+                ),
+                "weight_value": st.column_config.NumberColumn("Weight Value", min_value=0.0, step=0.1),
+                "weight_type": st.column_config.SelectboxColumn("Weight Type", options=WEIGHT_TYPES, required=True),
+                "width": st.column_config.NumberColumn("Width", min_value=0.0, step=0.1),
+                "unit": st.column_config.SelectboxColumn("Unit", options=UNITS, required=True),
+            },
+        )
+
+    item_grid()
+
+
+    # ----------------------
+    # SUMMARY TABLE
+    # ----------------------
+    @st.fragment(key="summary")
+    def summary_table():
+        rate_index = current_rates().tables.rate_index
+        # Display all results in single summary table
+        df = summary_data()
+        st.subheader("📋 Summary Table & Confirmation")
+        
+        # Display dataframe
+        st.dataframe(df)
+
+        # Exports are written only when a button is clicked, chunk by chunk; the
+        # button runs the export outside the script, so it gets plain values
+        export_items = current_items()
+        export_user = (st.session_state.display_name, st.session_state.user_email)
+        export_name = f"freight_quote_{pd.Timestamp.now():%Y%m%d_%H%M}"
+        col_csv, col_xlsx, col_explain = st.columns([1, 1, 3])
+        with col_explain:
+            explain = st.checkbox("Include the calculation explanations (XLSX, second sheet)", key="export_explanations")
+        for column, fmt, label in [(col_csv, "csv", "⬇️ Download CSV"), (col_xlsx, "xlsx", "⬇️ Download Excel")]:
+            with column:
+                st.download_button(
+                    label,
+                    lambda fmt=fmt: export_quote(export_items, rate_index, role, *export_user, fmt, price_as_of, explain),
+                    file_name=f"{export_name}.{fmt}",
+                    mime=EXPORT_FORMATS[fmt],
+                    on_click="ignore",
+                    key=f"export_{fmt}",
                 )
-            
-            with cols[4]:
-                st.subheader("🧵 Weight")
-                row["weight_value"] = st.number_input("Weight Value", min_value=0.0, step=0.1, value=row["weight_value"], key=f"add_weight_{idx}")
-                row["weight_type"] = st.selectbox("Weight Type", ["GSM (g/m²)", "GSM (kg/m²)", "GLM (g/m)"], key=f"add_weight_type_{idx}")
-            
-            with cols[5]:
-                st.subheader("📏 Width")
-                row["width"] = st.number_input("Width", min_value=0.0, step=0.1, value=row["width"], key=f"add_width_{idx}")
-                row["unit"] = st.selectbox("Unit", ["CM", "IN", "M"], key=f"add_unit_{idx}")
-            
-            with cols[6]:
-                st.subheader(" ")
-                st.write(" ")
-                if st.button("🗑️ Remove", key=f"remove_{idx}"):
-                    st.session_state.additional_rows.pop(idx)
-                    st.rerun()
-            
-            results.append(row)
 
+    summary_table()
 
 
     # ----------------------
-    # CALCULATIONS FOR ALL ITEMS
+    # EMAIL PREVIEW
     # ----------------------
-    all_results_data = []
+    @st.fragment(key="email_preview")
+    def email_preview():
+        table = email_table(summary_data())
 
-    for idx, item in enumerate(results):
-        # CONVERSIONS for each item
-        width_m_item = item["width"] / 100 if item["unit"] == "CM" else (item["width"] * 0.0254 if item["unit"] == "IN" else item["width"])
-        
-        display_gsm_item = None
-        
-        if item["weight_type"] == "GSM (g/m²)":
-            gsm_kg_item = item["weight_value"] / 1000
-            display_gsm_item = item["weight_value"]
-        elif item["weight_type"] == "GSM (kg/m²)":
-            gsm_kg_item = item["weight_value"]
-            display_gsm_item = item["weight_value"] * 1000
-        else:  # GLM (g/m)
-            gsm_g_item = item["weight_value"] / width_m_item if width_m_item > 0 else 0
-            gsm_kg_item = gsm_g_item / 1000
-            display_gsm_item = gsm_g_item
-        
-        kg_per_m_item = gsm_kg_item * width_m_item
-        
-        # Get markups for this RM Type and destination
-        air_markup = None
-        sea_markup = None
-        
-        if item["rm_type"] in markups and item["destination"] in markups[item["rm_type"]]:
-            markup_value = markups[item["rm_type"]][item["destination"]]
-            air_markup = markup_value
-            sea_markup = markup_value  # Using same markup for both, adjust if needed
-        else:
-            # Fallback markups if not found
-            air_markup = 1.15
-            sea_markup = 1.15
-        
-        # RATE AVAILABILITY for each item
-        air_rate_item = None
-        sea_rate_item = None
+        # Also show a clean markdown version for reference
+        st.divider()
+        st.subheader("📧 Email Confirming Preview-Copy Below")
 
-        # Check if country and origin exist in rates
-        if item["country"] in air_rates and item["origin"] in air_rates[item["country"]]:
-            air_rate_item = air_rates[item["country"]][item["origin"]].get(item["destination"])
+        # Long lists are shown a page at a time; the summary table above has every row
+        start, stop = 0, None
+        if len(table) > DEFAULT_EMAIL_PAGE_SIZE:
+            email_pages = page_count(len(table), DEFAULT_EMAIL_PAGE_SIZE)
+            if st.session_state.get("email_page", 1) > email_pages:
+                st.session_state.email_page = email_pages
+            email_page = st.number_input(f"Email table page (of {email_pages}, {DEFAULT_EMAIL_PAGE_SIZE} items each)", min_value=1, max_value=email_pages, step=1, key="email_page")
+            start, stop = page_bounds(len(table), email_page, DEFAULT_EMAIL_PAGE_SIZE)
 
-        if item["country"] in sea_rates and item["origin"] in sea_rates[item["country"]]:
-            sea_rate_item = sea_rates[item["country"]][item["origin"]].get(item["destination"])
+        html_table = email_table_html(table, start, stop)
+        if html_table:
+            st.markdown(html_table, unsafe_allow_html=True)
 
-        air_available_item = air_rate_item is not None
-        sea_available_item = sea_rate_item is not None
+    email_preview()
 
-        # CALCULATIONS for each item with dynamic markups
-        final_air_rate_item = None
-        final_sea_rate_item = None
-        
-        if air_available_item:
-            air_freight_per_m_item = air_rate_item * kg_per_m_item
-            final_air_rate_item = air_freight_per_m_item * air_markup
-        
-        if sea_available_item:
-            cbm_per_m_item = kg_per_m_item / KG_PER_CBM
-            sea_freight_per_m_item = sea_rate_item * cbm_per_m_item
-            final_sea_rate_item = sea_freight_per_m_item * sea_markup
-        
-        # Build result data for this item
-        item_data = {
-            "Item": f"Item {idx + 1}",
-            "User": st.session_state.display_name,
-            "User Email": st.session_state.user_email,
-            "Supplier": item["supplier"],
-            "SQN": item["sqn"],
-            "RM Type": item["rm_type"],  # Add RM Type
-            "Country": item["country"],
-            "Origin": item["origin"],
-            "Destination": item["destination"],
-            "Weight Value": item["weight_value"],
-            "Weight Type": item["weight_type"],
-            "Converted GSM (g/m²)": round(display_gsm_item, 2) if item["weight_type"] == "GLM (g/m)" else None,
-            "Width": item["width"],
-            "Unit": item["unit"],
-            "Width (m)": round(width_m_item, 4),
-            "Weight/m (kg)": round(kg_per_m_item, 6),
-            "Air Markup": air_markup,  # Show markup used
-            "Sea Markup": sea_markup,  # Show markup used
-        }
-        
-        # ---- Admin sees full rate breakdown
-        if role == "Admin":
-            if air_available_item:
-                item_data.update({
-                    "Air Rate ($/kg)": round(air_rate_item, 2),
-                    "Final Air Rate ($)": round(final_air_rate_item, 4),
-                })
-            if sea_available_item:
-                item_data.update({
-                    "Sea Rate ($/CBM)": round(sea_rate_item, 2),
-                    "Final Sea Rate ($)": round(final_sea_rate_item, 4),
-                })
-        # ---- Business sees ONLY final
-        else:
-            if air_available_item:
-                item_data.update({
-                    "Final Air Rate ($)": round(final_air_rate_item, 4),
-                })
-            if sea_available_item:
-                item_data.update({
-                    "Final Sea Rate ($)": round(final_sea_rate_item, 4),
-                })
-        
-        all_results_data.append(item_data)
-
-    # Display all results in single summary table
-    df = pd.DataFrame(all_results_data)
-    st.subheader("📋 Summary Table & Confirmation")
-    
-    # Display dataframe
-    st.dataframe(df)
-    
-   
-    # Also show a clean markdown version for reference
-    st.divider()
-    st.subheader("📧 Email Confirming Preview-Copy Below")
-    
-    # Create markdown table preview
-    # In the email preview section, update table_data
-    table_data = []
-    for idx, row in df.iterrows():
-        # Format weight with type
-        weight_display = f"{row['Weight Value']}"
-        if pd.notna(row['Converted GSM (g/m²)']):
-            weight_display += f" {row['Weight Type']}:-({row['Converted GSM (g/m²)']} g/m²)"
-        else:
-            weight_display += f" {row['Weight Type']}"
-        
-        # Format width
-        width_display = f"{row['Width']} {row['Unit']}:-({row['Width (m)']} m)"
-        
-        # Format weight per meter
-        weight_per_m = f"{row['Weight/m (kg)']} kg/m"
-        air_rate = f"${row['Final Air Rate ($)']:.4f}" if 'Final Air Rate ($)' in row and pd.notna(row['Final Air Rate ($)']) else "N/A"
-        sea_rate = f"${row['Final Sea Rate ($)']:.4f}" if 'Final Sea Rate ($)' in row and pd.notna(row['Final Sea Rate ($)']) else "N/A"
-        
-        table_data.append({
-            "Item": idx + 1,
-            "User": row['User'],
-            "Supplier": row['Supplier'],
-            "SQN": row['SQN'],
-            "RM Type": row['RM Type'],  # Add RM Type
-            "Country": row['Country'],
-            "Origin": row['Origin'],
-            "Destination": row['Destination'],
-            "Weight": weight_display,
-            "Width": width_display,
-            "Weight/m": weight_per_m,
-            "Air Rate": air_rate,
-            "Sea Rate": sea_rate
-        })
-
-    # Update HTML table headers
-    if table_data:
-        html_table = "<table style='width:100%; border-collapse: collapse;'>"
-        html_table += "<tr style='background-color: #f2f2f2;'>"
-        for col in ["Item", "User", "Supplier", "SQN", "RM Type", "Country", "Origin", "Destination", "Weight", "Width", "Weight/m", "Air Rate", "Sea Rate"]:
-            html_table += f"<th style='border: 1px solid #ddd; padding: 8px; text-align: left;'>{col}</th>"
-        html_table += "</tr>"
-        
-        for row in table_data:
-            html_table += "<tr>"
-            for col in ["Item", "User", "Supplier", "SQN", "RM Type", "Country", "Origin", "Destination", "Weight", "Width", "Weight/m", "Air Rate", "Sea Rate"]:
-                html_table += f"<td style='border: 1px solid #ddd; padding: 8px;'>{row[col]}</td>"
-            html_table += "</tr>"
-        html_table += "</table>"
-        
-        st.markdown(html_table, unsafe_allow_html=True)
-    
     # Confirmation note below
     st.info(f"""
     **Confirmation for {st.session_state.display_name} ({st.session_state.user_email}):**  
@@ -795,13 +888,15 @@ else:
 
     These outputs are calculated and confirmed by Logistics for {st.session_state.display_name}.
     """)
-    
+
     # ----------------------
     # DISPLAY RESULTS FOR EACH ITEM
     # ----------------------
-    for idx, item_data in enumerate(all_results_data):
-        # Get the corresponding original item for GLM info
-        item = results[idx]
+    def item_result_panel(idx):
+        snapshot = current_rates()
+        item = current_items()[idx]
+        p = price_memo.price([item], snapshot.tables.rate_index, snapshot.rates_id, price_as_of)[0]
+        item_data = summary_frame([item], [p], role, st.session_state.display_name, st.session_state.user_email, first_item=idx + 1).iloc[0]
         
         # Create expander for each item's freight results
         with st.expander(f"📊 Freight Results - Item {idx + 1}: {item['supplier'] or 'No Supplier'} - {item['sqn'] or 'No SQN'}", expanded=idx==0):
@@ -874,42 +969,11 @@ else:
             # ----------------------
             st.subheader("🧮 How These Charges Were Calculated")
             
-            lines = []
-            
-            # ---- Width
-            lines.append(f"• Width converted to meters = {item_data['Width (m)']:.4f} m.")
-            
-            # ---- GLM case
-            if item['weight_type'] == "GLM (g/m)":
-                lines.append(f"• GLM to GSM conversion: {item['weight_value']} g/m ÷ {item_data['Width (m)']:.4f} m = {item_data['Converted GSM (g/m²)']:.2f} g/m².")
-            
-            # ---- kg per meter
-            lines.append(f"• Fabric weight per running meter = GSM × width = {item_data['Weight/m (kg)']:.6f} kg/m.")
-            
-            # ---- AIR
-            if air_available_item:
-                if role == "Admin":
-                    air_freight_per_m = item_data['Air Rate ($/kg)'] * item_data['Weight/m (kg)']
-                    lines.append(f"• Air freight per meter = {item_data['Air Rate ($/kg)']:.2f} × {item_data['Weight/m (kg)']:.6f} = {air_freight_per_m:.6f} USD.")
-                    # Use dynamic markup
-                    air_markup_value = item_data.get('Air Markup', 1.15)
-                    lines.append(f"• Final Air rate = {air_freight_per_m:.6f} × markup {air_markup_value} = {item_data['Final Air Rate ($)']:.6f} USD.")
-                    lines.append(f"  (Markup based on RM Type: {item['rm_type']} for destination: {item['destination']})")
-                else:
-                    lines.append("• Air freight = (Air base rate × kg per meter) adjusted to final selling rate with RM Type-specific markup.")
-            
-            # ---- SEA
-            if sea_available_item:
-                if role == "Admin":
-                    cbm_per_m = item_data['Weight/m (kg)'] / KG_PER_CBM
-                    sea_freight_per_m = item_data['Sea Rate ($/CBM)'] * cbm_per_m
-                    lines.append(f"• CBM per meter = {item_data['Weight/m (kg)']:.6f} ÷ {KG_PER_CBM} = {cbm_per_m:.8f}.")
-                    lines.append(f"• Sea freight per meter = {item_data['Sea Rate ($/CBM)']:.2f} × {cbm_per_m:.8f} = {sea_freight_per_m:.6f} USD.")
-                    # Use dynamic markup
-                    sea_markup_value = item_data.get('Sea Markup', 1.15)
-                    lines.append(f"• Final Sea rate = {sea_freight_per_m:.6f} × markup {sea_markup_value} = {item_data['Final Sea Rate ($)']:.6f} USD.")
-                    lines.append(f"  (Markup based on RM Type: {item['rm_type']} for destination: {item['destination']})")
-                else:
-                    lines.append("• Sea freight = (CBM per meter × Sea base rate) adjusted to final selling rate with RM Type-specific markup.")
-            
-            st.markdown("\n".join(lines))
+            st.markdown("\n".join(calculation_lines(item_data, role)))
+
+
+    # The main item and the items on the grid page shown above
+    if grid_pages > 1:
+        st.caption(f"Showing results for Item 1 and Items {grid_start + 2}-{grid_stop + 1}; the summary covers every item.")
+    for idx in [0] + list(range(grid_start + 1, grid_stop + 1)):
+        st.fragment(item_result_panel, key=f"item_result_{idx}")(idx)
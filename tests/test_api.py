@@ -0,0 +1,96 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+import requests
+
+from freight_calc.api import RESULT_FIELDS, QuoteServer
+from freight_calc.bulk import RESULT_DECIMALS
+from freight_calc.pricing import price_items
+from freight_calc.refresh import RateRefresher
+from test_ingest import make_workbook
+
+ITEMS = [
+    {"supplier": "S1", "sqn": "Q1", "rm_type": "Fabric", "country": "China", "origin": "Ningbo",
+     "destination": "SL", "weight_value": 150, "weight_type": "GSM (g/m²)", "width": 140, "unit": "CM"},
+    {"supplier": "S2", "sqn": "Q2", "rm_type": "Lace", "country": "India", "origin": "Chennai",
+     "destination": "Bangladesh", "weight_value": 0.2, "weight_type": "GSM (kg/m²)", "width": 58, "unit": "IN"},
+    {"supplier": "S3", "sqn": "Q3", "rm_type": "Elastic", "country": "Turkey", "origin": "Istanbul",
+     "destination": "SL", "weight_value": 35, "weight_type": "GLM (g/m)", "width": 1.5, "unit": "M"},
+]
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    path = tmp_path_factory.mktemp("api") / "rates.xlsx"
+    path.write_bytes(make_workbook())
+    refresher = RateRefresher(str(path))
+    server = QuoteServer(("127.0.0.1", 0), refresher)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def expected(items, rate_index):
+    priced = price_items(pd.DataFrame(items), rate_index)
+    rows = []
+    for _, row in priced.iterrows():
+        values = {f: np.round(row[f], RESULT_DECIMALS[f]) if f in RESULT_DECIMALS else row[f] for f in RESULT_FIELDS}
+        rows.append({f: None if np.isnan(v) else float(v) for f, v in values.items()})
+    return rows
+
+
+def test_quote_matches_price_items(server):
+    rate_index = server.tables.rate_index
+    for item, want in zip(ITEMS, expected(ITEMS, rate_index)):
+        result = requests.post(f"{server.url}/quote", json=item).json()
+        assert {f: result[f] for f in RESULT_FIELDS} == want
+        assert result["sqn"] == item["sqn"] and result["error"] is None
+        assert result["air_available"] == (want["final_air_rate"] is not None)
+        assert result["sea_available"] == (want["final_sea_rate"] is not None)
+
+
+def test_batch_matches_price_items(server):
+    items = ITEMS * 500
+    response = requests.post(f"{server.url}/quote/batch", json={"items": items})
+    assert response.status_code == 200
+    results = response.json()["items"]
+    assert [{f: r[f] for f in RESULT_FIELDS} for r in results] == expected(items, server.tables.rate_index)
+    # A bare list is accepted too
+    assert requests.post(f"{server.url}/quote/batch", json=ITEMS).json()["items"] == results[:3]
+
+
+def test_unknown_lane_is_reported_per_item(server):
+    item = dict(ITEMS[0], country="Peru", origin="Lima")
+    results = requests.post(f"{server.url}/quote/batch", json=[ITEMS[0], item]).json()["items"]
+    assert results[0]["error"] is None
+    assert results[1]["error"] and results[1]["final_air_rate"] is None
+
+
+@pytest.mark.parametrize("path, body, message", [
+    ("/quote", b"{not json", None),
+    ("/quote", b"[]", "expected a JSON object"),
+    ("/quote/batch", b'{"rows": []}', "expected a JSON list"),
+    ("/quote", b'{"rm_type": "Fabric"}', "Missing field(s): country, destination, origin, unit, weight_type, "
+                                         "weight_value, width"),
+    ("/quote/batch", b'[{"rm_type": "Fabric"}, 3]', "every item must be a JSON object"),
+])
+def test_bad_requests_get_400(server, path, body, message):
+    response = requests.post(f"{server.url}{path}", data=body, headers={"Content-Type": "application/json"})
+    assert response.status_code == 400
+    if message:
+        assert message in response.json()["error"]
+
+
+def test_metrics_report_latency_per_endpoint(server):
+    requests.post(f"{server.url}/quote", json=ITEMS[0])
+    requests.post(f"{server.url}/quote/batch", json=ITEMS)
+    metrics = requests.get(f"{server.url}/metrics").json()
+    for endpoint in ["/quote", "/quote/batch"]:
+        assert set(metrics[endpoint]) == {"count", "p50_ms", "p99_ms"}
+        assert metrics[endpoint]["count"] >= 1
+        assert 0 <= metrics[endpoint]["p50_ms"] <= metrics[endpoint]["p99_ms"]
+    assert requests.get(f"{server.url}/health").json()["status"] == "ok"
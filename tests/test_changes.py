@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import freight_calc.ingest as ingest
+from freight_calc.changes import ChangeLog, diff_rate_tables, summarize_changes
+from freight_calc.ingest import SheetCache
+from freight_calc.loader import load_rate_tables
+from freight_calc.xlsx import sheet_fingerprints
+from test_ingest import make_workbook
+
+SEA_SL = "Sea Freight - SL"
+
+
+def edit_sea_sl(sheets):
+    """Reprice China/Ningbo and add Vietnam/Hanoi on the SL sea sheet; raise Elastic's SL markup."""
+    sea = sheets[SEA_SL]
+    sea.loc[sea["Origin"] == "Ningbo", sea.columns[-1]] = 9.99
+    sheets[SEA_SL] = pd.concat([sea, pd.DataFrame({"Country": ["Vietnam"], "Origin": ["Hanoi"],
+                                                   sea.columns[-1]: [7.25]})], ignore_index=True)
+    sheets["Markup"].loc[1, "SL"] = 1.19
+
+
+@pytest.fixture
+def parsed_sheets(monkeypatch):
+    parsed = []
+    parse_rate_sheet = ingest.parse_rate_sheet
+
+    def spy(xls, mode, sheet, history_months=0):
+        parsed.append(sheet)
+        return parse_rate_sheet(xls, mode, sheet, history_months)
+
+    monkeypatch.setattr(ingest, "parse_rate_sheet", spy)
+    return parsed
+
+
+def test_only_the_edited_sheet_hash_changes():
+    before, after = sheet_fingerprints(make_workbook()), sheet_fingerprints(make_workbook(edit_sea_sl))
+    assert set(before) == set(after)
+    assert {name for name in before if before[name] != after[name]} == {SEA_SL, "Markup"}
+    assert sheet_fingerprints(b"not a workbook") == {}
+
+
+def test_reload_parses_only_the_edited_sheet(tmp_path, parsed_sheets):
+    path = tmp_path / "rates.xlsx"
+    cache = SheetCache()
+    path.write_bytes(make_workbook())
+    first = load_rate_tables(str(path), cache=cache)
+    assert first.sheets_parsed == (4, 4) and len(parsed_sheets) == 4
+
+    parsed_sheets.clear()
+    path.write_bytes(make_workbook(edit_sea_sl))
+    second = load_rate_tables(str(path), cache=cache)
+    assert second.sheets_parsed == (1, 4)
+    assert parsed_sheets == [SEA_SL]
+
+    # Reused sheets give the same tables as a full parse
+    fresh = load_rate_tables(str(path), cache=SheetCache())
+    assert diff_rate_tables(fresh, second).empty
+    np.testing.assert_array_equal(fresh.rate_index.air, second.rate_index.air)
+    np.testing.assert_array_equal(fresh.rate_index.sea, second.rate_index.sea)
+
+    # The change log lists exactly the edited lanes and markup
+    log = ChangeLog()
+    changes = log.record(first, second, 2, 1_750_000_000.0)
+    rows = changes.astype(object).where(changes.notna(), None).to_dict("records")
+    ningbo = first.rate_index.lookup("China", "Ningbo", "SL")[1]
+    assert rows == [
+        {"change": "lane added", "mode": "sea", "destination": "SL", "country": "Vietnam", "origin": "Hanoi",
+         "rm_type": None, "old": None, "new": 7.25},
+        {"change": "markup changed", "mode": None, "destination": "SL", "country": None, "origin": None,
+         "rm_type": "Elastic", "old": 1.18, "new": 1.19},
+        {"change": "repriced", "mode": "sea", "destination": "SL", "country": "China", "origin": "Ningbo",
+         "rm_type": None, "old": ningbo, "new": 9.99},
+    ]
+    assert summarize_changes(changes) == "1 lane added, 1 markup changed, 1 repriced"
+    assert [entry.version for entry in log.entries()] == [2]
+
+    # A reload with nothing changed records nothing
+    assert log.record(second, load_rate_tables(str(path), cache=cache), 3, 1_750_000_060.0).empty
+    assert cache.parsed == 0 and len(log.entries()) == 1
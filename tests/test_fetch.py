@@ -0,0 +1,100 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from freight_calc.fetch import WorkbookFetcher
+from freight_calc.ingest import SheetCache
+from freight_calc.loader import load_rate_tables
+from test_ingest import make_workbook
+
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+class WorkbookServer(ThreadingHTTPServer):
+    """Serves one workbook with an ETag, answering 304 when the client's copy is current."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), WorkbookHandler)
+        self.content = make_workbook()
+        self.etag = '"v1"'
+        self.status = None  # set to force an error response
+        self.requests = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/rates.xlsx"
+
+
+class WorkbookHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        if server.status is not None:
+            self.send_error(server.status)
+            return
+        if self.headers.get("If-None-Match") == server.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(server.content)))
+        self.send_header("ETag", server.etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(server.content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = WorkbookServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_first_fetch_downloads_and_keeps_validators(server):
+    fetcher = WorkbookFetcher(server.url)
+    assert fetcher.fetch() == server.content
+    assert (fetcher.etag, fetcher.last_modified, fetcher.not_modified) == ('"v1"', LAST_MODIFIED, False)
+    assert "If-None-Match" not in server.requests[0]
+
+
+def test_unchanged_workbook_is_reused_on_304(server):
+    fetcher = WorkbookFetcher(server.url)
+    first = fetcher.fetch()
+    assert fetcher.fetch() is first
+    assert fetcher.not_modified
+    assert server.requests[1]["If-None-Match"] == '"v1"'
+    assert server.requests[1]["If-Modified-Since"] == LAST_MODIFIED
+
+    server.etag = '"v2"'  # republished
+    fetcher.fetch()
+    assert not fetcher.not_modified and fetcher.etag == '"v2"'
+
+
+def test_reload_after_304_reuses_parsed_sheets(server):
+    cache = SheetCache()
+    first = load_rate_tables(server.url, cache=cache)
+    second = load_rate_tables(server.url, cache=cache)
+    assert first.sheets_parsed == (4, 4)
+    assert second.sheets_parsed == (0, 4)
+    assert len(server.requests) == 2 and server.requests[1]["If-None-Match"] == '"v1"'
+    assert second.rate_index.lookup("China", "Ningbo", "SL") == first.rate_index.lookup("China", "Ningbo", "SL")
+
+
+@pytest.mark.parametrize("status", [404, 500])
+def test_error_response_raises(server, status):
+    fetcher = WorkbookFetcher(server.url)
+    fetcher.fetch()
+    server.status = status
+    with pytest.raises(requests.HTTPError):
+        fetcher.fetch()
+    # The failed fetch leaves the last good copy and validators in place
+    assert fetcher.content == server.content and fetcher.etag == '"v1"'
@@ -0,0 +1,99 @@
+import itertools
+
+from freight_calc.grid import apply_grid_edits, blank_item, fix_choices, grid_frame, page_bounds, page_count
+from freight_calc.rate_index import RateIndex
+from test_pricing import DESTINATIONS, MARKUPS, RM_TYPES, long_rates
+
+
+class Items:
+    """Rows with ids 0..n-1 and a new_row that hands out ids from n on, as the app does."""
+
+    def __init__(self, n):
+        self.rows = [dict(blank_item(i, RM_TYPES, DESTINATIONS), supplier=f"S{i}") for i in range(n)]
+        self.ids = itertools.count(n)
+
+    def new_row(self):
+        return blank_item(next(self.ids), RM_TYPES, DESTINATIONS)
+
+    def keys(self):
+        return [row["key"] for row in self.rows]
+
+    def suppliers(self):
+        return [row["supplier"] for row in self.rows]
+
+
+def test_edits_map_page_positions_to_row_ids():
+    items = Items(10)
+    page = items.keys()[4:8]
+    changed, structural = apply_grid_edits(items.rows, page, {
+        "edited_rows": {"0": {"supplier": " Acme ", "width": "12.5"}, 2: {"weight_value": None, "item": 99}},
+    }, items.new_row)
+
+    assert not structural
+    assert [row["key"] for row in changed] == [4, 6]
+    assert items.rows[4]["supplier"] == "Acme" and items.rows[4]["width"] == 12.5
+    assert items.rows[6]["weight_value"] == 0.0 and "item" not in items.rows[6]
+    assert items.keys() == list(range(10))
+    # Cells that weren't edited are left as they were
+    assert items.rows[6]["supplier"] == "S6"
+
+
+def test_added_rows_get_new_ids_after_their_page():
+    items = Items(10)
+    changed, structural = apply_grid_edits(items.rows, items.keys()[0:5], {
+        "added_rows": [{"supplier": "New A", "width": 150}, {"sqn": "Q-2"}],
+    }, items.new_row)
+
+    assert structural
+    assert items.keys() == [0, 1, 2, 3, 4, 10, 11, 5, 6, 7, 8, 9]
+    assert [row["key"] for row in changed] == [10, 11]
+    assert items.rows[5]["supplier"] == "New A" and items.rows[5]["width"] == 150.0
+    assert items.rows[6]["sqn"] == "Q-2"
+
+    # Rows added to an empty grid are appended
+    empty = Items(0)
+    apply_grid_edits(empty.rows, [], {"added_rows": [{}]}, empty.new_row)
+    assert empty.keys() == [0]
+
+
+def test_deletes_keep_the_other_ids_and_ids_are_never_reused():
+    items = Items(10)
+    changed, structural = apply_grid_edits(items.rows, items.keys()[5:10], {
+        "edited_rows": {1: {"supplier": "edited"}, 3: {"supplier": "edited then deleted"}},
+        "deleted_rows": [0, 3],
+    }, items.new_row)
+
+    assert structural
+    assert items.keys() == [0, 1, 2, 3, 4, 6, 7, 9]
+    assert [row["key"] for row in changed] == [6]
+    assert items.suppliers() == ["S0", "S1", "S2", "S3", "S4", "edited", "S7", "S9"]
+
+    # Positions now refer to the rows that moved up; a new row gets a fresh id, not 5 or 8
+    page = items.keys()[5:8]
+    apply_grid_edits(items.rows, page, {"edited_rows": {2: {"sqn": "Q9"}}, "added_rows": [{}]}, items.new_row)
+    assert items.keys() == [0, 1, 2, 3, 4, 6, 7, 9, 10]
+    assert items.rows[7]["key"] == 9 and items.rows[7]["sqn"] == "Q9"
+
+
+def test_fix_choices_resets_invalid_lanes():
+    rate_index = RateIndex.build(long_rates(), DESTINATIONS, MARKUPS, RM_TYPES)
+    row = dict(blank_item(0, RM_TYPES, DESTINATIONS), rm_type="Zip", destination="SL", country="India",
+               origin="Hanoi", weight_type="oz", unit="ft")
+    fix_choices(row, rate_index, RM_TYPES, DESTINATIONS)
+    assert (row["rm_type"], row["weight_type"], row["unit"]) == ("Fabric", "GSM (g/m²)", "CM")
+    assert (row["country"], row["origin"]) == ("India", "Chennai")
+
+    row = dict(row, country="Peru")
+    fix_choices(row, rate_index, RM_TYPES, DESTINATIONS)
+    assert row["country"] == rate_index.countries_for("SL")[0]
+    assert row["origin"] in rate_index.origins_for("SL", row["country"])
+
+
+def test_pages():
+    assert [page_count(n, 100) for n in [0, 1, 100, 101]] == [1, 1, 1, 2]
+    assert page_bounds(250, 3, 100) == (200, 250)
+    assert page_bounds(250, 9, 100) == (200, 250)
+    assert page_bounds(0, 1, 100) == (0, 0)
+    items = Items(3)
+    frame = grid_frame(items.rows[1:], first_item=3)
+    assert list(frame["item"]) == [3, 4] and list(frame["supplier"]) == ["S1", "S2"]
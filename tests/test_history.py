@@ -0,0 +1,109 @@
+import io
+import math
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from freight_calc.ingest import SheetCache
+from freight_calc.loader import load_rate_tables
+from freight_calc.pricing import price_items
+from test_ingest import baseline_tables, make_workbook
+from test_pricing import old_price
+
+NAN = float("nan")
+
+# Air to SL by month; Ningbo has no rate in February, Chennai only from March
+AIR_SL = pd.DataFrame({
+    "Country": ["China", "China", "India"],
+    "Origin": ["Shanghai", "Ningbo", "Chennai"],
+    "01/01/2025": [2.0, 3.0, NAN],
+    "02/01/2025": [2.5, NAN, NAN],
+    "03/01/2025": [2.5, 3.5, 4.0],
+})
+SEA_SL = pd.DataFrame({
+    "Country": ["China"], "Origin": ["Shanghai"],
+    datetime(2025, 1, 1): [40.0], datetime(2025, 3, 1): [45.0],
+})
+
+
+def write_workbook(path, sheets):
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for name, frame in sheets.items():
+            frame.to_excel(writer, sheet_name=name, index=False)
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def tables(tmp_path_factory):
+    path = write_workbook(tmp_path_factory.mktemp("history") / "rates.xlsx", {
+        "Air Freight - SL": AIR_SL,
+        "Sea Freight - SL": SEA_SL,
+        "Markup": pd.DataFrame({"RM Type": ["Fabric"], "SL": [1.2]}),
+    })
+    return load_rate_tables(path, cache=SheetCache(), history_months=None)
+
+
+def rates(tables, country, origin, as_of):
+    return tables.rate_index.lookup(country, origin, "SL", as_of)
+
+
+def test_before_first_month_has_no_rate(tables):
+    assert rates(tables, "China", "Shanghai", pd.Timestamp("2024-12-31")) == (None, None)
+
+
+@pytest.mark.parametrize("as_of, air, sea", [
+    ("2025-01-01", 2.0, 40.0),  # on a change date
+    ("2025-01-31", 2.0, 40.0),  # between change dates
+    ("2025-02-01", 2.5, 40.0),
+    ("2025-02-28", 2.5, 40.0),  # sea has no February column: January's rate holds
+    ("2025-03-01", 2.5, 45.0),
+    ("2026-06-30", 2.5, 45.0),  # after the last month
+])
+def test_rate_in_effect_on_a_date(tables, as_of, air, sea):
+    assert rates(tables, "China", "Shanghai", pd.Timestamp(as_of)) == (air, sea)
+
+
+def test_blank_month_in_the_middle_has_no_rate(tables):
+    assert rates(tables, "China", "Ningbo", pd.Timestamp("2025-01-15"))[0] == 3.0
+    assert rates(tables, "China", "Ningbo", pd.Timestamp("2025-02-15"))[0] is None
+    assert rates(tables, "China", "Ningbo", pd.Timestamp("2025-03-15"))[0] == 3.5
+    assert rates(tables, "India", "Chennai", pd.Timestamp("2025-02-15"))[0] is None
+    assert rates(tables, "India", "Chennai", pd.Timestamp("2025-03-01"))[0] == 4.0
+
+
+def test_as_of_prices_a_batch_with_a_date_per_item(tables):
+    items = pd.DataFrame({
+        "rm_type": "Fabric", "country": "China", "origin": ["Shanghai", "Ningbo", "Ningbo"],
+        "destination": "SL", "weight_value": 150.0, "weight_type": "GSM (g/m²)", "width": 140.0, "unit": "CM",
+    })
+    priced = price_items(items, tables.rate_index, as_of=pd.Timestamp("2025-02-10"))
+    np.testing.assert_array_equal(priced["air_rate"], [2.5, NAN, NAN])
+    dated = tables.rate_index.history.lookup_many(
+        tables.rate_index.lane_ids(items["country"], items["origin"]),
+        tables.rate_index.destination_ids(items["destination"]),
+        pd.to_datetime(["2025-02-10", "2025-01-10", "2025-03-10"]))
+    np.testing.assert_array_equal(dated[0], [2.5, 3.0, 3.5])
+
+
+def test_no_as_of_prices_the_latest_column(tmp_path):
+    content = make_workbook()
+    path = tmp_path / "rates.xlsx"
+    path.write_bytes(content)
+    tables = load_rate_tables(str(path), cache=SheetCache(), history_months=None)
+    air_rates, sea_rates, _, markups, _, _, _ = baseline_tables(pd.ExcelFile(io.BytesIO(content)))
+
+    lanes = [(c, o, d) for d in tables.all_destinations for c in tables.rate_index.countries_for(d)
+             for o in tables.rate_index.origins_for(d, c)]
+    items = pd.DataFrame([{"rm_type": rm, "country": c, "origin": o, "destination": d, "weight_value": 150.0,
+                           "weight_type": "GSM (g/m²)", "width": 140.0, "unit": "CM"}
+                          for c, o, d in lanes for rm in tables.rm_types])
+    latest = price_items(items, tables.rate_index)
+    expected = pd.DataFrame([old_price(item, air_rates, sea_rates, markups) for item in items.to_dict("records")])
+    for column in ["air_rate", "sea_rate", "final_air_rate", "final_sea_rate"]:
+        want = [NAN if v is None or (isinstance(v, float) and math.isnan(v)) else v for v in expected[column]]
+        np.testing.assert_array_equal(latest[column].to_numpy(), np.array(want, dtype=np.float64))
+
+    # As of the latest month, the history gives the same prices
+    pd.testing.assert_frame_equal(price_items(items, tables.rate_index, as_of=tables.rate_date), latest)
@@ -0,0 +1,167 @@
+import io
+import math
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from freight_calc.ingest import build_markups, latest_rate_date, rate_status, read_rate_sheets
+from freight_calc.rate_index import RateIndex
+
+DATE_HEADERS = ["01/01/2025", "02/01/2025", "03/01/2025"]
+
+
+def rate_sheet(lanes, seed, headers=DATE_HEADERS):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame(lanes, columns=["Country", "Origin"])
+    for header in headers:
+        frame[header] = np.round(rng.uniform(0.5, 9.5, len(frame)), 2)
+    return frame
+
+
+def make_workbook(edit=None):
+    """A small rate workbook: duplicate lanes, a blank rate, date and text headers.
+
+    edit, if given, is called with the {sheet name: frame} dict before it is written.
+    """
+    lanes = [("China", "Shanghai"), ("China", "Ningbo"), ("India", "Chennai"), ("Vietnam", "Hanoi")]
+    sl_air = rate_sheet(lanes + [("China", "Shanghai")], 1)  # repeated lane: the later row wins
+    sl_air.iloc[1, -1] = np.nan
+    bd_air = rate_sheet(lanes[1:], 2, [datetime(2025, 1, 1), datetime(2025, 2, 1)])
+    sl_sea = rate_sheet(lanes[:3] + [("Turkey", "Istanbul")], 3)
+    sheets = {
+        "Air Freight - SL": sl_air,
+        "Air Freight - Bangladesh": bd_air,
+        "Sea Freight - SL": sl_sea,
+        "Sea Freight - Bangladesh": rate_sheet(lanes[2:], 4, ["01/15/2025"]),
+        "Markup": pd.DataFrame({"RM Type": ["Fabric", "Elastic", "Lace"],
+                                "SL": [1.15, 1.18, 1.2], "Bangladesh": [1.2, 1.22, 1.25]}),
+    }
+    if edit is not None:
+        edit(sheets)
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        for name, frame in sheets.items():
+            frame.to_excel(writer, sheet_name=name, index=False)
+    return buffer.getvalue()
+
+
+def baseline_tables(xls):
+    """The row-by-row load the app used before the long frame (iterrows per sheet)."""
+    destination_countries = {}
+    latest_date = None
+    rates = {"air": {}, "sea": {}}
+    for mode, prefix in [("air", "Air Freight - "), ("sea", "Sea Freight - ")]:
+        for sheet in [s for s in xls.sheet_names if prefix.strip(" -") in s]:
+            destination = sheet.replace(prefix, "")
+            df = xls.parse(sheet)
+            latest_col = df.columns[-1]
+            if isinstance(latest_col, str):
+                for date_format in ['%m/%d/%Y', '%d/%m/%Y', '%Y-%m-%d', '%m/%d/%y']:
+                    try:
+                        col_date = pd.to_datetime(latest_col, format=date_format)
+                        break
+                    except ValueError:
+                        continue
+                else:
+                    col_date = pd.to_datetime(latest_col)
+            else:
+                col_date = pd.to_datetime(latest_col)
+            if latest_date is None or col_date > latest_date:
+                latest_date = col_date
+
+            if destination not in destination_countries:
+                destination_countries[destination] = {"countries": set(), "origins_by_country": {}}
+            for _, row in df.iterrows():
+                c = row["Country"]
+                o = row["Origin"]
+                r = row[latest_col]
+                destination_countries[destination]["countries"].add(c)
+                if c not in destination_countries[destination]["origins_by_country"]:
+                    destination_countries[destination]["origins_by_country"][c] = set()
+                destination_countries[destination]["origins_by_country"][c].add(o)
+                if c not in rates[mode]:
+                    rates[mode][c] = {}
+                if o not in rates[mode][c]:
+                    rates[mode][c][o] = {}
+                rates[mode][c][o][destination] = r
+
+    markups = {}
+    markup_df = xls.parse("Markup")
+    rm_types = markup_df.iloc[:, 0].tolist()
+    for _, row in markup_df.iterrows():
+        markups[row.iloc[0]] = {dest: row[dest] for dest in markup_df.columns[1:]}
+
+    is_current_month = False
+    rate_month_year = ""
+    if latest_date:
+        now = pd.Timestamp.now()
+        is_current_month = latest_date.month == now.month and latest_date.year == now.year
+        rate_month_year = latest_date.strftime('%B %Y')
+    return rates["air"], rates["sea"], destination_countries, markups, rm_types, is_current_month, rate_month_year
+
+
+def known_rates(mode_rates):
+    # The dicts kept blank cells as NaN; the index stores them as "not available"
+    return {(c, o, d): float(r) for c, origins in mode_rates.items() for o, dests in origins.items()
+            for d, r in dests.items() if not math.isnan(r)}
+
+
+@pytest.fixture(scope="module")
+def workbook():
+    xls = pd.ExcelFile(io.BytesIO(make_workbook()))
+    rates, destinations, dates, _ = read_rate_sheets(xls)
+    markups, rm_types = build_markups(xls.parse("Markup"))
+    rate_index = RateIndex.build(rates, destinations, markups, rm_types)
+    return xls, rate_index, markups, rm_types, dates
+
+
+def test_rates_match_baseline_loop(workbook):
+    xls, rate_index, _, _, _ = workbook
+    air_rates, sea_rates, destination_countries, _, _, _, _ = baseline_tables(xls)
+
+    air, sea = {}, {}
+    for d in destination_countries:
+        for c in rate_index.countries_for(d):
+            for o in rate_index.origins_for(d, c):
+                air_rate, sea_rate = rate_index.lookup(c, o, d)
+                if air_rate is not None:
+                    air[(c, o, d)] = air_rate
+                if sea_rate is not None:
+                    sea[(c, o, d)] = sea_rate
+
+    assert air == known_rates(air_rates)
+    assert sea == known_rates(sea_rates)
+    # The repeated lane took the later row's rate
+    assert air[("China", "Shanghai", "SL")] == air_rates["China"]["Shanghai"]["SL"]
+
+
+def test_menus_match_baseline_loop(workbook):
+    xls, rate_index, _, _, _ = workbook
+    _, _, destination_countries, _, _, _, _ = baseline_tables(xls)
+
+    menus = {d: {"countries": set(rate_index.countries_for(d)),
+                 "origins_by_country": {c: set(origins) for c, origins in rate_index.menu(d).items()}}
+             for d in destination_countries}
+    assert menus == destination_countries
+
+
+def test_markups_and_status_match_baseline_loop(workbook):
+    xls, rate_index, markups, rm_types, dates = workbook
+    _, _, _, baseline_markups, baseline_rm_types, is_current_month, rate_month_year = baseline_tables(xls)
+
+    assert markups == baseline_markups
+    assert rm_types == baseline_rm_types
+    assert {rm: {d: rate_index.markup(rm, d) for d in row} for rm, row in baseline_markups.items()} \
+        == baseline_markups
+    assert rate_status(latest_rate_date(dates)) == (is_current_month, rate_month_year)
+
+
+@pytest.mark.parametrize("pool", ["thread", "process"])
+def test_parallel_parse_matches_serial(pool):
+    content = make_workbook()
+    serial = read_rate_sheets(pd.ExcelFile(io.BytesIO(content)))
+    parallel = read_rate_sheets(pd.ExcelFile(io.BytesIO(content)), workers=2, pool=pool, content=content)
+    pd.testing.assert_frame_equal(parallel[0], serial[0])
+    assert parallel[1:3] == serial[1:3]
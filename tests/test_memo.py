@@ -0,0 +1,87 @@
+import pandas as pd
+import pytest
+
+from freight_calc.loader import RateTables, rates_id
+from freight_calc.memo import PriceMemo, item_key
+from freight_calc.pricing import PRICED_COLUMNS, price_items
+from freight_calc.rate_index import RateIndex
+from freight_calc.shared import SharedRateReader, publish
+from test_pricing import DESTINATIONS, MARKUPS, RM_TYPES, long_rates, random_items
+
+
+def rate_tables(seed):
+    rate_index = RateIndex.build(long_rates(seed), DESTINATIONS, MARKUPS, RM_TYPES)
+    return RateTables(rate_index, tuple(DESTINATIONS), False, "", tuple(RM_TYPES), None, None)
+
+
+@pytest.fixture(scope="module")
+def tables():
+    return rate_tables(0)
+
+
+def items_200():
+    items = random_items(200, seed=5).to_dict("records")
+    for i, item in enumerate(items):
+        item["width"] = 100.0 + i  # 200 distinct items
+    return items
+
+
+def priced_like(items, rate_index):
+    priced = price_items(pd.DataFrame(items), rate_index)
+    return priced.astype(object).where(priced.notna(), None).to_dict("records")
+
+
+def test_editing_one_of_200_items_prices_one(tables):
+    memo = PriceMemo()
+    items = items_200()
+    first = memo.price(items, tables.rate_index, rates_id(tables))
+    assert memo.stats() == (0, 200, 200)
+    assert [dict(row) for row in first] == priced_like(items, tables.rate_index)
+
+    items[17] = dict(items[17], weight_value=items[17]["weight_value"] + 1)
+    second = memo.price(items, tables.rate_index, rates_id(tables))
+    assert memo.stats() == (199, 201, 201)
+    assert all(a is b for i, (a, b) in enumerate(zip(first, second)) if i != 17)
+    assert dict(second[17]) == priced_like([items[17]], tables.rate_index)[0]
+
+
+def test_new_rates_miss(tables):
+    memo = PriceMemo()
+    items = items_200()
+    memo.price(items, tables.rate_index, rates_id(tables))
+    new = rate_tables(1)
+    assert rates_id(new) != rates_id(tables)
+    priced = memo.price(items, new.rate_index, rates_id(new))
+    assert memo.stats() == (0, 400, 400)
+    assert [dict(row) for row in priced] == priced_like(items, new.rate_index)
+    # Sessions still on the old rates keep their entries
+    memo.price(items, tables.rate_index, rates_id(tables))
+    assert memo.hits == 200
+
+
+def test_recreated_shared_file_does_not_reuse_other_rates(tmp_path):
+    """A recreated shared file restarts at generation 1; the memo must not match the old rates."""
+    path = str(tmp_path / "rates.shared")
+    memo = PriceMemo()
+    items = items_200()[:10]
+    priced = []
+    for seed in [0, 1]:
+        publish(rate_tables(seed), path)
+        snapshot = SharedRateReader(path).get()
+        assert snapshot.version == 1
+        priced.append(memo.price(items, snapshot.tables.rate_index, snapshot.rates_id))
+        (tmp_path / "rates.shared").unlink()
+    assert memo.hits == 0
+    assert [dict(row) for row in priced[1]] == priced_like(items, rate_tables(1).rate_index)
+
+
+def test_lru_and_keys():
+    tables = rate_tables(0)
+    memo = PriceMemo(maxsize=50)
+    items = items_200()
+    rows = memo.price(items, tables.rate_index, "r1")
+    assert len(memo) == 50 and set(rows[0]) == set(PRICED_COLUMNS)
+    # 100 and 100.0 are the same item
+    assert item_key(dict(items[0], width=100)) == item_key(dict(items[0], width=100.0))
+    with pytest.raises(TypeError):
+        rows[0]["markup"] = 2.0
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from freight_calc.pricing import KG_PER_CBM, PRICED_COLUMNS, UNITS, WEIGHT_TYPES, price_items
+from freight_calc.rate_index import DEFAULT_MARKUP, RateIndex
+
+LANES = [("China", "Shanghai"), ("China", "Ningbo"), ("India", "Chennai"), ("Vietnam", "Hanoi")]
+DESTINATIONS = ["SL", "Bangladesh"]
+
+# "Lace" to Bangladesh is a blank cell in the Markup sheet; "Zip" has no row
+MARKUPS = {
+    "Fabric": {"SL": 1.15, "Bangladesh": 1.2},
+    "Elastic": {"SL": 1.18, "Bangladesh": 1.22},
+    "Lace": {"SL": 1.2, "Bangladesh": np.nan},
+}
+RM_TYPES = list(MARKUPS)
+
+
+def long_rates(seed=0):
+    """Every lane to every destination, some rates missing, one lane sea-only."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for mode in ["air", "sea"]:
+        for destination in DESTINATIONS:
+            for country, origin in LANES:
+                if mode == "air" and origin == "Hanoi":
+                    continue
+                rate = np.nan if rng.random() < 0.15 else round(rng.uniform(0.5, 90), 2)
+                rows.append((mode, destination, country, origin, rate, pd.NaT))
+    return pd.DataFrame(rows, columns=["mode", "destination", "country", "origin", "rate", "effective_date"])
+
+
+def dict_tables(rates):
+    """{country: {origin: {destination: rate}}} per mode, as the app kept them before RateIndex."""
+    tables = {"air": {}, "sea": {}}
+    for row in rates.itertuples():
+        tables[row.mode].setdefault(row.country, {}).setdefault(row.origin, {})[row.destination] = row.rate
+    return tables["air"], tables["sea"]
+
+
+def old_price(item, air_rates, sea_rates, markups):
+    """The calculator's per-item loop before pricing.price_items."""
+    width_m = item["width"] / 100 if item["unit"] == "CM" else (
+        item["width"] * 0.0254 if item["unit"] == "IN" else item["width"])
+    if item["weight_type"] == "GSM (g/m²)":
+        gsm_kg = item["weight_value"] / 1000
+        display_gsm = item["weight_value"]
+    elif item["weight_type"] == "GSM (kg/m²)":
+        gsm_kg = item["weight_value"]
+        display_gsm = item["weight_value"] * 1000
+    else:  # GLM (g/m)
+        gsm_g = item["weight_value"] / width_m if width_m > 0 else 0
+        gsm_kg = gsm_g / 1000
+        display_gsm = gsm_g
+    kg_per_m = gsm_kg * width_m
+
+    if item["rm_type"] in markups and item["destination"] in markups[item["rm_type"]]:
+        markup = markups[item["rm_type"]][item["destination"]]
+    else:
+        markup = 1.15
+
+    air_rate = sea_rate = None
+    if item["country"] in air_rates and item["origin"] in air_rates[item["country"]]:
+        air_rate = air_rates[item["country"]][item["origin"]].get(item["destination"])
+    if item["country"] in sea_rates and item["origin"] in sea_rates[item["country"]]:
+        sea_rate = sea_rates[item["country"]][item["origin"]].get(item["destination"])
+
+    final_air = air_rate * kg_per_m * markup if air_rate is not None else None
+    final_sea = sea_rate * (kg_per_m / KG_PER_CBM) * markup if sea_rate is not None else None
+    return {"width_m": width_m, "converted_gsm": display_gsm, "kg_per_m": kg_per_m,
+            "air_rate": air_rate, "sea_rate": sea_rate, "markup": markup,
+            "final_air_rate": final_air, "final_sea_rate": final_sea}
+
+
+def random_items(n, seed=1):
+    rng = np.random.default_rng(seed)
+    countries = [c for c, _ in LANES] + ["Peru"]
+    origins = [o for _, o in LANES] + ["Lima"]
+    return pd.DataFrame({
+        "rm_type": rng.choice(RM_TYPES + ["Zip"], n),
+        "country": rng.choice(countries, n),
+        "origin": rng.choice(origins, n),
+        "destination": rng.choice(DESTINATIONS + ["Kenya"], n),
+        "weight_value": np.round(rng.uniform(0, 400, n), 1),
+        "weight_type": rng.choice(WEIGHT_TYPES, n),
+        "width": np.where(rng.random(n) < 0.1, 0.0, np.round(rng.uniform(0, 200, n), 1)),
+        "unit": rng.choice(UNITS, n),
+    })
+
+
+@pytest.fixture(scope="module")
+def tables():
+    rates = long_rates()
+    air_rates, sea_rates = dict_tables(rates)
+    return RateIndex.build(rates, DESTINATIONS, MARKUPS, RM_TYPES), air_rates, sea_rates
+
+
+def as_float(value):
+    return np.nan if value is None else float(value)
+
+
+def blank_markup(item):
+    return item["rm_type"] in MARKUPS and pd.isna(MARKUPS[item["rm_type"]].get(item["destination"], 0))
+
+
+def test_matches_old_loop(tables):
+    rate_index, air_rates, sea_rates = tables
+    items = random_items(3000)
+    priced = price_items(items, rate_index)
+
+    keep = ~items.apply(blank_markup, axis=1)
+    expected = pd.DataFrame([old_price(item, air_rates, sea_rates, MARKUPS)
+                             for item in items[keep].to_dict("records")], columns=PRICED_COLUMNS)
+    expected = expected.map(as_float)
+    # Bit-for-bit: NaN where the old loop had no rate, the same float everywhere else
+    np.testing.assert_array_equal(priced[keep].to_numpy(), expected.to_numpy())
+
+
+def test_blank_markup_cell_falls_back_to_default(tables):
+    """A blank Markup cell now prices with DEFAULT_MARKUP (1.15), like a missing row.
+
+    The old loop took the blank cell as NaN and showed NaN final rates;
+    this is a deliberate change, the same fallback as an RM type or
+    destination the Markup sheet doesn't list.
+    """
+    rate_index, air_rates, sea_rates = tables
+    item = {"rm_type": "Lace", "country": "China", "origin": "Ningbo", "destination": "Bangladesh",
+            "weight_value": 150.0, "weight_type": "GSM (g/m²)", "width": 140.0, "unit": "CM"}
+    priced = price_items(pd.DataFrame([item]), rate_index).iloc[0]
+    old = old_price(item, air_rates, sea_rates, MARKUPS)
+
+    assert DEFAULT_MARKUP == 1.15
+    assert priced["markup"] == DEFAULT_MARKUP
+    assert np.isnan(old["markup"])
+    for mode in ["air", "sea"]:
+        fixed = dict(MARKUPS, Lace={"SL": 1.2, "Bangladesh": DEFAULT_MARKUP})
+        expected = old_price(item, air_rates, sea_rates, fixed)[f"final_{mode}_rate"]
+        np.testing.assert_equal(priced[f"final_{mode}_rate"], as_float(expected))
@@ -0,0 +1,145 @@
+import threading
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from freight_calc.quotelog import QUOTE_FIELDS, QuoteLog, quote_records
+
+DAY0 = pd.Timestamp("2025-03-01").timestamp()
+SUPPLIERS = ["Acme", "Acme Mills", "Beta"]
+PRICED = {"width_m": 1.4, "converted_gsm": 150.0, "kg_per_m": 0.21, "air_rate": 2.5, "sea_rate": None,
+          "markup": 1.15, "final_air_rate": 0.60375, "final_sea_rate": None}
+
+
+def item(i):
+    return {"supplier": SUPPLIERS[i % 3], "sqn": f"SQN-{i}", "rm_type": "Fabric", "country": "China",
+            "origin": "Ningbo", "destination": "SL", "weight_value": 150.0, "weight_type": "GSM (g/m²)",
+            "width": 140.0, "unit": "CM"}
+
+
+def records(start, n, quoted_at=None):
+    return [record for i in range(start, start + n)
+            for record in quote_records([item(i)], [PRICED], "User", f"user{i % 2}@example.com", "Admin",
+                                        "abc123def456", pd.Timestamp("2025-03-01"),
+                                        quoted_at=quoted_at if quoted_at is not None else DAY0 + i * 6 * 3600)]
+
+
+@pytest.fixture
+def quote_log(tmp_path):
+    log = QuoteLog(str(tmp_path / "quotes.db"))
+    yield log
+    log.close()
+
+
+class BlockedWrites(QuoteLog):
+    """Holds the writer in its first write until release is set; records each write's size."""
+
+    def __init__(self, *args, **kwargs):
+        self.writing = threading.Event()
+        self.release = threading.Event()
+        self.sizes = []
+        super().__init__(*args, **kwargs)
+
+    def _write(self, conn, records):
+        self.sizes.append(len(records))
+        self.writing.set()
+        self.release.wait()
+        super()._write(conn, records)
+
+
+def test_writer_batches_what_is_waiting(tmp_path):
+    log = BlockedWrites(str(tmp_path / "quotes.db"), batch_size=25)
+    log.log(records(0, 10))
+    assert log.writing.wait(10)
+    for start in range(10, 90, 10):
+        log.log(records(start, 10))
+    # The writer is held in its first write: flush gives up after the timeout
+    assert not log.flush(timeout=0.2)
+    assert log.pending() > 0
+
+    log.release.set()
+    assert log.flush(timeout=10)
+    # What queued up while it was busy went in 3 transactions, each stopping once past batch_size
+    assert log.sizes == [10, 30, 30, 20]
+    assert (log.written, log.dropped, log.count()) == (90, 0, 90)
+    log.close()
+    # No writer left to wait for
+    log.log(records(90, 1))
+    assert not log.flush(timeout=10)
+
+
+def test_bad_record_is_dropped_and_the_rest_written(quote_log):
+    batch = records(0, 5)
+    batch[2] = batch[2][:-1]  # one value short
+    quote_log.log(batch)
+    assert quote_log.flush()
+    assert (quote_log.written, quote_log.dropped) == (4, 1)
+    assert quote_log.last_error.startswith("ProgrammingError")
+    assert list(quote_log.search()["sqn"]) == ["SQN-4", "SQN-3", "SQN-1", "SQN-0"]
+
+    quote_log.log(records(5, 1))
+    assert quote_log.flush()
+    assert quote_log.last_error is None
+
+
+def test_records_round_trip(quote_log):
+    quote_log.log(records(0, 1))
+    assert quote_log.flush()
+    row = quote_log.search().iloc[0]
+    assert list(row.index) == ["id"] + QUOTE_FIELDS
+    assert (row["rates_id"], row["rate_date"], row["price_as_of"]) == ("abc123def456", "2025-03-01", None)
+    assert row["quoted_at"] == pd.Timestamp("2025-03-01") and row["final_air_rate"] == 0.60375
+    assert pd.isna(row["final_sea_rate"])
+
+
+@pytest.fixture
+def filled(quote_log):
+    # 60 quotes, 4 a day from 1 Mar 2025 (UTC); users alternate, suppliers cycle
+    quote_log.log(records(0, 60))
+    assert quote_log.flush()
+    return quote_log
+
+
+@pytest.mark.parametrize("filters, expected", [
+    ({}, range(60)),
+    ({"user": "user1@example.com"}, range(1, 60, 2)),
+    ({"user": "user1@example"}, []),  # users match exactly
+    ({"sqn": "SQN-1"}, [1] + list(range(10, 20))),
+    ({"supplier": "Acme"}, [i for i in range(60) if i % 3 != 2]),
+    ({"supplier": "Acme M"}, range(1, 60, 3)),
+    ({"date_from": date(2025, 3, 3)}, range(8, 60)),
+    ({"date_to": date(2025, 3, 2)}, range(0, 8)),
+    ({"date_from": date(2025, 3, 5), "date_to": date(2025, 3, 5)}, range(16, 20)),
+    ({"user": "user0@example.com", "supplier": "Beta", "date_to": date(2025, 3, 10)}, [2, 8, 14, 20, 26, 32, 38]),
+])
+def test_search_filters(filled, filters, expected):
+    found = filled.search(**filters, limit=100)
+    assert sorted(int(sqn.split("-")[1]) for sqn in found["sqn"]) == sorted(expected)
+    assert filled.count(**filters) == len(list(expected))
+    assert list(found["id"]) == sorted(found["id"], reverse=True)
+
+
+def test_keyset_pages_older_and_newer(filled):
+    filters = {"supplier": "Acme"}
+    everything = list(filled.search(**filters, limit=100)["id"])
+
+    # Older: each page starts below the smallest id of the one before (as the app keeps them)
+    pages, seen = [None], []
+    while True:
+        page = filled.search(**filters, before_id=pages[-1], limit=7)
+        seen.append(list(page["id"]))
+        if len(page) < 7:
+            break
+        pages.append(int(page["id"].min()))
+    assert [i for page in seen for i in page] == everything
+    assert [len(page) for page in seen] == [7, 7, 7, 7, 7, 5]
+
+    # Newer: dropping the last start id shows the page before again
+    pages.pop()
+    assert list(filled.search(**filters, before_id=pages[-1], limit=7)["id"]) == seen[-2]
+    # Quotes logged meanwhile only show up on the first page
+    filled.log(records(60, 1))
+    assert filled.flush()
+    assert list(filled.search(**filters, before_id=pages[2], limit=7)["id"]) == seen[2]
+    assert filled.search(**filters, limit=7)["sqn"].iloc[0] == "SQN-60"
@@ -0,0 +1,133 @@
+import threading
+import time
+
+import pytest
+
+from freight_calc.loader import rates_id
+from freight_calc.refresh import RateRefresher
+from freight_calc.snapshots import SnapshotStore
+from test_memo import rate_tables
+
+
+class StubLoader:
+    """Returns the queued results in turn (an exception is raised); can hold a load until released."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, source):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(10)
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_first_get_loads_once_for_every_caller():
+    loader = StubLoader(rate_tables(0))
+    loader.release.clear()
+    refresher = RateRefresher("stub", loader=loader)
+    snapshots = []
+    threads = [threading.Thread(target=lambda: snapshots.append(refresher.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    assert loader.started.wait(10)
+    assert refresher.is_loading()
+    loader.release.set()
+    for thread in threads:
+        thread.join(10)
+
+    assert loader.calls == 1
+    assert len(snapshots) == 8 and all(s is snapshots[0] for s in snapshots)
+    assert (snapshots[0].version, snapshots[0].from_disk) == (1, False)
+    assert snapshots[0].rates_id == rates_id(rate_tables(0))
+    assert not refresher.is_loading()
+
+
+def test_stale_snapshot_is_served_while_the_reload_runs():
+    loader = StubLoader(rate_tables(0), rate_tables(1))
+    refresher = RateRefresher("stub", interval=0, loader=loader)
+    first = refresher.refresh()
+    loader.release.clear()
+    loader.started.clear()
+
+    # Every reader gets the old snapshot at once; the reload runs in the background
+    assert refresher.get() is first
+    assert loader.started.wait(10)
+    assert refresher.get() is first and refresher.refresh(wait=False) is first
+    loader.release.set()
+    wait_for(lambda: not refresher.is_loading())
+
+    assert loader.calls == 2
+    assert refresher.snapshot.version == 2
+    assert refresher.snapshot.rates_id == rates_id(rate_tables(1))
+    assert [entry.version for entry in refresher.change_log.entries()] == [2]
+
+
+def test_failed_reload_keeps_the_last_good_snapshot():
+    loader = StubLoader(rate_tables(0), OSError("source unreachable"), rate_tables(1))
+    refresher = RateRefresher("stub", interval=0, loader=loader, retry_interval=3600)
+    good = refresher.refresh()
+
+    assert refresher.refresh() is good
+    assert refresher.last_error == "OSError: source unreachable"
+    # Backing off: no new load until retry_interval has passed
+    assert not refresher.due()
+    assert refresher.get() is good and loader.calls == 2
+
+    refresher.retry_interval = 0
+    assert refresher.refresh().version == 2
+    assert refresher.last_error is None
+
+
+def test_markup_sheet_error_keeps_the_last_good_markups():
+    loader = StubLoader(rate_tables(0), rate_tables(1)._replace(markup_error="no Markup sheet"))
+    refresher = RateRefresher("stub", loader=loader)
+    good = refresher.refresh()
+    assert refresher.refresh() is good
+    assert refresher.last_error.startswith("RuntimeError: Markup sheet could not be read")
+
+
+def test_first_load_error_is_raised_without_a_fallback():
+    refresher = RateRefresher("stub", loader=StubLoader(OSError("source unreachable")))
+    with pytest.raises(OSError):
+        refresher.get()
+
+
+def test_cold_start_serves_the_saved_snapshot(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    store.save(rate_tables(0), saved_at=1_750_000_000.0)
+
+    loader = StubLoader(OSError("source unreachable"))
+    loader.release.clear()
+    refresher = RateRefresher("stub", loader=loader, store=store)
+    restored = refresher.get()
+    assert (restored.from_disk, restored.loaded_at) == (True, 1_750_000_000.0)
+    assert restored.rates_id == rates_id(rate_tables(0))
+    # The live load started in the background; when it fails the saved rates stay
+    assert loader.started.wait(10)
+    loader.release.set()
+    wait_for(lambda: refresher.last_error is not None)
+    assert refresher.get() is restored
+
+
+def test_successful_loads_are_saved(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    refresher = RateRefresher("stub", loader=StubLoader(rate_tables(0), rate_tables(1)), store=store)
+    refresher.refresh()
+    refresher.refresh()
+    assert [rates_id(store.load(path)[0]) for path in store.paths()] == \
+        [rates_id(rate_tables(1)), rates_id(rate_tables(0))]
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from freight_calc.memo import PriceMemo
+from freight_calc.rate_index import RateIndex
+from freight_calc.render import email_table, email_table_html, round_half_even, summary_frame
+from test_pricing import DESTINATIONS, MARKUPS, RM_TYPES, long_rates, random_items
+
+EMAIL_COLUMNS = ["Item", "User", "Supplier", "SQN", "RM Type", "Country", "Origin", "Destination",
+                 "Weight", "Width", "Weight/m", "Air Rate", "Sea Rate"]
+
+
+def old_item_data(idx, item, p, role, user, user_email):
+    """One summary row as the calculator built it before render.summary_frame."""
+    item_data = {
+        "Item": f"Item {idx + 1}",
+        "User": user,
+        "User Email": user_email,
+        "Supplier": item["supplier"],
+        "SQN": item["sqn"],
+        "RM Type": item["rm_type"],
+        "Country": item["country"],
+        "Origin": item["origin"],
+        "Destination": item["destination"],
+        "Weight Value": item["weight_value"],
+        "Weight Type": item["weight_type"],
+        "Converted GSM (g/m²)": round(p["converted_gsm"], 2) if item["weight_type"] == "GLM (g/m)" else None,
+        "Width": item["width"],
+        "Unit": item["unit"],
+        "Width (m)": round(p["width_m"], 4),
+        "Weight/m (kg)": round(p["kg_per_m"], 6),
+        "Air Markup": p["markup"],
+        "Sea Markup": p["markup"],
+    }
+    if role == "Admin":
+        if p["air_rate"] is not None:
+            item_data.update({"Air Rate ($/kg)": round(p["air_rate"], 2),
+                              "Final Air Rate ($)": round(p["final_air_rate"], 4)})
+        if p["sea_rate"] is not None:
+            item_data.update({"Sea Rate ($/CBM)": round(p["sea_rate"], 2),
+                              "Final Sea Rate ($)": round(p["final_sea_rate"], 4)})
+    else:
+        if p["air_rate"] is not None:
+            item_data.update({"Final Air Rate ($)": round(p["final_air_rate"], 4)})
+        if p["sea_rate"] is not None:
+            item_data.update({"Final Sea Rate ($)": round(p["final_sea_rate"], 4)})
+    return item_data
+
+
+def old_email_html(df):
+    """The email preview table as the calculator built it: iterrows and += per cell."""
+    table_data = []
+    for idx, row in df.iterrows():
+        weight_display = f"{row['Weight Value']}"
+        if pd.notna(row['Converted GSM (g/m²)']):
+            weight_display += f" {row['Weight Type']}:-({row['Converted GSM (g/m²)']} g/m²)"
+        else:
+            weight_display += f" {row['Weight Type']}"
+        width_display = f"{row['Width']} {row['Unit']}:-({row['Width (m)']} m)"
+        weight_per_m = f"{row['Weight/m (kg)']} kg/m"
+        air_rate = f"${row['Final Air Rate ($)']:.4f}" if 'Final Air Rate ($)' in row and pd.notna(row['Final Air Rate ($)']) else "N/A"
+        sea_rate = f"${row['Final Sea Rate ($)']:.4f}" if 'Final Sea Rate ($)' in row and pd.notna(row['Final Sea Rate ($)']) else "N/A"
+        table_data.append({
+            "Item": idx + 1, "User": row['User'], "Supplier": row['Supplier'], "SQN": row['SQN'],
+            "RM Type": row['RM Type'], "Country": row['Country'], "Origin": row['Origin'],
+            "Destination": row['Destination'], "Weight": weight_display, "Width": width_display,
+            "Weight/m": weight_per_m, "Air Rate": air_rate, "Sea Rate": sea_rate,
+        })
+
+    html_table = ""
+    if table_data:
+        html_table = "<table style='width:100%; border-collapse: collapse;'>"
+        html_table += "<tr style='background-color: #f2f2f2;'>"
+        for col in EMAIL_COLUMNS:
+            html_table += f"<th style='border: 1px solid #ddd; padding: 8px; text-align: left;'>{col}</th>"
+        html_table += "</tr>"
+        for row in table_data:
+            html_table += "<tr>"
+            for col in EMAIL_COLUMNS:
+                html_table += f"<td style='border: 1px solid #ddd; padding: 8px;'>{row[col]}</td>"
+            html_table += "</tr>"
+        html_table += "</table>"
+    return html_table
+
+
+@pytest.fixture(scope="module")
+def rate_index():
+    return RateIndex.build(long_rates(), DESTINATIONS, MARKUPS, RM_TYPES)
+
+
+def item_lists(count=100, seed=7):
+    rng = np.random.default_rng(seed)
+    suppliers = ["Acme", "", "<b>Mill & Co</b>", "Ünïcode"]
+    for i in range(count):
+        items = random_items(int(rng.integers(1, 13)), seed=seed + i).to_dict("records")
+        for j, item in enumerate(items):
+            item["supplier"] = suppliers[(i + j) % len(suppliers)]
+            item["sqn"] = f"SQN-{j}"
+        yield items
+
+
+@pytest.mark.parametrize("role", ["Admin", "Business"])
+def test_summary_and_email_match_old_loops(rate_index, role):
+    memo = PriceMemo()
+    for items in item_lists():
+        priced = memo.price(items, rate_index, "test")
+        old = pd.DataFrame([old_item_data(i, item, p, role, "Jane", "jane@example.com")
+                            for i, (item, p) in enumerate(zip(items, priced))])
+        new = summary_frame(items, priced, role, "Jane", "jane@example.com")
+        pd.testing.assert_frame_equal(new, old, check_exact=True)
+        assert email_table_html(email_table(new)) == old_email_html(old)
+
+
+def test_email_pages_join_to_the_full_table(rate_index):
+    items = next(item_lists(1, seed=3)) * 5
+    table = email_table(summary_frame(items, PriceMemo().price(items, rate_index, "test"), "Admin", "A", "a"))
+    full = email_table_html(table)
+    pages = [email_table_html(table, start, start + 7) for start in range(0, len(table), 7)]
+    header_end = full.index("</tr>") + len("</tr>")
+    assert full[:header_end] + "".join(p[header_end:-len("</table>")] for p in pages) + "</table>" == full
+    assert email_table_html(table, len(table)) == ""
+
+
+def test_round_half_even_matches_round():
+    rng = np.random.default_rng(0)
+    # Ties and near-ties that np.round can put on the other side of .5
+    values = np.concatenate([[2.675, 0.125, 0.375, 1.0005, 1.00015, 0.0000125, 2.5, -0.125, np.nan],
+                             np.round(rng.uniform(0, 10, 5000), 5),
+                             rng.integers(0, 100_000, 5000) / 2 / 10 ** 4])
+    for decimals in [2, 4, 6]:
+        expected = [v if np.isnan(v) else round(v, decimals) for v in values.tolist()]
+        np.testing.assert_array_equal(round_half_even(values, decimals), expected)
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from freight_calc.pricing import UNITS, WEIGHT_TYPES, price_items
+from freight_calc.rate_index import RateIndex
+from freight_calc.sensitivity import (
+    CONTOUR_STYLE,
+    axis_labels,
+    grid_axis,
+    heatmap_styles,
+    heatmap_table,
+    sensitivity_grid,
+    target_contour,
+)
+from test_pricing import DESTINATIONS, MARKUPS, RM_TYPES, long_rates
+
+
+@pytest.fixture(scope="module")
+def rate_index():
+    return RateIndex.build(long_rates(), DESTINATIONS, MARKUPS, RM_TYPES)
+
+
+@pytest.mark.parametrize("weight_type", WEIGHT_TYPES)
+@pytest.mark.parametrize("unit", UNITS)
+@pytest.mark.parametrize("lane", [("China", "Shanghai", "SL", "Fabric"), ("Vietnam", "Hanoi", "Bangladesh", "Lace"),
+                                  ("Peru", "Lima", "SL", "Zip")])
+def test_grid_matches_price_items(rate_index, weight_type, unit, lane):
+    country, origin, destination, rm_type = lane
+    item = {"rm_type": rm_type, "country": country, "origin": origin, "destination": destination,
+            "weight_value": 1.0, "weight_type": weight_type, "width": 1.0, "unit": unit}
+    weights = grid_axis(20, 400, 9)
+    widths = grid_axis(0, 200, 7)
+    grid = sensitivity_grid(rate_index, item, weights, widths)
+
+    weight_values, width_values = np.meshgrid(weights, widths, indexing="ij")
+    items = pd.DataFrame([dict(item, weight_value=w, width=x)
+                          for w, x in zip(weight_values.ravel(), width_values.ravel())])
+    priced = price_items(items, rate_index)
+    for mode in ["air", "sea"]:
+        assert grid[mode].shape == (len(weights), len(widths))
+        np.testing.assert_array_equal(grid[mode].ravel(), priced[f"final_{mode}_rate"].to_numpy())
+
+
+def test_grid_axis_rejects_empty_or_reversed_ranges():
+    with pytest.raises(ValueError):
+        grid_axis(140, 140, 5)
+    with pytest.raises(ValueError):
+        grid_axis(150, 140, 5)
+
+
+def test_heatmap_table_labels_a_narrow_range_uniquely():
+    weights = grid_axis(100, 100.1, 200)
+    widths = grid_axis(140, 140.01, 200)
+    labels = axis_labels(weights)
+    assert len(set(labels)) == len(weights)
+    assert [f"{w:g}" for w in grid_axis(50, 150, 25)] == axis_labels(grid_axis(50, 150, 25))
+
+    costs = np.add.outer(weights, widths)
+    html = heatmap_table(costs, weights, widths, target=float(np.median(costs))).to_html()
+    assert "100.0005" in html
+
+
+def test_target_contour_marks_the_edge_of_the_affordable_cells():
+    costs = np.array([[1.0, 2.0, 3.0],
+                      [2.0, 3.0, 4.0],
+                      [3.0, 4.0, np.nan]])
+    contour = target_contour(costs, 2.5)
+    np.testing.assert_array_equal(contour, [[False, True, False],
+                                            [True, False, False],
+                                            [False, False, False]])
+    assert not target_contour(costs, 10.0)[0, 0]
+    assert target_contour(costs, 10.0)[2, 1]  # next to the cell without a rate
+
+
+def test_heatmap_styles_shade_by_distance_from_target():
+    costs = np.array([[0.5, 2.0], [4.0, np.nan]])
+    styles = heatmap_styles(costs, 2.0)
+    assert styles[0, 0].startswith("background-color: rgb(109, 188, 123)")  # 75% under: shade 7 of 10
+    assert styles[1, 0].startswith("background-color: rgb(218, 54, 51)")  # 100% over: full red
+    assert styles[0, 1].startswith("background-color: rgb(255, 255, 255)")  # on target: white
+    assert styles[1, 1] == ""
+    assert styles[0, 1].endswith(CONTOUR_STYLE)
+    assert not styles[1, 0].endswith(CONTOUR_STYLE)
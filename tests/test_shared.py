@@ -0,0 +1,94 @@
+import os
+
+import pandas as pd
+import pytest
+
+from freight_calc.ingest import SheetCache
+from freight_calc.loader import load_rate_tables, rates_id
+from freight_calc.pricing import price_items
+from freight_calc.shared import SharedRateReader, map_shared, publish, read_metadata
+from test_ingest import make_workbook
+from test_memo import rate_tables
+from test_pricing import random_items
+
+
+@pytest.fixture(scope="module")
+def tables(tmp_path_factory):
+    path = tmp_path_factory.mktemp("shared") / "rates.xlsx"
+    path.write_bytes(make_workbook())
+    return load_rate_tables(str(path), cache=SheetCache(), history_months=None)
+
+
+def workbook_items(tables, n=500):
+    items = random_items(n, seed=11)
+    lanes = [(c, o, d) for d in tables.all_destinations for c in tables.rate_index.countries_for(d)
+             for o in tables.rate_index.origins_for(d, c)]
+    picks = [lanes[i % len(lanes)] for i in range(n)]
+    items["country"], items["origin"], items["destination"] = zip(*picks)
+    return items
+
+
+def test_publish_and_map_round_trip(tables, tmp_path):
+    path = str(tmp_path / "rates.shared")
+    assert publish(tables, path, load_seconds=1.5) == 1
+    mapped, metadata = map_shared(path)
+
+    assert metadata["generation"] == 1 and metadata["load_seconds"] == 1.5
+    assert metadata["rates_id"] == rates_id(tables) == rates_id(mapped)
+    assert mapped.all_destinations == tables.all_destinations and mapped.rm_types == tables.rm_types
+    assert (mapped.rate_date, mapped.rate_month_year, mapped.markup_error) == \
+        (tables.rate_date, tables.rate_month_year, tables.markup_error)
+    pd.testing.assert_frame_equal(mapped.issues, tables.issues)
+    for d in tables.all_destinations:
+        assert mapped.rate_index.menu(d) == tables.rate_index.menu(d)
+
+    items = workbook_items(tables)
+    pd.testing.assert_frame_equal(price_items(items, mapped.rate_index), price_items(items, tables.rate_index))
+    as_of = pd.Timestamp("2025-02-10")
+    pd.testing.assert_frame_equal(price_items(items, mapped.rate_index, as_of),
+                                  price_items(items, tables.rate_index, as_of))
+    # The mapped arrays are views of the file, not copies
+    assert not mapped.rate_index.air.flags.writeable
+
+
+def test_reader_remaps_a_new_generation(tmp_path):
+    path = str(tmp_path / "rates.shared")
+    first, second = rate_tables(0), rate_tables(1)
+    publish(first, path)
+    reader = SharedRateReader(path)
+    snapshot = reader.get()
+    assert (snapshot.version, snapshot.rates_id) == (1, rates_id(first))
+    assert reader.get() is snapshot  # unchanged file: no remap
+
+    assert publish(second, path) == 2
+    assert read_metadata(path)["generation"] == 2
+    snapshot = reader.get()
+    assert (snapshot.version, snapshot.rates_id) == (2, rates_id(second))
+    items = random_items(300, seed=2)
+    pd.testing.assert_frame_equal(price_items(items, snapshot.tables.rate_index),
+                                  price_items(items, second.rate_index))
+    assert [entry.version for entry in reader.change_log.entries()] == [2]
+
+
+def test_reader_falls_back_when_the_file_is_missing_or_corrupt(tmp_path):
+    path = str(tmp_path / "rates.shared")
+    with pytest.raises(OSError):
+        SharedRateReader(path).get()
+
+    publish(rate_tables(0), path)
+    reader = SharedRateReader(path)
+    snapshot = reader.get()
+
+    os.remove(path)
+    assert reader.get() is snapshot
+    assert reader.last_error.startswith("FileNotFoundError")
+
+    for junk in [b"", b"junk", b"FRSHM001" + b"\xff" * 8, b"FRSHM001\x05\x00\x00\x00\x00\x00\x00\x00{oops"]:
+        with open(path, "wb") as f:
+            f.write(junk)
+        assert reader.get() is snapshot, junk
+        assert reader.last_error
+
+    publish(rate_tables(1), path)
+    assert reader.get().rates_id == rates_id(rate_tables(1))
+    assert reader.last_error is None
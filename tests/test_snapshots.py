@@ -0,0 +1,72 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from freight_calc.ingest import SheetCache
+from freight_calc.loader import load_rate_tables, rates_id
+from freight_calc.pricing import price_items
+from freight_calc.snapshots import SNAPSHOT_PREFIX, SNAPSHOT_SUFFIX, SnapshotStore
+from test_ingest import make_workbook
+from test_memo import rate_tables
+from test_pricing import random_items
+
+SAVED_AT = 1_750_000_000.0
+
+
+def test_save_and_load_round_trip(tmp_path):
+    workbook = tmp_path / "rates.xlsx"
+    workbook.write_bytes(make_workbook())
+    tables = load_rate_tables(str(workbook), cache=SheetCache(), history_months=None)
+    store = SnapshotStore(str(tmp_path / "snapshots"))
+    assert store.load_latest() is None
+
+    path = store.save(tables, saved_at=SAVED_AT)
+    assert os.path.basename(path).endswith(f"-{rates_id(tables)}{SNAPSHOT_SUFFIX}")
+    loaded, saved_at = store.load_latest()
+    assert saved_at == SAVED_AT
+    assert rates_id(loaded) == rates_id(tables)
+    assert (loaded.all_destinations, loaded.rm_types, loaded.rate_date, loaded.markup_error) == \
+        (tables.all_destinations, tables.rm_types, tables.rate_date, tables.markup_error)
+    pd.testing.assert_frame_equal(loaded.issues, tables.issues)
+
+    items = random_items(500, seed=4)
+    items["country"], items["origin"] = "China", "Ningbo"
+    pd.testing.assert_frame_equal(price_items(items, loaded.rate_index), price_items(items, tables.rate_index))
+    as_of = pd.Timestamp("2025-02-01")
+    pd.testing.assert_frame_equal(price_items(items, loaded.rate_index, as_of),
+                                  price_items(items, tables.rate_index, as_of))
+
+
+def test_identical_tables_are_not_saved_twice(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    first = store.save(rate_tables(0), saved_at=SAVED_AT)
+    assert store.save(rate_tables(0), saved_at=SAVED_AT + 60) == first
+    assert store.paths() == [first]
+
+
+def test_prunes_to_keep_newest(tmp_path):
+    store = SnapshotStore(str(tmp_path), keep=3)
+    paths = [store.save(rate_tables(seed), saved_at=SAVED_AT + seed) for seed in range(5)]
+    assert store.paths() == paths[:1:-1]
+    assert rates_id(store.load_latest()[0]) == rates_id(rate_tables(4))
+    # Files that aren't snapshots are left alone
+    (tmp_path / "notes.txt").write_text("keep me")
+    store.prune()
+    assert (tmp_path / "notes.txt").exists() and len(store.paths()) == 3
+
+
+def test_load_latest_skips_unreadable_snapshots(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    store.save(rate_tables(0), saved_at=SAVED_AT)
+
+    # Newer names than the good file: a corrupt file and one of another format
+    (tmp_path / f"{SNAPSHOT_PREFIX}29990101T000000000000-corrupt{SNAPSHOT_SUFFIX}").write_bytes(b"not a zip")
+    with open(tmp_path / f"{SNAPSHOT_PREFIX}29990101T000000000001-future{SNAPSHOT_SUFFIX}", "wb") as f:
+        np.savez(f, metadata=np.array(json.dumps({"format": 99})))
+    assert len(store.paths()) == 3
+
+    tables, saved_at = store.load_latest()
+    assert saved_at == SAVED_AT
+    assert rates_id(tables) == rates_id(rate_tables(0))
@@ -0,0 +1,76 @@
+import pandas as pd
+import pytest
+
+from freight_calc.ingest import SheetCache
+from freight_calc.loader import load_rate_tables
+from freight_calc.validation import ISSUE_COLUMNS, issues_from_records, issues_to_records, summarize_issues
+from test_history import write_workbook
+
+NAN = float("nan")
+
+CLEAN_AIR = pd.DataFrame({
+    "Country": ["China", "China", "India"],
+    "Origin": ["Shanghai", "Ningbo", "Chennai"],
+    "01/01/2025": [2.0, 2.0, 3.0],
+    "02/01/2025": [2.1, 2.4, 3.0],
+})
+CLEAN_SEA = pd.DataFrame({"Country": ["China"], "Origin": ["Shanghai"], "02/01/2025": [40.0]})
+CLEAN_MARKUP = pd.DataFrame({"RM Type": ["Fabric", "Elastic", "Lace"], "SL": [1.15, 1.18, 1.2]})
+
+
+def load(tmp_path, sheets):
+    path = write_workbook(tmp_path / "rates.xlsx", sheets)
+    return load_rate_tables(path, cache=SheetCache(), history_months=None)
+
+
+def test_clean_workbook_has_no_issues(tmp_path):
+    tables = load(tmp_path, {"Air Freight - SL": CLEAN_AIR, "Sea Freight - SL": CLEAN_SEA, "Markup": CLEAN_MARKUP})
+    assert tables.issues.empty and list(tables.issues.columns) == ISSUE_COLUMNS
+    assert summarize_issues(tables.issues) == "no issues"
+
+
+def test_every_issue_type_is_reported(tmp_path):
+    air = pd.DataFrame({
+        "Country": ["China", "China", "India", "Vietnam", "Peru", None, "Chile", "Chile"],
+        "Origin": ["Shanghai", "Ningbo", "Chennai", "Hanoi", "Lima", "Lima", "Santiago", "Santiago"],
+        "01/01/2025": [2.0, 2.0, 3.0, 3.0, NAN, 1.0, 4.0, 4.0],
+        "02/01/2025": [2.1, 5.0, "n/a", NAN, 0.0, 1.0, 4.0, 4.2],
+    })
+    sea = pd.DataFrame({"Country": ["China"], "Origin": ["Shanghai"], "Latest": [40.0]})
+    markup = pd.DataFrame({"RM Type": ["Fabric", "Elastic", "Lace"], "SL": [1.15, NAN, "high"]})
+    issues = load(tmp_path, {"Air Freight - SL": air, "Sea Freight - SL": sea, "Markup": markup}).issues
+
+    found = [tuple(row) for row in issues[["severity", "issue", "mode", "country", "origin", "rm_type"]].values]
+    assert found == [
+        ("error", "date header not a date", "sea", None, None, None),
+        ("error", "missing country/origin", "air", None, "Lima", None),
+        ("error", "non-numeric markup", None, None, None, "Lace"),
+        ("error", "non-numeric rate", "air", "India", "Chennai", None),
+        ("warning", "blank rate", "air", "Vietnam", "Hanoi", None),
+        ("warning", "duplicate lane", "air", "Chile", "Santiago", None),
+        ("warning", "markup missing", None, None, None, "Elastic"),
+        ("warning", "rate jump", "air", "China", "Ningbo", None),
+        ("warning", "rate not positive", "air", "Peru", "Lima", None),
+    ]
+    assert set(issues["destination"]) == {"SL"}
+    assert issues.loc[issues["issue"] == "rate jump", "detail"].item() == "2 -> 5 (+150%)"
+    assert summarize_issues(issues) == "4 errors, 5 warnings"
+
+    restored = issues_from_records(issues_to_records(issues))
+    pd.testing.assert_frame_equal(restored, issues.astype(object))
+
+
+def test_unreadable_markup_sheet_is_an_error(tmp_path):
+    tables = load(tmp_path, {"Air Freight - SL": CLEAN_AIR, "Sea Freight - SL": CLEAN_SEA})
+    assert tables.markup_error
+    assert list(tables.issues["issue"]) == ["markup sheet unreadable"]
+    assert tables.issues["detail"].item().startswith("fallback markups in use:")
+
+
+@pytest.mark.parametrize("months, jumps", [(None, 1), (1, 0)])
+def test_rate_jumps_need_the_previous_month(tmp_path, months, jumps):
+    air = CLEAN_AIR.assign(**{"02/01/2025": [2.1, 9.0, 3.0]})
+    path = write_workbook(tmp_path / "rates.xlsx", {"Air Freight - SL": air, "Sea Freight - SL": CLEAN_SEA,
+                                                   "Markup": CLEAN_MARKUP})
+    issues = load_rate_tables(path, cache=SheetCache(), history_months=months).issues
+    assert (issues["issue"] == "rate jump").sum() == jumps
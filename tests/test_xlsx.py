@@ -0,0 +1,65 @@
+import io
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from freight_calc import xlsx
+from freight_calc.ingest import SHEET_COLUMNS, history_columns
+from freight_calc.xlsx import dedupe_labels, read_columns
+
+HEADER = ["Country", "Origin", "Note", "01/01/2025", "02/01/2025", "02/01/2025", None, "03/01/2025", "03/01/2025"]
+
+
+@pytest.fixture
+def xls():
+    """One rate sheet that repeats two month headers and has a blank header cell."""
+    book = openpyxl.Workbook()
+    ws = book.active
+    ws.title = "Air Freight - SL"
+    ws.append(HEADER)
+    ws.append(["China", "Shanghai", "x", 1.0, 2.0, 2.5, "y", 3.0, 3.5])
+    ws.append(["India", "Chennai", None, 4.0, 5.0, 5.5, None, 6.0, 6.5])
+    buffer = io.BytesIO()
+    book.save(buffer)
+    return pd.ExcelFile(io.BytesIO(buffer.getvalue()), engine="openpyxl")
+
+
+def expected(xls, columns):
+    return xls.parse("Air Freight - SL")[columns]
+
+
+def test_dedupe_labels_matches_pandas():
+    header = dict(enumerate(["a", "b", "a", "a.1", "a", None, None], start=1))
+    assert dedupe_labels(header) == {1: "a", 2: "b", 3: "a.1", 4: "a.1.1", 5: "a.2", 6: None, 7: None}
+
+
+def test_repeated_headers_keep_every_column(xls):
+    def labelled(header):
+        return [column for column, label in header.items() if label is not None]
+
+    frame = read_columns(xls, "Air Freight - SL", SHEET_COLUMNS, labelled)
+    columns = ["Country", "Origin", "Note", "01/01/2025", "02/01/2025", "02/01/2025.1",
+               "03/01/2025", "03/01/2025.1"]
+    pd.testing.assert_frame_equal(frame, expected(xls, columns))
+
+
+def test_history_sees_pandas_labels(xls):
+    # "02/01/2025.1" isn't a date header, as it never was when pandas read the sheet
+    frame = read_columns(xls, "Air Freight - SL", SHEET_COLUMNS, history_columns())
+    columns = ["Country", "Origin", "01/01/2025", "02/01/2025", "03/01/2025", "03/01/2025.1"]
+    pd.testing.assert_frame_equal(frame, expected(xls, columns))
+
+
+def test_latest_column_only(xls):
+    frame = read_columns(xls, "Air Freight - SL", SHEET_COLUMNS)
+    pd.testing.assert_frame_equal(frame, expected(xls, ["Country", "Origin", "03/01/2025.1"]))
+
+
+def test_falls_back_to_pandas_when_openpyxl_internals_change(xls, monkeypatch):
+    def moved(*args, **kwargs):
+        raise AttributeError("'Worksheet' object has no attribute '_get_source'")
+
+    monkeypatch.setattr(xlsx.ColumnParser, "parse_columns", moved)
+    frame = read_columns(xls, "Air Freight - SL", SHEET_COLUMNS, history_columns(2))
+    pd.testing.assert_frame_equal(frame, expected(xls, ["Country", "Origin", "02/01/2025", "03/01/2025", "03/01/2025.1"]))